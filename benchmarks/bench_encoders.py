@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+#  Copyright 2016 Eric Lacombe <eric.lacombe@security-labs.org>
+#
+################################################################################
+#
+#  This file is part of fuddly.
+#
+#  fuddly is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  fuddly is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with fuddly. If not, see <http://www.gnu.org/licenses/>
+#
+################################################################################
+
+
+"""
+Micro-benchmark of the bulk GSM 7-bit packing and bit reversal encoders against
+their bytewise counterparts. Outputs are checked to be identical before timing.
+"""
+
+from __future__ import print_function
+
+import struct
+import random
+
+from bench_helpers import Benchmark, main
+
+from framework.encoders import *
+from framework.encoders import _gsm7bit_pack_bytewise, _gsm7bit_unpack_bytewise
+
+
+def bytewise_bit_reverse(val):
+    rev = lambda x: sum(1<<(7-i) for i in range(8) if x>>i&1)
+    return b''.join(struct.pack('B', rev(b)) for b in bytearray(val)[::-1])
+
+def make_case(kind, sz, bulk):
+    def setup():
+        rd = random.Random(0)
+        msg = bytes(bytearray(rd.randrange(0x80) for _ in range(sz)))
+        blob = bytes(bytearray(rd.randrange(0x100) for _ in range(sz)))
+        gsm = GSM7bitPacking_Enc()
+        rev = BitReverse_Enc()
+
+        cases = {'gsm7bit_encode': (gsm.encode, _gsm7bit_pack_bytewise, msg),
+                 'gsm7bit_decode': (gsm.decode, _gsm7bit_unpack_bytewise, gsm.encode(msg)),
+                 'bit_reverse': (rev.encode, bytewise_bit_reverse, blob)}
+        bulk_func, bytewise_func, arg = cases[kind]
+        assert bulk_func(arg) == bytewise_func(arg)
+
+        func = bulk_func if bulk else bytewise_func
+        return lambda: func(arg)
+    return setup
+
+
+benchmarks = []
+for sz, rounds in [(160, 5000), (4096, 200)]:
+    for kind in ('gsm7bit_encode', 'gsm7bit_decode', 'bit_reverse'):
+        for bulk in (True, False):
+            benchmarks.append(
+                Benchmark('encoders.{:s}.{:d}B.{:s}'.format(kind, sz, 'bulk' if bulk else 'bytewise'),
+                          make_case(kind, sz, bulk), rounds))
+
+if __name__ == "__main__":
+
+    main(benchmarks)
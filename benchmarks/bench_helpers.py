@@ -0,0 +1,263 @@
+################################################################################
+#
+#  Copyright 2016 Eric Lacombe <eric.lacombe@security-labs.org>
+#
+################################################################################
+#
+#  This file is part of fuddly.
+#
+#  fuddly is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  fuddly is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with fuddly. If not, see <http://www.gnu.org/licenses/>
+#
+################################################################################
+
+"""
+Common helpers of the benchmark suite.
+
+Each bench_*.py module defines a list ``benchmarks`` of :class:`Benchmark` and calls
+:func:`main` when run directly. Every benchmark is run in its own python process so that
+its peak RSS is meaningful and its workload is not influenced by the previous ones.
+Results can be written to a JSON file (``--output``), which can then be compared to
+the one of another commit through ``--compare``.
+"""
+
+from __future__ import print_function
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import signal
+import inspect
+import argparse
+import datetime
+import platform
+import threading
+import subprocess
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0,parentdir)
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+clock = getattr(time, 'perf_counter', time.time)
+
+
+class BenchmarkSkipped(Exception): pass
+
+
+class Benchmark(object):
+    """
+    A reproducible workload.
+
+    Args:
+        name (str): unique name of the benchmark (dot-separated components)
+        setup (callable): prepare the workload and return the callable performing one
+          operation. It can also return a pair ``(prepare, operation)``, in which case
+          ``prepare()`` is called out of the measures before each operation and its result
+          is given to it. It can raise :class:`BenchmarkSkipped` if the workload is
+          unavailable.
+        rounds (int): number of measured operations
+        warmup (int): number of operations performed before the measures
+        teardown (callable): called after the measures
+    """
+
+    def __init__(self, name, setup, rounds, warmup=1, teardown=None):
+        self.name = name
+        self.setup = setup
+        self.rounds = rounds
+        self.warmup = warmup
+        self.teardown = teardown
+
+    def run(self, rounds=None):
+        rounds = self.rounds if rounds is None else rounds
+        random.seed(0)
+        try:
+            op = self.setup()
+            if isinstance(op, tuple):
+                prepare, op = op
+            else:
+                prepare = None
+
+            for _ in range(self.warmup):
+                op() if prepare is None else op(prepare())
+
+            random.seed(0)
+            latencies = []
+            for _ in range(rounds):
+                arg = None if prepare is None else prepare()
+                t0 = clock()
+                op() if prepare is None else op(arg)
+                latencies.append(clock() - t0)
+            total = sum(latencies)
+        finally:
+            if self.teardown is not None:
+                self.teardown()
+
+        latencies.sort()
+        return {
+            'rounds': rounds,
+            'total_s': total,
+            'ops_per_sec': rounds / total if total > 0 else None,
+            'p50_ms': percentile(latencies, 50) * 1000,
+            'p99_ms': percentile(latencies, 99) * 1000,
+        }
+
+
+def percentile(sorted_values, pct):
+    idx = int(round(pct / 100.0 * (len(sorted_values) - 1)))
+    return sorted_values[idx]
+
+def peak_rss_kb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, in kilobytes elsewhere
+    return rss // 1024 if sys.platform == 'darwin' else rss
+
+def run_in_current_process(bench, rounds=None):
+    real_stdout = sys.stdout
+    # workloads relying on fuddly may be verbose
+    sys.stdout = open(os.devnull, 'w')
+    try:
+        result = bench.run(rounds=rounds)
+        result['status'] = 'ok'
+    except BenchmarkSkipped as e:
+        result = {'status': 'skipped', 'reason': str(e)}
+    except Exception as e:
+        result = {'status': 'error', 'reason': '{:s}: {!s}'.format(type(e).__name__, e)}
+    finally:
+        sys.stdout.close()
+        sys.stdout = real_stdout
+
+    result['name'] = bench.name
+    result['peak_rss_kb'] = peak_rss_kb()
+    return result
+
+def run_in_subprocess(script, bench, rounds=None, timeout=None):
+    cmd = [sys.executable, script, '--run-one', bench.name]
+    if rounds is not None:
+        cmd += ['--rounds', str(rounds)]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    timer = None if timeout is None else threading.Timer(timeout, proc.kill)
+    if timer is not None:
+        timer.start()
+    try:
+        out, err = proc.communicate()
+    finally:
+        if timer is not None:
+            timer.cancel()
+
+    lines = out.decode('utf8', 'replace').strip().splitlines()
+    try:
+        return json.loads(lines[-1])
+    except (IndexError, ValueError):
+        if timeout is not None and proc.returncode == -signal.SIGKILL:
+            return {'name': bench.name, 'status': 'timeout',
+                    'reason': 'not completed within {:.0f}s'.format(timeout)}
+        reason = err.decode('utf8', 'replace').strip().splitlines()
+        return {'name': bench.name, 'status': 'error',
+                'reason': reason[-1] if reason else 'exit code {:d}'.format(proc.returncode)}
+
+def git_revision():
+    try:
+        out = subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=parentdir,
+                                      stderr=open(os.devnull, 'w'))
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.decode('ascii').strip()
+
+def format_result(res):
+    if res['status'] != 'ok':
+        return '{:s}: {:s} ({:s})'.format(res['name'], res['status'].upper(), res['reason'])
+    return ('{name:s}: {ops_per_sec:.1f} ops/s | p50 {p50_ms:.3f} ms | p99 {p99_ms:.3f} ms'
+            ' | peak RSS {peak_rss_kb:d} KB'.format(**res))
+
+def compare_results(baseline, results):
+    old = dict((r['name'], r) for r in baseline['results'])
+    print('Comparison with {:s}:'.format(baseline.get('revision') or 'baseline'))
+    for res in results:
+        ref = old.get(res['name'])
+        if ref is None or res['status'] != 'ok' or ref['status'] != 'ok':
+            continue
+        print('  {:s}: ops/s x{:.2f} | p50 x{:.2f} | p99 x{:.2f} | peak RSS {:+d} KB'
+              .format(res['name'], res['ops_per_sec'] / ref['ops_per_sec'],
+                      res['p50_ms'] / max(ref['p50_ms'], 1e-9),
+                      res['p99_ms'] / max(ref['p99_ms'], 1e-9),
+                      res['peak_rss_kb'] - ref['peak_rss_kb']))
+
+
+def main(benchmarks, script=None):
+    """
+    Command line entry point shared by the benchmark scripts.
+    """
+    parser = argparse.ArgumentParser(description='Run fuddly benchmarks')
+    parser.add_argument('-l', '--list', action='store_true', help='List the benchmarks')
+    parser.add_argument('-f', '--filter', metavar='REGEXP',
+                        help='Only run the benchmarks whose name matches REGEXP')
+    parser.add_argument('-o', '--output', metavar='FILE', help='Write the results (JSON) to FILE')
+    parser.add_argument('--compare', metavar='FILE',
+                        help='Compare the results with the ones (JSON) stored in FILE')
+    parser.add_argument('-r', '--rounds', type=int, metavar='NB',
+                        help='Override the number of measured operations of every benchmark')
+    parser.add_argument('-t', '--timeout', type=float, metavar='SECONDS', default=300,
+                        help='Maximum duration of a benchmark (default: %(default)ss)')
+    parser.add_argument('--run-one', metavar='NAME', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one is not None:
+        for bench in benchmarks:
+            if bench.name == args.run_one:
+                print(json.dumps(run_in_current_process(bench, rounds=args.rounds)))
+                sys.exit(0)
+        sys.exit(-1)
+
+    if args.filter is not None:
+        regexp = re.compile(args.filter)
+        benchmarks = [b for b in benchmarks if regexp.search(b.name)]
+
+    if args.list:
+        for bench in benchmarks:
+            print(bench.name)
+        sys.exit(0)
+
+    script = os.path.abspath(sys.argv[0]) if script is None else script
+    results = []
+    for bench in benchmarks:
+        res = run_in_subprocess(script, bench, rounds=args.rounds, timeout=args.timeout)
+        results.append(res)
+        print(format_result(res))
+        sys.stdout.flush()
+
+    doc = {
+        'revision': git_revision(),
+        'date': datetime.datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(doc, f, indent=2)
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            compare_results(json.load(f), results)
@@ -0,0 +1,230 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+#  Copyright 2016 Eric Lacombe <eric.lacombe@security-labs.org>
+#
+################################################################################
+#
+#  This file is part of fuddly.
+#
+#  fuddly is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  fuddly is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with fuddly. If not, see <http://www.gnu.org/licenses/>
+#
+################################################################################
+
+
+"""
+Benchmarks of the data generation and sending pipeline on the shipped data models:
+node freeze/serialization, cloning, absorption, model walks (tTYPE, tSTRUCT, tALT),
+fuzz list generation of value types, FmkDB insertion and send_data_and_log() against
+the local TestTarget of the 'tuto' project.
+
+The fuddly instances used by these benchmarks record into a temporary fmkDB.
+"""
+
+from __future__ import print_function
+
+import os
+import shutil
+import tempfile
+import datetime
+
+from bench_helpers import Benchmark, BenchmarkSkipped, main
+
+from framework.database import Database
+from framework.global_resources import UI
+from framework.plumbing import FmkPlumbing
+from framework.value_types import *
+
+# data model name, atom name
+# (data model, atom, number of freeze/clone operations, number of walking steps).
+# The numbers are lowered for the atoms whose generation takes more than a few tens of
+# milliseconds, and for the USB configuration whose tALT walk blows up after ~15 steps.
+data_models = [
+    ('mydf', 'TestNode', 200, 100),
+    ('usb', 'CONF', 100, 15),
+    ('pdf', 'PDF_basic', 20, 100),
+    ('zip', 'ZIP', 20, 100),
+    ('png', 'PNG_model', 20, 100),
+    ('jpg', 'jpg', 200, 100),
+    ('sms', 'smstxt', 200, 100),
+    ('HTTP', 'HTTP_message', 20, 100),
+]
+
+# TestTarget(fbk_samples=['CRC error', 'OK']) of the 'tuto' project
+TUTO_TEST_TARGET = 7
+
+
+class FmkSession(object):
+
+    def __init__(self, dm_name):
+        self.tmp_dir = tempfile.mkdtemp(prefix='fuddly_bench_')
+        self.fmk = FmkPlumbing(quiet=True, fmkdb_path=os.path.join(self.tmp_dir, 'fmkDB.db'))
+        self.fmk.start()
+        try:
+            ok = self.fmk.run_project(name='tuto', tg_ids=[TUTO_TEST_TARGET], dm_name=dm_name)
+        except Exception:
+            ok = False
+        if not ok:
+            self.fmk.fmkDB.stop()
+            shutil.rmtree(self.tmp_dir, ignore_errors=True)
+            raise BenchmarkSkipped("the data model '{:s}' cannot be loaded".format(dm_name))
+        self.fmk.set_fuzz_delay(0)
+
+    def close(self):
+        self.fmk.stop()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+
+_session = []
+
+def _open_session(dm_name):
+    _session.append(FmkSession(dm_name))
+    return _session[-1].fmk
+
+def _close_session():
+    while _session:
+        _session.pop().close()
+
+
+def bench_generation(dm_name, atom_name):
+    def setup():
+        dm = _open_session(dm_name).dm
+        atom = dm.get_atom(atom_name)
+        def func():
+            atom.unfreeze(recursive=True)
+            atom.freeze()
+            atom.to_bytes()
+        return func
+    return setup
+
+def bench_clone(dm_name, atom_name):
+    def setup():
+        atom = _open_session(dm_name).dm.get_atom(atom_name)
+        return atom.get_clone
+    return setup
+
+def bench_absorption(dm_name, atom_name):
+    def setup():
+        dm = _open_session(dm_name).dm
+        raw = dm.get_atom(atom_name).to_bytes()
+        def absorb(atom):
+            status, off, size, name = atom.absorb(raw, constraints=AbsFullCsts())
+            return status == AbsorbStatus.FullyAbsorbed
+        try:
+            absorbable = absorb(dm.get_atom(atom_name))
+        except Exception:
+            absorbable = False
+        if not absorbable:
+            raise BenchmarkSkipped("'{:s}' cannot absorb its own output".format(atom_name))
+
+        def func(atom):
+            if not absorb(atom):
+                raise ValueError('absorption failed')
+        # the cloning of the atoms to absorb into is not measured
+        return lambda: dm.get_atom(atom_name), func
+    return setup
+
+def bench_walk(dm_name, atom_name, disruptor):
+    def setup():
+        fmk = _open_session(dm_name)
+        actions = [atom_name.upper(), (disruptor, UI())]
+        if fmk.get_data(actions) is None:
+            raise BenchmarkSkipped("{:s} has nothing to walk in '{:s}'".format(disruptor, atom_name))
+        fmk.cleanup_all_dmakers(reset_existing_seed=True)
+
+        def func():
+            if fmk.get_data(actions) is None:
+                # the walk is over, restart it
+                fmk.cleanup_all_dmakers(reset_existing_seed=True)
+                fmk.get_data(actions)
+        return func
+    return setup
+
+def bench_send(dm_name, atom_name):
+    def setup():
+        fmk = _open_session(dm_name)
+        data = fmk.get_data([atom_name.upper()])
+        return lambda: fmk.send_data_and_log(data)
+    return setup
+
+def bench_fuzz_list(vt_builder):
+    def setup():
+        return lambda: vt_builder().get_fuzzed_vt_list()
+    return setup
+
+def bench_bitfield_fuzz_mode():
+    def func():
+        bf = BitField(subfield_sizes=[4, 4, 4, 12], subfield_values=[[4, 2, 1], None, [3], None],
+                      subfield_val_extremums=[None, [3, 11], None, [0, 2000]])
+        bf.enable_fuzz_mode()
+        while not bf.is_exhausted():
+            bf.get_value()
+    return lambda: func
+
+def bench_fmkdb_insertion():
+    # as seen by the sending loop, the statements being handled by the FmkDB thread
+    tmp_dir = []
+    def setup():
+        tmp_dir.append(tempfile.mkdtemp(prefix='fuddly_bench_'))
+        db = Database(fmkdb_path=os.path.join(tmp_dir[0], 'fmkDB.db'))
+        db.start()
+        db.insert_data_model('bench')
+        db.insert_project('bench')
+        content = b'A'*512
+        def func():
+            now = datetime.datetime.now()
+            data_id = db.insert_data('BENCH', 'bench', content, len(content), now, now,
+                                     'target', 'bench', group_id=1)
+            db.insert_steps(data_id, 1, 'BENCH', 'g_bench', None, None, None)
+            db.insert_feedback(data_id, 'target', now, b'OK', status_code=0)
+        tmp_dir.append(db)
+        return func
+    def teardown():
+        tmp_dir[1].stop()
+        shutil.rmtree(tmp_dir[0], ignore_errors=True)
+    return setup, teardown
+
+
+benchmarks = []
+for dm_name, atom_name, nb, nb_steps in data_models:
+    prefix = 'pipeline.{:s}.{:s}.'.format(dm_name, atom_name)
+    benchmarks += [
+        Benchmark(prefix + 'freeze', bench_generation(dm_name, atom_name), nb,
+                  teardown=_close_session),
+        Benchmark(prefix + 'clone', bench_clone(dm_name, atom_name), nb,
+                  teardown=_close_session),
+        Benchmark(prefix + 'absorb', bench_absorption(dm_name, atom_name), 20, warmup=1,
+                  teardown=_close_session),
+    ]
+    for disruptor in ('tTYPE', 'tSTRUCT', 'tALT'):
+        benchmarks.append(Benchmark(prefix + disruptor, bench_walk(dm_name, atom_name, disruptor),
+                                    nb_steps, teardown=_close_session))
+    benchmarks.append(Benchmark(prefix + 'send_data_and_log', bench_send(dm_name, atom_name), 50,
+                                teardown=_close_session))
+
+benchmarks += [
+    Benchmark('value_types.String.fuzz_list',
+              bench_fuzz_list(lambda: String(values=['fuddly', 'benchmark'], max_sz=20)), 500),
+    Benchmark('value_types.INT.fuzz_list',
+              bench_fuzz_list(lambda: UINT16_be(values=[10, 200, 3000])), 500),
+    Benchmark('value_types.BitField.fuzz_mode', bench_bitfield_fuzz_mode(), 50),
+]
+
+setup, teardown = bench_fmkdb_insertion()
+benchmarks.append(Benchmark('fmkdb.insertion', setup, 1000, teardown=teardown))
+
+if __name__ == "__main__":
+
+    main(benchmarks)
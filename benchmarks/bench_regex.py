@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+#  Copyright 2016 Eric Lacombe <eric.lacombe@security-labs.org>
+#
+################################################################################
+#
+#  This file is part of fuddly.
+#
+#  fuddly is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  fuddly is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with fuddly. If not, see <http://www.gnu.org/licenses/>
+#
+################################################################################
+
+"""
+Benchmark of the RegexParser cache, based on the HTTP data model whose descriptions
+rely heavily on the regex shorthand.
+
+Each scenario is run with the regex cache enabled and disabled.
+"""
+
+from __future__ import print_function
+
+from bench_helpers import Benchmark, main
+
+from framework.node_builder import RegexParser
+from framework.dmhelpers.generic import MH
+from data_models.protocols.http import HTTPModel
+
+
+regexes = ['GET|POST|PUT|DELETE|HEAD|OPTIONS', '[a-zA-Z0-9]+', '[0-9]', 'Not Found',
+           '(HTTP)/[0-9]\\.[0-9]', 'www\\.[a-z]+\\.(com|org)', '(333|444)|(foo|bar)|\\d|[th|is]']
+
+def bench_model_build():
+    def func():
+        dm = HTTPModel()
+        dm.build_data_model()
+    return func
+
+def bench_parse():
+    def func():
+        for regex in regexes:
+            RegexParser().parse(regex, 'regex', MH.Charset.ASCII_EXT)
+    return func
+
+def with_cache(builder, enabled):
+    def setup():
+        if not enabled:
+            RegexParser.cache_size = 0
+        RegexParser.clear_cache()
+        return builder()
+    return setup
+
+def restore_cache_size(size=RegexParser.cache_size):
+    RegexParser.cache_size = size
+    RegexParser.clear_cache()
+
+
+scenarios = [
+    ('http_model_build', bench_model_build, 200),
+    ('parse', bench_parse, 2000),
+]
+
+benchmarks = []
+for desc, builder, rounds in scenarios:
+    for enabled in (True, False):
+        benchmarks.append(
+            Benchmark('regex.{:s}.{:s}'.format(desc, 'cache' if enabled else 'nocache'),
+                      with_cache(builder, enabled), rounds, teardown=restore_cache_size))
+
+if __name__ == "__main__":
+
+    main(benchmarks)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+#  Copyright 2016 Eric Lacombe <eric.lacombe@security-labs.org>
+#
+################################################################################
+#
+#  This file is part of fuddly.
+#
+#  fuddly is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  fuddly is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with fuddly. If not, see <http://www.gnu.org/licenses/>
+#
+################################################################################
+
+
+"""
+Benchmark of the encoding cache of String value types, based on the SMS data model
+which relies on GSM 7-bit packing.
+
+Each scenario is run with the encoding cache enabled and disabled.
+
+Since GSM 7-bit packing is done in bulk (refer to bench_encoders.py), encoding is
+cheap and the cache only makes the tTYPE walk a few percent faster; generation and
+absorption are not affected.
+"""
+
+from __future__ import print_function
+
+import random
+
+from bench_helpers import Benchmark, main
+
+from framework.value_types import *
+from framework.fuzzing_primitives import *
+from data_models.protocols.sms import SMS_DataModel
+
+
+def get_sms_atom(name):
+    dm = SMS_DataModel()
+    dm.build_data_model()
+    return dm.get_atom(name)
+
+def bench_generation():
+    dm = SMS_DataModel()
+    dm.build_data_model()
+    def func():
+        dm.get_atom('smstxt').to_bytes()
+    return func
+
+def bench_ttype_walk():
+    def func():
+        random.seed(0)
+        atom = get_sms_atom('smstxt')
+        atom.freeze()
+        consumer = TypedNodeDisruption(fuzz_magnitude=1.0)
+        consumer.set_node_interest(path_regexp='smstxt/user_data')
+        for rnode, _, _, _ in ModelWalker(atom, consumer, make_determinist=True, max_steps=30):
+            rnode.to_bytes()
+    return func
+
+def bench_absorption():
+    raw = get_sms_atom('smstxt').to_bytes()
+    def func():
+        atom = get_sms_atom('smstxt')
+        atom.absorb(raw, constraints=AbsFullCsts())
+    return func
+
+def with_cache(builder, enabled):
+    def setup():
+        if not enabled:
+            GSM7bitPacking.encoding_cache_size = 0
+        String._encoding_caches.clear()
+        return builder()
+    return setup
+
+
+scenarios = [
+    ('generation', bench_generation, 2000),
+    ('ttype_walk', bench_ttype_walk, 20),
+    ('absorption', bench_absorption, 500),
+]
+
+benchmarks = []
+for desc, builder, rounds in scenarios:
+    for enabled in (True, False):
+        benchmarks.append(
+            Benchmark('string_encoding.smstxt.{:s}.{:s}'.format(desc, 'cache' if enabled else 'nocache'),
+                      with_cache(builder, enabled), rounds))
+
+if __name__ == "__main__":
+
+    main(benchmarks)
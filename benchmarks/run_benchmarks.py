@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+#  Copyright 2016 Eric Lacombe <eric.lacombe@security-labs.org>
+#
+################################################################################
+#
+#  This file is part of fuddly.
+#
+#  fuddly is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  fuddly is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with fuddly. If not, see <http://www.gnu.org/licenses/>
+#
+################################################################################
+
+
+"""
+Run the whole benchmark suite, i.e., the benchmarks of every bench_*.py module.
+
+Usage examples:
+    ./run_benchmarks.py -o before.json
+    ./run_benchmarks.py -f 'pipeline\.sms' -o after.json --compare before.json
+"""
+
+from __future__ import print_function
+
+import os
+import glob
+import importlib
+
+from bench_helpers import currentdir, main
+
+
+def collect_benchmarks():
+    benchmarks = []
+    for path in sorted(glob.glob(os.path.join(currentdir, 'bench_*.py'))):
+        name = os.path.splitext(os.path.basename(path))[0]
+        if name == 'bench_helpers':
+            continue
+        benchmarks += importlib.import_module(name).benchmarks
+    return benchmarks
+
+
+if __name__ == "__main__":
+
+    main(collect_benchmarks())
@@ -27,45 +27,46 @@ import string
 import array
 
 from framework.global_resources import convert_to_internal_repr
+from framework.prng import tc_random
 
-def rand_string(size=None, min=1, max=10, str_set=string.printable):
+def rand_string(size=None, min=1, max=10, str_set=string.printable, rng=tc_random):
 
     out = ""
     if size is None:
-        size = random.randint(min, max)
+        size = rng.randint(min, max)
     else:
         # if size is not an int, TypeError is raised with python3, but not
         # with python2 where the loop condition is always evaluated to True
         assert isinstance(size, int)
 
     while len(out) < size:
-        val = random.choice(str_set)
+        val = rng.choice(str_set)
         out += val
 
     return out
 
 
-def corrupt_bytes(s, p=0.01, n=None, ctrl_char=False):
+def corrupt_bytes(s, p=0.01, n=None, ctrl_char=False, rng=tc_random):
     """Corrupt a given percentage or number of bytes from a string"""
     s = bytearray(s)
     l = len(s)
     if n is None:
         n = max(1,int(l*p))
-    for i in random.sample(range(l), n):
+    for i in rng.sample(range(l), n):
         if ctrl_char:
-            s[i] = random.choice([x for x in range(0,32)] + [0x7f])
+            s[i] = rng.choice([x for x in range(0,32)] + [0x7f])
         else:
-            s[i] = (s[i]+random.randint(1,255))%256
+            s[i] = (s[i]+rng.randint(1,255))%256
 
     return bytes(s)
 
-def corrupt_bits(s, p=0.01, n=None, ascii=False):
+def corrupt_bits(s, p=0.01, n=None, ascii=False, rng=tc_random):
     """Flip a given percentage or number of bits from a string"""
     s = bytearray(s)
     l = len(s)*8
     if n is None:
         n = max(1,int(l*p))
-    for i in random.sample(range(l), n):
+    for i in rng.sample(range(l), n):
         s[i//8] ^= 1 << (i%8)
         if ascii:
             s[i//8] &= 0x7f
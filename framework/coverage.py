@@ -0,0 +1,334 @@
+################################################################################
+#
+#  Copyright 2016 Eric Lacombe <eric.lacombe@security-labs.org>
+#
+################################################################################
+#
+#  This file is part of fuddly.
+#
+#  fuddly is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  fuddly is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with fuddly. If not, see <http://www.gnu.org/licenses/>
+#
+################################################################################
+
+
+import bisect
+import ctypes
+import ctypes.util
+import mmap
+import os
+import re
+
+from framework.data import Data
+from framework.prng import tc_random
+
+
+class CoverageMap(object):
+    '''
+    Edge-coverage bitmap shared with a program instrumented at compile time
+    (``afl-clang-fast``, ``afl-gcc``, ``-fsanitize-coverage=trace-pc-guard`` shims, ...).
+    The program increments one byte of the bitmap for each edge it goes through, and
+    the bitmap is compared after each execution with the coverage gathered so far.
+
+    The bitmap is located in a shared memory segment whose identifier is provided to
+    the program through the ``__AFL_SHM_ID`` environment variable, like AFL does:
+
+    - ``SHM_SYSV``: a System V segment (the variable contains its ID);
+    - ``SHM_POSIX``: a POSIX segment created within :attr:`shm_folder` (the variable
+      contains its name, as expected by programs built to use ``shm_open()``).
+
+    Hit counts are classified into buckets (1, 2, 3, 4-7, 8-15, 16-31, 32-127, 128+),
+    thus an execution increases the coverage if it goes through a new edge or if it
+    goes through a known edge a number of times belonging to a new bucket.
+    '''
+
+    SHM_SYSV = 1
+    SHM_POSIX = 2
+
+    SHM_ENV = '__AFL_SHM_ID'
+    MAP_SIZE_ENV = 'AFL_MAP_SIZE'
+
+    shm_folder = '/dev/shm'
+
+    _IPC_PRIVATE = 0
+    _IPC_CREAT = 0o1000
+    _IPC_EXCL = 0o2000
+    _IPC_RMID = 0
+
+    _buckets = bytes(bytearray(
+        [0, 1, 2, 4] + [8] * 4 + [16] * 8 + [32] * 16 + [64] * 96 + [128] * 128))
+
+    _libc = None
+
+    def __init__(self, map_size=65536, shm_type=SHM_SYSV):
+        assert map_size > 0
+        self.map_size = map_size
+        self.shm_type = shm_type
+        self._shm_id = None
+        self._shm_addr = None
+        self._shm_path = None
+        self._mmap = None
+        self._view = None
+        self._zero = bytes(bytearray(map_size))
+        self.reset_coverage()
+
+    def reset_coverage(self):
+        '''
+        Forget the coverage gathered so far.
+        '''
+        self._virgin = (1 << (self.map_size * 8)) - 1
+        self._known_traces = set()
+        self.edges_covered = 0
+
+    @classmethod
+    def _get_libc(cls):
+        if cls._libc is None:
+            libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+            libc.shmget.restype = ctypes.c_int
+            libc.shmget.argtypes = [ctypes.c_int, ctypes.c_size_t, ctypes.c_int]
+            libc.shmat.restype = ctypes.c_void_p
+            libc.shmat.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_int]
+            libc.shmdt.restype = ctypes.c_int
+            libc.shmdt.argtypes = [ctypes.c_void_p]
+            libc.shmctl.restype = ctypes.c_int
+            libc.shmctl.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_void_p]
+            cls._libc = libc
+        return cls._libc
+
+    def _raise_os_error(self, func):
+        err = ctypes.get_errno()
+        raise OSError(err, '{:s}(): {:s}'.format(func, os.strerror(err)))
+
+    def setup(self):
+        '''
+        Create and map the shared memory segment (idempotent).
+        '''
+        if self._view is not None:
+            return
+
+        if self.shm_type == self.SHM_SYSV:
+            libc = self._get_libc()
+            self._shm_id = libc.shmget(self._IPC_PRIVATE, self.map_size,
+                                       self._IPC_CREAT | self._IPC_EXCL | 0o600)
+            if self._shm_id < 0:
+                self._shm_id = None
+                self._raise_os_error('shmget')
+            addr = libc.shmat(self._shm_id, None, 0)
+            if addr is None or addr == ctypes.c_void_p(-1).value:
+                libc.shmctl(self._shm_id, self._IPC_RMID, None)
+                self._shm_id = None
+                self._raise_os_error('shmat')
+            self._shm_addr = addr
+            buf = (ctypes.c_ubyte * self.map_size).from_address(addr)
+            self._view = memoryview(buf).cast('B')
+
+        elif self.shm_type == self.SHM_POSIX:
+            name = 'fuddly_cov_{:d}_{:d}'.format(os.getpid(), id(self))
+            self._shm_path = os.path.join(self.shm_folder, name)
+            fd = os.open(self._shm_path, os.O_RDWR | os.O_CREAT | os.O_EXCL, 0o600)
+            try:
+                os.ftruncate(fd, self.map_size)
+                self._mmap = mmap.mmap(fd, self.map_size)
+            finally:
+                os.close(fd)
+            self._view = memoryview(self._mmap)
+
+        else:
+            raise ValueError('unknown shared memory type')
+
+    def release(self):
+        '''
+        Unmap and destroy the shared memory segment.
+        '''
+        if self._view is None:
+            return
+        self._view.release()
+        self._view = None
+        if self._shm_id is not None:
+            libc = self._get_libc()
+            libc.shmdt(self._shm_addr)
+            libc.shmctl(self._shm_id, self._IPC_RMID, None)
+            self._shm_id = None
+            self._shm_addr = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+            os.unlink(self._shm_path)
+            self._shm_path = None
+
+    def get_env(self):
+        '''
+        Returns:
+            dict: the environment variables to provide to the instrumented program
+        '''
+        if self.shm_type == self.SHM_SYSV:
+            shm_id = str(self._shm_id)
+        else:
+            shm_id = '/' + os.path.basename(self._shm_path)
+        return {self.SHM_ENV: shm_id, self.MAP_SIZE_ENV: str(self.map_size)}
+
+    def clear(self):
+        '''
+        Zero the bitmap before a new execution.
+        '''
+        self._view[:] = self._zero
+
+    def get_bitmap(self):
+        return self._view.tobytes()
+
+    def analyze(self):
+        '''
+        Compare the bitmap filled by the last execution with the coverage gathered
+        so far, and merge it.
+
+        Returns:
+            int: the number of new (edge, hit-count bucket) pairs, 0 if the execution
+            has not increased the coverage.
+        '''
+        trace = self._view.tobytes().translate(self._buckets)
+
+        # Most executions go through already seen paths. Their trace is identified
+        # by its hash, avoiding to compare the whole bitmap.
+        trace_hash = hash(trace)
+        if trace_hash in self._known_traces:
+            return 0
+        self._known_traces.add(trace_hash)
+
+        bits = int.from_bytes(trace, 'little')
+        new_bits = bits & self._virgin
+        if not new_bits:
+            return 0
+
+        self._virgin &= ~bits
+        covered = ((1 << (self.map_size * 8)) - 1) ^ self._virgin
+        covered = covered.to_bytes(self.map_size, 'little')
+        self.edges_covered = self.map_size - covered.count(b'\x00')
+
+        return bin(new_bits).count('1')
+
+
+class CorpusEntry(object):
+
+    def __init__(self, data, new_bits):
+        self._data = data
+        self.seed = Data(data.get_content(do_copy=True))
+        self.new_bits = new_bits
+        self.size = self.seed.get_length()
+        self.nb_picked = 0
+
+    @property
+    def data_id(self):
+        return self._data.get_data_id()
+
+
+class Corpus(object):
+    '''
+    In-memory corpus of the data that have increased the coverage of a target,
+    to be used as seeds for the next test cases (refer to the generator ``CORPUS``).
+
+    Each data that increases the coverage is reported as a feedback entry from
+    :attr:`fbk_ref`, which is recorded in the FmkDB with the data. A corpus can thus
+    be restored from a previous session through :meth:`restore_from_fmkdb`. As the
+    FmkDB only records raw data, the restored seeds are absorbed again by an atom of
+    their data model if it is provided, so that node-based disruptors can still walk them.
+
+    The next seed is chosen randomly, favoring the entries that brought the more
+    new coverage and that have been picked the fewer times.
+    '''
+
+    fbk_ref = 'Coverage'
+    fbk_template = 'New coverage: {:d} new tuples, {:d} edges covered'
+    _fbk_regex = re.compile(r'New coverage: (\d+) new tuples')
+
+    def __init__(self, max_size=None):
+        self.max_size = max_size
+        self._entries = []
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def add(self, data, new_bits):
+        '''
+        Args:
+            data (Data): data that has increased the coverage
+            new_bits (int): number of new (edge, hit-count bucket) pairs it has brought
+
+        Returns:
+            CorpusEntry: the new entry
+        '''
+        entry = CorpusEntry(data, new_bits)
+        self._entries.append(entry)
+        if self.max_size is not None and len(self._entries) > self.max_size:
+            # evict the least valuable entry
+            idx = min(range(len(self._entries)),
+                      key=lambda i: float(self._entries[i].new_bits) / (1 + self._entries[i].nb_picked))
+            del self._entries[idx]
+        return entry
+
+    def select(self):
+        '''
+        Returns:
+            CorpusEntry: the next entry to use as a seed, or None if the corpus is empty
+        '''
+        if not self._entries:
+            return None
+
+        cumulative = []
+        total = 0.0
+        for entry in self._entries:
+            total += float(entry.new_bits) / (1 + entry.nb_picked) / (1 + entry.size // 1024)
+            cumulative.append(total)
+
+        idx = bisect.bisect_right(cumulative, tc_random.random() * total)
+        entry = self._entries[min(idx, len(self._entries) - 1)]
+        entry.nb_picked += 1
+        return entry
+
+    def restore_from_fmkdb(self, fmkdb, prj_name=None, dm=None, atom_name=None):
+        '''
+        Add to the corpus the data recorded in the FmkDB that have increased the
+        coverage of a target.
+
+        Args:
+            fmkdb (Database): the FmkDB to retrieve the data from
+            prj_name (str): if provided, only consider the data sent within this project
+            dm (DataModel): if provided, the data recorded with this data model are absorbed
+              by one of its atoms (refer to :meth:`framework.data_model.DataModel.absorb_raw_data`).
+              The other ones, and the ones that cannot be absorbed, are restored as raw data.
+            atom_name (str): name of the atom used to absorb the data. If None, the
+              default atom for absorption of `dm` is used.
+
+        Returns:
+            int: the number of entries that have been added
+        '''
+        fbk_src = re.escape(' - ' + self.fbk_ref) + '$'
+        data_list = fmkdb.fetch_data_with_fbk_source(fbk_src, prj_name=prj_name)
+        for data_id, dm_name, content, fbk in data_list:
+            if isinstance(fbk, (bytes, bytearray, memoryview)):
+                fbk = bytes(fbk).decode('latin-1')
+            match = self._fbk_regex.search(fbk or '')
+            content = bytes(content)
+            atom = None
+            if dm is not None and dm_name == dm.name:
+                atom = dm.absorb_raw_data(content, atom_name=atom_name)
+            if atom is None:
+                data = Data(content)
+            else:
+                data = Data(atom)
+                data.set_data_model(dm)
+            data.set_data_id(data_id)
+            self.add(data, int(match.group(1)) if match else 1)
+        return len(data_list)
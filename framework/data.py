@@ -234,6 +234,10 @@ class Data(object):
         # This attribute is set to True when the Data content has been retrieved from the fmkDB
         self.from_fmkdb = False
 
+        # PRNGContext positioned at the test case which has produced this Data (if the
+        # framework has been seeded)
+        self.prng = None
+
         if data is None:
             self._backend = self._empty_data_backend
         elif isinstance(data, Node):
@@ -21,6 +21,10 @@
 #
 ################################################################################
 
+import collections
+import threading
+import time
+
 import framework.global_resources as gr
 from framework.data import *
 from framework.dmhelpers.generic import *
@@ -138,20 +142,54 @@ class DataModel(object):
 
         """
 
-        if self._atoms_for_abs is None:
-            self._atoms_for_abs = {}
-        atom_name, prepared_atom = self._backend(atom).prepare_atom(atom)
-        if decoding_scope is None:
-            decoding_scope = [atom_name]
-            self._default_atom_for_abs = (prepared_atom, absorb_constraints)
-        elif isinstance(decoding_scope, str):
-            decoding_scope = [decoding_scope]
+        with self._atoms_lock:
+            if self._atoms_for_abs is None:
+                self._atoms_for_abs = {}
+            atom_name, prepared_atom = self._backend(atom).prepare_atom(atom)
+            if decoding_scope is None:
+                decoding_scope = [atom_name]
+                self._default_atom_for_abs = (prepared_atom, absorb_constraints)
+            elif isinstance(decoding_scope, str):
+                decoding_scope = [decoding_scope]
+
+            assert isinstance(decoding_scope, (list, tuple))
 
-        assert isinstance(decoding_scope, (list, tuple))
+            for atom_name in decoding_scope:
+                self._atoms_for_abs[atom_name] = (prepared_atom, absorb_constraints)
+        if self._atom_pool is not None:
+            self._atom_pool.invalidate()
 
-        for atom_name in decoding_scope:
-            self._atoms_for_abs[atom_name] = (prepared_atom, absorb_constraints)
 
+    def _get_atom_for_decoding(self, atom_name=None):
+        if atom_name is None and self._default_atom_for_abs:
+            atom, abs_csts = self._default_atom_for_abs
+            return self._atom_copy(('abs', None), atom), abs_csts
+        elif atom_name is None:
+            atom_name = list(self._dm_hashtable.keys())[0]
+            return self.get_atom(atom_name), AbsFullCsts()
+        elif self._atoms_for_abs and atom_name in self._atoms_for_abs:
+            return self.get_atom_for_absorption(atom_name)
+        else:
+            return self.get_atom(atom_name), AbsFullCsts()
+
+    def absorb_raw_data(self, data, atom_name=None):
+        """
+        Absorb raw data with the atom used by :meth:`decode`.
+
+        Args:
+            data (bytes): the data to absorb
+            atom_name (str): name of the atom to use. If None, the default atom
+              for absorption is used.
+
+        Returns:
+            Node: the atom that has fully absorbed `data`, or ``None``
+        """
+        try:
+            atom, abs_csts = self._get_atom_for_decoding(atom_name)
+        except ValueError:
+            return None
+        status, off, size, name = atom.absorb(data, constraints=abs_csts)
+        return atom if status == AbsorbStatus.FullyAbsorbed else None
 
     def decode(self, data, atom_name=None, requested_abs_csts=None, colorized=True):
 
@@ -163,25 +201,12 @@ class DataModel(object):
         a = Accumulator()
         accumulate = a.accumulate
 
-        if atom_name is None and self._default_atom_for_abs:
-            atom, abs_csts = self._default_atom_for_abs
-            atom_for_abs = self._backend(atom).atom_copy(atom)
-            atom_name = atom.name
-        elif atom_name is None:
-            atom_name = list(self._dm_hashtable.keys())[0]
-            atom_for_abs = self.get_atom(atom_name)
-            abs_csts = AbsFullCsts()
-        else:
-            try:
-                if self._atoms_for_abs and atom_name in self._atoms_for_abs:
-                    atom_for_abs, abs_csts = self.get_atom_for_absorption(atom_name)
-                else:
-                    atom_for_abs = self.get_atom(atom_name)
-                    abs_csts = AbsFullCsts()
-            except ValueError:
-                msg = colorize("\n*** ERROR: provided atom name is unknown: '{:s}' ***".format(atom_name),
-                               rgb=Color.ERROR)
-                return msg
+        try:
+            atom_for_abs, abs_csts = self._get_atom_for_decoding(atom_name)
+        except ValueError:
+            msg = colorize("\n*** ERROR: provided atom name is unknown: '{:s}' ***".format(atom_name),
+                           rgb=Color.ERROR)
+            return msg
 
         abs_csts_to_apply = abs_csts if requested_abs_csts is None else requested_abs_csts
 
@@ -210,6 +235,10 @@ class DataModel(object):
         self._atoms_for_abs = None
         self._default_atom_for_abs= None
         self._decoded_data = None
+        self._atom_pool = None
+        # serialize the cloning of the registered atoms (which may be performed by
+        # the AtomPool thread) with their modification
+        self._atoms_lock = threading.RLock()
 
     def _backend(self, atom):
         if isinstance(atom, (Node, dict)):
@@ -221,15 +250,25 @@ class DataModel(object):
         return self.name if self.name is not None else 'Unnamed'
 
     def register(self, *atom_list):
-        for a in atom_list:
-            if a is None: continue
-            key, prepared_atom = self._backend(a).prepare_atom(a)
-            self._dm_hashtable[key] = prepared_atom
+        with self._atoms_lock:
+            for a in atom_list:
+                if a is None: continue
+                key, prepared_atom = self._backend(a).prepare_atom(a)
+                self._dm_hashtable[key] = prepared_atom
+        if self._atom_pool is not None:
+            self._atom_pool.invalidate()
+
+    def _atom_copy(self, pool_key, atom, new_name=None):
+        if self._atom_pool is None or new_name is not None:
+            with self._atoms_lock:
+                return self._backend(atom).atom_copy(atom, new_name=new_name)
+        else:
+            return self._atom_pool.get(pool_key, atom)
 
     def get_atom(self, hash_key, name=None):
         if hash_key in self._dm_hashtable:
             atom = self._dm_hashtable[hash_key]
-            return self._backend(atom).atom_copy(atom, new_name=name)
+            return self._atom_copy(('gen', hash_key), atom, new_name=name)
         else:
             raise ValueError('Requested atom does not exist!')
 
@@ -237,10 +276,32 @@ class DataModel(object):
     def get_atom_for_absorption(self, hash_key):
         if hash_key in self._atoms_for_abs:
             atom, abs_csts = self._atoms_for_abs[hash_key]
-            return self._backend(atom).atom_copy(atom), abs_csts
+            return self._atom_copy(('abs', hash_key), atom), abs_csts
         else:
             raise ValueError('Requested atom does not exist!')
 
+    def enable_atom_pool(self, size=None):
+        """
+        Make :meth:`get_atom` and :meth:`get_atom_for_absorption` rely on a pool of
+        atoms cloned in advance by a background thread (refer to :class:`AtomPool`).
+
+        Args:
+            size (int): number of instances kept ready for each requested atom
+              (default: ``AtomPool.DEFAULT_SIZE``)
+        """
+        self.disable_atom_pool()
+        self._atom_pool = AtomPool(self, size=AtomPool.DEFAULT_SIZE if size is None else size)
+        self._atom_pool.start()
+
+    def disable_atom_pool(self):
+        if self._atom_pool is not None:
+            self._atom_pool.stop()
+            self._atom_pool = None
+
+    @property
+    def atom_pool(self):
+        return self._atom_pool
+
     def get_external_atom(self, dm_name, data_id, name=None):
         dm = self._dm_db[dm_name]
         dm.load_data_model(self._dm_db)
@@ -261,13 +322,16 @@ class DataModel(object):
             self._built = True
 
     def merge_with(self, data_model):
-        for k, v in data_model._dm_hashtable.items():
-            if k in self._dm_hashtable:
-                raise ValueError("the data ID {:s} exists already".format(k))
-            else:
-                self._dm_hashtable[k] = v
+        with self._atoms_lock:
+            for k, v in data_model._dm_hashtable.items():
+                if k in self._dm_hashtable:
+                    raise ValueError("the data ID {:s} exists already".format(k))
+                else:
+                    self._dm_hashtable[k] = v
 
-        self.node_backend.merge_with(data_model.node_backend)
+            self.node_backend.merge_with(data_model.node_backend)
+        if self._atom_pool is not None:
+            self._atom_pool.invalidate()
 
     def atom_identifiers(self):
         hkeys = sorted(self._dm_hashtable.keys())
@@ -275,7 +339,10 @@ class DataModel(object):
             yield k
 
     def update_atom(self, atom):
-        self._backend(atom).update_atom(atom)
+        with self._atoms_lock:
+            self._backend(atom).update_atom(atom)
+        if self._atom_pool is not None:
+            self._atom_pool.invalidate()
 
     def show(self):
         print(colorize(FontStyle.BOLD + '\n-=[ Data Types ]=-\n', rgb=Color.INFO))
@@ -387,3 +454,119 @@ class NodeBackend(object):
 
     def get_all_confs(self):
         return sorted(self._confs)
+
+
+class AtomPool(object):
+    """
+    Keep some instances of the atoms of a data model cloned in advance, so that
+    :meth:`DataModel.get_atom` can most of the time hand out an existing copy instead
+    of cloning the whole graph at request time. A background thread refills the pool
+    of each atom that has been requested at least once.
+
+    Only instances that have never been handed out are kept: they are thus in the
+    same state as a copy made on demand. The pool is flushed each time the registered
+    atoms change. Cloning is serialized with the modifications of the registered atoms
+    made through the data model (:meth:`DataModel.register`, :meth:`DataModel.update_atom`, ...).
+    """
+
+    DEFAULT_SIZE = 2
+
+    def __init__(self, data_model, size=DEFAULT_SIZE):
+        assert size >= 1
+        self._dm = data_model
+        self.size = size
+        self._sources = {}
+        self._pools = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._refill_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self.hits = 0
+        self.misses = 0
+
+    def start(self):
+        self._stop_event.clear()
+        self._thread = threading.Thread(None, self._refill_loop, name='atom_pool')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop_event.set()
+            self._refill_event.set()
+            self._thread.join()
+            self._thread = None
+        self.invalidate()
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._sources = {}
+            self._pools = {}
+
+    def get(self, key, atom):
+        with self._lock:
+            if self._sources.get(key) is not atom:
+                self._sources[key] = atom
+                self._pools[key] = collections.deque()
+            pool = self._pools[key]
+            instance = pool.popleft() if pool else None
+
+        if instance is None:
+            self.misses += 1
+            with self._dm._atoms_lock:
+                instance = self._dm._backend(atom).atom_copy(atom)
+        else:
+            self.hits += 1
+
+        self._refill_event.set()
+        return instance
+
+    def wait_until_filled(self, timeout=None):
+        """
+        Wait for the pool of each requested atom to be full.
+
+        Returns:
+            bool: ``False`` if the timeout expired before
+        """
+        start = time.time()
+        while True:
+            with self._lock:
+                filled = all(len(p) >= self.size for p in self._pools.values())
+            if filled:
+                return True
+            if timeout is not None and time.time() - start > timeout:
+                return False
+            time.sleep(0.01)
+
+    def _next_atom_to_clone(self):
+        with self._lock:
+            for key, pool in self._pools.items():
+                if len(pool) < self.size:
+                    return key, self._sources[key], self._generation
+        return None, None, None
+
+    def _refill_loop(self):
+        while not self._stop_event.is_set():
+            self._refill_event.wait()
+            self._refill_event.clear()
+            while not self._stop_event.is_set():
+                key, atom, generation = self._next_atom_to_clone()
+                if key is None:
+                    break
+                try:
+                    with self._dm._atoms_lock:
+                        instance = self._dm._backend(atom).atom_copy(atom)
+                except:
+                    # the atom will be cloned on demand by get()
+                    print('\n*** ERROR: the atom pool cannot clone {!s}\n'.format(key))
+                    traceback.print_exc(file=sys.stdout)
+                    with self._lock:
+                        if self._generation == generation:
+                            del self._sources[key]
+                            del self._pools[key]
+                    continue
+                with self._lock:
+                    if self._generation == generation and self._sources.get(key) is atom:
+                        self._pools[key].append(instance)
@@ -490,6 +490,92 @@ class Database(object):
         ret = self.submit_sql_stmt(stmt, outcome_type=Database.OUTCOME_DATA)
         return ret
 
+    def fetch_data_with_fbk_source(self, fbk_src, prj_name=None):
+        """
+        Args:
+            fbk_src (str): regexp that the feedback source names shall match
+            prj_name (str): if provided, only consider the data sent within this project
+
+        Returns:
+            list: records ``(data ID, data model name, data content, feedback content)``
+            ordered by data ID
+        """
+        stmt = "SELECT DATA.ID, DATA.DM_NAME, DATA.CONTENT, FEEDBACK.CONTENT " \
+               "FROM DATA INNER JOIN FEEDBACK ON DATA.ID = FEEDBACK.DATA_ID " \
+               "WHERE FEEDBACK.SOURCE REGEXP ?"
+        params = (fbk_src,)
+        if prj_name is not None:
+            stmt += " AND DATA.PRJ_NAME = ?"
+            params += (prj_name,)
+        stmt += " ORDER BY DATA.ID ASC;"
+
+        ret = self.execute_sql_statement(stmt, params=params)
+        return ret if ret else []
+
+    def merge_fmkdb(self, fmkdb_path):
+        """
+        Append all the records of another fmkDB (e.g., the one filled by a campaign shard)
+        to this one. Data IDs and group IDs of the merged records are shifted so that they
+        follow the ones already present, while keeping their relative order. The other
+        records (steps, feedback, comments, ...) are re-attached to the shifted data IDs.
+
+        Args:
+            fmkdb_path (str): path of the fmkDB to merge
+
+        Returns:
+            tuple: first and last data IDs of the merged data, or ``None`` if there were
+            no data to merge
+        """
+        ret = self.submit_sql_stmt("ATTACH DATABASE ? AS SHARD", params=(fmkdb_path,),
+                                   outcome_type=Database.OUTCOME_DATA,
+                                   error_msg='while attaching the fmkDB to merge!')
+        if ret is None:
+            return None
+
+        try:
+            ret = self.execute_sql_statement(
+                "SELECT (SELECT IFNULL(MAX(ID),0) FROM DATA) - IFNULL(MIN(ID),1) + 1,"
+                "       (SELECT IFNULL(MAX(GROUP_ID),0) FROM DATA) - IFNULL(MIN(GROUP_ID),1) + 1,"
+                "       COUNT(*) "
+                "FROM SHARD.DATA"
+            )
+            id_off, grp_off, nb = ret[0]
+            if nb == 0:
+                return None
+
+            err_msg = 'while merging an fmkDB!'
+            for table in ('PROJECT', 'DATAMODEL', 'DMAKERS'):
+                self.submit_sql_stmt("INSERT OR IGNORE INTO {0:s} SELECT * FROM SHARD.{0:s}".format(table),
+                                     error_msg=err_msg)
+
+            self.submit_sql_stmt(
+                "INSERT INTO DATA(ID,GROUP_ID,TYPE,DM_NAME,CONTENT,SIZE,SENT_DATE,ACK_DATE,TARGET,PRJ_NAME)"
+                " SELECT ID+?,GROUP_ID+?,TYPE,DM_NAME,CONTENT,SIZE,SENT_DATE,ACK_DATE,TARGET,PRJ_NAME"
+                " FROM SHARD.DATA ORDER BY ID", params=(id_off, grp_off), error_msg=err_msg)
+            self.submit_sql_stmt(
+                "INSERT INTO STEPS(DATA_ID,STEP_ID,DMAKER_TYPE,DMAKER_NAME,DATA_ID_SRC,USER_INPUT,INFO)"
+                " SELECT DATA_ID+?,STEP_ID,DMAKER_TYPE,DMAKER_NAME,DATA_ID_SRC+?,USER_INPUT,INFO"
+                " FROM SHARD.STEPS", params=(id_off, id_off), error_msg=err_msg)
+            self.submit_sql_stmt(
+                "INSERT INTO FEEDBACK(DATA_ID,SOURCE,DATE,CONTENT,STATUS)"
+                " SELECT DATA_ID+?,SOURCE,DATE,CONTENT,STATUS FROM SHARD.FEEDBACK ORDER BY ID",
+                params=(id_off,), error_msg=err_msg)
+            for table, cols in (('COMMENTS', 'CONTENT,DATE'),
+                                ('FMKINFO', 'CONTENT,DATE,ERROR'),
+                                ('ANALYSIS', 'CONTENT,DATE,IMPACT')):
+                self.submit_sql_stmt(
+                    "INSERT INTO {0:s}(DATA_ID,{1:s}) SELECT DATA_ID+?,{1:s} FROM SHARD.{0:s}"
+                    " ORDER BY ID".format(table, cols), params=(id_off,), error_msg=err_msg)
+
+            ret = self.execute_sql_statement("SELECT MIN(ID)+?, MAX(ID)+? FROM SHARD.DATA",
+                                             params=(id_off, id_off))
+        finally:
+            self.submit_sql_stmt("DETACH DATABASE SHARD", outcome_type=Database.OUTCOME_DATA,
+                                 error_msg='while detaching the merged fmkDB!')
+            # data IDs are no longer contiguous with the last one we provided
+            self._data_id = None
+
+        return ret[0]
 
     def _get_color_function(self, colorized):
         if not colorized:
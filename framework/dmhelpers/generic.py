@@ -24,6 +24,7 @@
 from framework.node import *
 
 import datetime
+import weakref
 
 #####################
 # Data Model Helper #
@@ -141,6 +142,83 @@ class MH(object):
 ### Generator Node Templates ###
 ################################
 
+_crc_functions = {}
+
+def _get_crc_func(poly, init_crc, xor_out, rev):
+    """
+    Return the crcmod function matching the provided parameters. As building it
+    implies computing the CRC table, functions are shared between all the
+    generators using the same parameters.
+    """
+    key = (poly, init_crc, xor_out, rev)
+    crc_func = _crc_functions.get(key)
+    if crc_func is None:
+        crc_func = crcmod.mkCrcFun(poly, initCrc=init_crc, xorOut=xor_out, rev=rev)
+        _crc_functions[key] = crc_func
+    return crc_func
+
+
+def _iter_node_args_blobs(nodes, after_encoding):
+    """
+    Yield the byte string of each node parameter, so that generators can process
+    them one after the other without concatenating them.
+    """
+    if isinstance(nodes, Node):
+        yield nodes.to_bytes() if after_encoding else nodes.get_raw_value()
+    else:
+        if issubclass(nodes.__class__, NodeAbstraction):
+            nodes = nodes.get_concrete_nodes()
+        elif not isinstance(nodes, (tuple, list)):
+            raise TypeError("Contents of 'nodes' parameter is incorrect!")
+        for n in nodes:
+            yield n.to_bytes() if after_encoding else n.get_raw_value()
+
+
+class _GeneratedNodeCache(object):
+    """
+    Keep the last node returned by a generator for each set of node parameters,
+    in order to update its value in place on the next evaluation rather than
+    building a new node. The node is only reused if it still relies on the value type
+    it was created with (i.e., it has not been altered by a disruptor meanwhile).
+    """
+
+    def __init__(self):
+        self._entries = weakref.WeakKeyDictionary()
+
+    @staticmethod
+    def _key(nodes):
+        if isinstance(nodes, Node):
+            return nodes, None
+        if issubclass(nodes.__class__, NodeAbstraction):
+            nodes = nodes.get_concrete_nodes()
+        if isinstance(nodes, Node):
+            return nodes, None
+        if not nodes or not isinstance(nodes[0], Node):
+            return None, None
+        return nodes[0], tuple(id(n) for n in nodes)
+
+    def get_int_node(self, nodes, value):
+        key, args_id = self._key(nodes)
+        if key is None:
+            return None
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != args_id:
+            return None
+        _, n, vt = entry
+        if not n.is_typed_value() or n.cc.value_type is not vt:
+            return None
+        # same behavior as INT(force_mode=True)
+        if not vt.is_compatible(value) and value > vt.__class__.maxi:
+            value = vt.__class__.maxi
+        vt.values = [value]
+        n.reset_state()
+        return n
+
+    def register(self, nodes, n):
+        key, args_id = self._key(nodes)
+        if key is not None:
+            self._entries[key] = (args_id, n, n.cc.value_type)
+
 
 def LEN(vt=fvt.INT_str, base_len=0,
         set_attrs=None, clear_attrs=None, after_encoding=True, freezable=False):
@@ -164,11 +242,16 @@ def LEN(vt=fvt.INT_str, base_len=0,
             self.vt = vt
             self.set_attrs = set_attrs
             self.clear_attrs = clear_attrs
+            self._node_cache = _GeneratedNodeCache()
 
         def __call__(self, node):
             blob = node.to_bytes() if after_encoding else node.get_raw_value()
-            n = Node('cts', value_type=self.vt(values=[len(blob)+base_len], force_mode=True))
-            n.set_semantics(NodeSemantics(['len']))
+            length = len(blob) + base_len
+            n = self._node_cache.get_int_node(node, length)
+            if n is None:
+                n = Node('cts', value_type=self.vt(values=[length], force_mode=True))
+                n.set_semantics(NodeSemantics(['len']))
+                self._node_cache.register(node, n)
             MH._handle_attrs(n, self.set_attrs, self.clear_attrs)
             return n
 
@@ -274,31 +357,31 @@ def CRC(vt=fvt.INT_str, poly=0x104c11db7, init_crc=0, xor_out=0xFFFFFFFF, rev=Tr
             self.base = base
             self.letter_case = letter_case
             self.reverse_str = reverse_str
+            self.crc_func = _get_crc_func(poly, init_crc, xor_out, rev)
+            self._node_cache = _GeneratedNodeCache()
 
         def __call__(self, nodes):
-            crc_func = crcmod.mkCrcFun(self.poly, initCrc=self.init_crc,
-                                       xorOut=self.xor_out, rev=self.rev)
-            if isinstance(nodes, Node):
-                s = nodes.to_bytes() if after_encoding else nodes.get_raw_value()
-            else:
-                if issubclass(nodes.__class__, NodeAbstraction):
-                    nodes = nodes.get_concrete_nodes()
-                elif not isinstance(nodes, (tuple, list)):
-                    raise TypeError("Contents of 'nodes' parameter is incorrect!")
-                s = b''
-                for n in nodes:
-                    blob = n.to_bytes() if after_encoding else n.get_raw_value()
-                    s += blob
-
-            result = crc_func(s)
-
-            if issubclass(self.vt, fvt.INT_str):
-                n = Node('cts', value_type=self.vt(values=[result], force_mode=True,
-                                                   base=self.base, letter_case=self.letter_case,
-                                                   reverse=self.reverse_str))
-            else:
-                n = Node('cts', value_type=self.vt(values=[result], force_mode=True))
-            n.set_semantics(NodeSemantics(['crc']))
+            # the CRC is updated with each node parameter in turn, which avoids
+            # building their concatenation
+            result = None
+            for blob in _iter_node_args_blobs(nodes, after_encoding):
+                if result is None:
+                    result = self.crc_func(blob)
+                else:
+                    result = self.crc_func(blob, result)
+            if result is None:
+                result = self.crc_func(b'')
+
+            n = self._node_cache.get_int_node(nodes, result)
+            if n is None:
+                if issubclass(self.vt, fvt.INT_str):
+                    n = Node('cts', value_type=self.vt(values=[result], force_mode=True,
+                                                       base=self.base, letter_case=self.letter_case,
+                                                       reverse=self.reverse_str))
+                else:
+                    n = Node('cts', value_type=self.vt(values=[result], force_mode=True))
+                n.set_semantics(NodeSemantics(['crc']))
+                self._node_cache.register(nodes, n)
             MH._handle_attrs(n, self.set_attrs, self.clear_attrs)
             return n
 
@@ -336,19 +419,10 @@ def WRAP(func, vt=fvt.String,
             self.func = func
             self.set_attrs = set_attrs
             self.clear_attrs = clear_attrs
+            self._node_cache = _GeneratedNodeCache()
 
         def __call__(self, nodes):
-            if isinstance(nodes, Node):
-                s = nodes.to_bytes() if after_encoding else nodes.get_raw_value()
-            else:
-                if issubclass(nodes.__class__, NodeAbstraction):
-                    nodes = nodes.get_concrete_nodes()
-                elif not isinstance(nodes, (tuple, list)):
-                    raise TypeError("Contents of 'nodes' parameter is incorrect!")
-                s = b''
-                for n in nodes:
-                    blob = n.to_bytes() if after_encoding else n.get_raw_value()
-                    s += blob
+            s = b''.join(_iter_node_args_blobs(nodes, after_encoding))
 
             result = self.func(s)
 
@@ -358,10 +432,14 @@ def WRAP(func, vt=fvt.String,
                 assert isinstance(result, int)
 
             if issubclass(vt, fvt.INT):
-                vt_obj = self.vt(values=[result], force_mode=True)
+                # only INT nodes are reused, as String nodes compute their
+                # constraints from their values at creation time
+                n = self._node_cache.get_int_node(nodes, result)
+                if n is None:
+                    n = Node('cts', value_type=self.vt(values=[result], force_mode=True))
+                    self._node_cache.register(nodes, n)
             else:
-                vt_obj = self.vt(values=[result])
-            n = Node('cts', value_type=vt_obj)
+                n = Node('cts', value_type=self.vt(values=[result]))
             MH._handle_attrs(n, self.set_attrs, self.clear_attrs)
             return n
 
@@ -463,6 +541,7 @@ def OFFSET(use_current_position=True, depth=1, vt=fvt.INT_str,
             self.depth = depth
             self.set_attrs = set_attrs
             self.clear_attrs = clear_attrs
+            self._node_cache = _GeneratedNodeCache()
 
         def __call__(self, nodes, helper):
             if self.use_current_position:
@@ -489,15 +568,16 @@ def OFFSET(use_current_position=True, depth=1, vt=fvt.INT_str,
                     parent.get_value()
                     idx = parent.get_subnode_idx(child)
 
-                s = b''
                 end = -1 if self.use_current_position else -2
-                for n in nodes[:end]:
-                    blob = n.to_bytes() if after_encoding else n.get_raw_value()
-                    s += blob
-                base = len(s)
+                base = 0
+                for blob in _iter_node_args_blobs(nodes[:end], after_encoding):
+                    base += len(blob)
                 off = nodes[-1].get_subnode_off(idx)
 
-            n = Node('cts_off', value_type=self.vt(values=[base+off], force_mode=True))
+            n = self._node_cache.get_int_node(nodes, base+off)
+            if n is None:
+                n = Node('cts_off', value_type=self.vt(values=[base+off], force_mode=True))
+                self._node_cache.register(nodes, n)
             MH._handle_attrs(n, set_attrs, clear_attrs)
             return n
 
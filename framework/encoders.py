@@ -29,6 +29,9 @@ import binascii
 
 from framework.global_resources import *
 
+_7bit_chars = bytes(bytearray(range(0x80)))
+_reversed_bits_table = bytes(bytearray(sum(1<<(7-i) for i in range(8) if x>>i&1) for x in range(256)))
+
 class Encoder(object):
     def __init__(self, encoding_arg=None):
         self._encoding_arg = encoding_arg
@@ -138,53 +141,113 @@ class Wrap_Enc(Encoder):
         return dec
 
 
+# masks applied on each 64-bit lane by the GSM 7-bit packing, from the narrowest
+# field to the widest one
+_gsm7bit_lane_masks = [(0x007F007F007F007F, 1),
+                       (0x00003FFF00003FFF, 2),
+                       (0x000000000FFFFFFF, 4)]
+
+def _repeat_lane_mask(mask, nb_lanes):
+    return int.from_bytes(struct.pack('<Q', mask) * nb_lanes, 'little')
+
+def _gsm7bit_pack_bytewise(msg):
+    if sys.version_info[0] > 2:
+        ORD = lambda x: x
+    else:
+        ORD = ord
+    msg_sz = len(msg)
+    l = []
+    idx = 0
+    off_cpt = 0
+    while idx < msg_sz:
+        off = off_cpt % 7
+        c_idx = idx
+        if off == 0 and off_cpt > 0:
+            c_idx = idx + 1
+        if c_idx+1 < msg_sz:
+            l.append((ORD(msg[c_idx])>>off)+((ORD(msg[c_idx+1])<<(7-off))&0x00FF))
+        elif c_idx < msg_sz:
+            l.append(ORD(msg[c_idx])>>off)
+        idx = c_idx + 1
+        off_cpt += 1
+
+    return b''.join(map(lambda x: struct.pack('B', x), l))
+
+def _gsm7bit_unpack_bytewise(msg):
+    if sys.version_info[0] > 2:
+        ORD = lambda x: x
+    else:
+        ORD = ord
+    msg_sz = len(msg)
+    l = []
+    c_idx = 0
+    off_cpt = 0
+    lsb = 0
+    while c_idx < msg_sz:
+        off = off_cpt % 7
+        if off == 0 and off_cpt > 0:
+            l.append(lsb)
+            lsb = 0
+        if c_idx < msg_sz:
+            l.append(((ORD(msg[c_idx])<<off)&0x007F)+lsb)
+            lsb = ORD(msg[c_idx])>>(7-off)
+        c_idx += 1
+        off_cpt += 1
+
+    return b''.join(map(lambda x: struct.pack('B', x), l))
+
+
 class GSM7bitPacking_Enc(Encoder):
+    """
+    GSM 7-bit default alphabet packing (refer to GSM 03.38).
+
+    Characters are packed as septets in a little-endian bit stream. The whole
+    buffer is processed at once through big integer arithmetic: 8 characters (64 bits)
+    are compressed to 7 bytes (56 bits) by folding the 7-bit, 14-bit and 28-bit
+    fields of each 64-bit lane, and reversely.
+    """
 
     def encode(self, msg):
-        if sys.version_info[0] > 2:
-            ORD = lambda x: x
-        else:
-            ORD = ord
+        if sys.version_info[0] == 2 or msg.translate(None, _7bit_chars):
+            # not 7-bit characters: the packing overlaps and is handled by the bytewise version
+            return _gsm7bit_pack_bytewise(msg)
+
         msg_sz = len(msg)
-        l = []
-        idx = 0
-        off_cpt = 0
-        while idx < msg_sz:
-            off = off_cpt % 7
-            c_idx = idx
-            if off == 0 and off_cpt > 0:
-                c_idx = idx + 1
-            if c_idx+1 < msg_sz:
-                l.append((ORD(msg[c_idx])>>off)+((ORD(msg[c_idx+1])<<(7-off))&0x00FF))
-            elif c_idx < msg_sz:
-                l.append(ORD(msg[c_idx])>>off)
-            idx = c_idx + 1
-            off_cpt += 1
-
-        return b''.join(map(lambda x: struct.pack('B', x), l))
+        nb_lanes = (msg_sz + 7) // 8
+        val = int.from_bytes(msg, 'little')
+        for mask, shift in _gsm7bit_lane_masks:
+            lo_mask = _repeat_lane_mask(mask, nb_lanes)
+            hi_mask = lo_mask << (8 * shift)
+            val = (val & lo_mask) | ((val & hi_mask) >> shift)
+
+        lanes = val.to_bytes(8 * nb_lanes, 'little')
+        packed = bytearray(7 * nb_lanes)
+        for i in range(7):
+            packed[i::7] = lanes[i::8]
+
+        return bytes(packed[:(7 * msg_sz + 7) // 8])
 
     def decode(self, msg):
-        if sys.version_info[0] > 2:
-            ORD = lambda x: x
-        else:
-            ORD = ord
+        if sys.version_info[0] == 2:
+            return _gsm7bit_unpack_bytewise(msg)
+
         msg_sz = len(msg)
-        l = []
-        c_idx = 0
-        off_cpt = 0
-        lsb = 0
-        while c_idx < msg_sz:
-            off = off_cpt % 7
-            if off == 0 and off_cpt > 0:
-                l.append(lsb)
-                lsb = 0
-            if c_idx < msg_sz:
-                l.append(((ORD(msg[c_idx])<<off)&0x007F)+lsb)
-                lsb = ORD(msg[c_idx])>>(7-off)
-            c_idx += 1
-            off_cpt += 1
-
-        return b''.join(map(lambda x: struct.pack('B', x), l))
+        if msg_sz == 0:
+            return b''
+        dec_sz = msg_sz + (msg_sz - 1) // 7
+        nb_lanes = (msg_sz + 6) // 7
+        lanes = bytearray(8 * nb_lanes)
+        msg = msg + b'\x00' * (7 * nb_lanes - msg_sz)
+        for i in range(7):
+            lanes[i::8] = msg[i::7]
+
+        val = int.from_bytes(lanes, 'little')
+        for mask, shift in reversed(_gsm7bit_lane_masks):
+            lo_mask = _repeat_lane_mask(mask, nb_lanes)
+            hi_mask = lo_mask << (8 * shift - shift)
+            val = (val & lo_mask) | ((val & hi_mask) << shift)
+
+        return val.to_bytes(8 * nb_lanes, 'little')[:dec_sz]
 
 class GSMPhoneNum_Enc(Encoder):
 
@@ -214,17 +277,8 @@ class GSMPhoneNum_Enc(Encoder):
 
 class BitReverse_Enc(Encoder):
 
-    def _reverse_bits(self, x, nb_bits=8):
-        """ Reverse bits order of x """
-        return sum(1<<(nb_bits-1-i) for i in range(nb_bits) if x>>i&1)
-
     def encode(self, val):
-        sz = len(val)
-        byte_list = struct.unpack('B'*sz, val)
-        rev_list = b''
-        for b in byte_list[::-1]:
-            rev_list += struct.pack('B', self._reverse_bits(b))
-        return rev_list
+        return val[::-1].translate(_reversed_bits_table)
 
     def decode(self, val):
         return self.encode(val)
@@ -23,6 +23,7 @@
 
 class UnavailablePythonModule(Exception): pass
 class InvalidFmkDB(Exception): pass
+class ShardingError(Exception): pass
 
 class TargetFeedbackError(Exception): pass
 class DataProcessTermination(Exception): pass
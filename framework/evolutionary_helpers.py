@@ -22,12 +22,13 @@
 #
 ################################################################################
 
-from operator import attrgetter
+import time
 
 from framework.tactics_helpers import *
 from framework.global_resources import UI
 from framework.scenario import *
 from framework.error_handling import ExtinctPopulationError, PopulationError
+from framework.prng import tc_random
 
 
 class Population(object):
@@ -104,11 +105,14 @@ class DefaultIndividual(Individual):
         self.probability_of_survival = None  # between 0 and 1
 
     def mutate(self, nb):
-        data = self._fmk.get_data([('C', UI(nb=nb))], data_orig=Data(self.node))
+        # the current node is replaced by the mutated one, thus it does not need to be copied
+        data = self._fmk.get_data([('C', UI(nb=nb))], data_orig=Data(self.node), copy_orig=False)
         if data is None:
             raise PopulationError
         assert isinstance(data.content, Node)
         self.node = data.content
+        # the feedback was related to the previous node
+        self.feedback = None
 
 
 class DefaultPopulation(Population):
@@ -133,6 +137,7 @@ class DefaultPopulation(Population):
         self.MAX_GENERATION_NB = max_generation_nb
 
         self.generation = None
+        self.generation_throughput = None  # individuals built per second
 
     def reset(self):
         """ Generate the first generation of individuals in a random way """
@@ -148,55 +153,83 @@ class DefaultPopulation(Population):
             node = data.content
             self._individuals.append(DefaultIndividual(self._fmk, node))
 
+    def _compute_fitness(self, feedback):
+        """
+            Compute the fitness scores of the whole generation at once, from the feedback
+            retrieved for each individual
+
+            Args:
+                feedback (list): the feedback of each individual, as gathered by the
+                  evolutionary scenario (None if the individual has not been sent)
+
+            Returns:
+                list: the score of each individual, in the same order
+        """
+        return [tc_random.uniform(0, 100) for _ in feedback]
+
     def _compute_scores(self):
         """ Compute the scores of each individuals """
-        for individual in self._individuals:
-            individual.score = random.uniform(0, 100)
+        scores = self._compute_fitness([ind.feedback for ind in self._individuals])
+        for individual, score in zip(self._individuals, scores):
+            individual.score = score
 
     def _compute_probability_of_survival(self):
         """ Normalize fitness scores between 0 and 1 """
 
-        min_score = min(self._individuals, key=attrgetter('score')).score
-        max_score = max(self._individuals, key=attrgetter('score')).score
+        scores = [ind.score for ind in self._individuals]
+        min_score = min(scores)
+        max_score = max(scores)
+
+        if min_score != max_score:
+            scale = 1.0 / (max_score - min_score)
+            probabilities = [(score - min_score) * scale + 0.3 for score in scores]
+        else:
+            probabilities = [0.50] * len(scores)
 
-        for ind in self._individuals:
-            if min_score != max_score:
-                ind.probability_of_survival = (ind.score - min_score) / (max_score - min_score) + 0.3
-            else:
-                ind.probability_of_survival = 0.50
+        for ind, proba in zip(self._individuals, probabilities):
+            ind.probability_of_survival = proba
 
     def _kill(self):
         """ Simply rolls the dice """
-        for i in range(len(self._individuals))[::-1]:
-            if random.randrange(100) > self._individuals[i].probability_of_survival*100:
-                del self._individuals[i]
+        # dice are rolled from the last individual to the first one
+        dice = [tc_random.randrange(100) for _ in range(len(self._individuals))]
+        dice.reverse()
+        self._individuals = [ind for ind, die in zip(self._individuals, dice)
+                             if die <= ind.probability_of_survival*100]
 
     def _mutate(self):
         """ Operates three bit flips on each individual """
         for individual in self._individuals:
             individual.mutate(3)
-            print(str(individual) + "mutated !!")
 
     def _crossover(self):
         """ Compensates the kills through the usage of the tCOMB disruptor """
-        random.shuffle(self._individuals)
+        tc_random.shuffle(self._individuals)
 
         current_size = len(self._individuals)
+        children = []
+
+        for i in range(0, int(current_size / 2), 2):
+            if current_size + len(children) >= self.SIZE:
+                break
 
-        i = 0
-        while len(self._individuals) < self.SIZE and i < int(current_size / 2):
             ind_1 = self._individuals[i].node
             ind_2 = self._individuals[i+1].node.get_clone()
 
-
+            # tCOMB only processes its first input, the next calls just retrieve the
+            # second child and its handover. Copying the first parent again is thus useless.
+            seed = Data(ind_1)
+            copy_orig = True
             while True:
-                data = self._fmk.get_data([('tCOMB', UI(node=ind_2))], data_orig=Data(ind_1))
+                data = self._fmk.get_data([('tCOMB', UI(node=ind_2))], data_orig=seed,
+                                          copy_orig=copy_orig)
+                copy_orig = False
                 if data is None or data.is_unusable():
                     break
                 else:
-                    self._individuals.append(DefaultIndividual(self._fmk, data.content))
+                    children.append(DefaultIndividual(self._fmk, data.content))
 
-            i += 2
+        self._individuals += children
 
     def evolve(self):
         """ Describe the evolutionary process """
@@ -204,6 +237,8 @@ class DefaultPopulation(Population):
         if len(self) < 2:
             raise ExtinctPopulationError()
 
+        start = time.time()
+
         self._compute_scores()
         self._compute_probability_of_survival()
         self._kill()
@@ -213,6 +248,9 @@ class DefaultPopulation(Population):
         self.generation += 1
         self.index = 0
 
+        duration = time.time() - start
+        self.generation_throughput = len(self) / duration if duration > 0 else None
+
     def is_final(self):
         return self.generation == self.MAX_GENERATION_NB
 
@@ -36,6 +36,8 @@ from framework.dmhelpers.generic import MH
 
 # from framework.plumbing import *
 from framework.evolutionary_helpers import Population
+from framework.coverage import Corpus
+from framework.prng import tc_random
 from framework.global_resources import *
 
 tactics = Tactics()
@@ -83,6 +85,47 @@ class g_population(Generator):
         return data
 
 
+@generator(tactics, gtype='CORPUS', weight=1,
+           args={'corpus': ('The corpus to pick the seeds from. If not provided, the '
+                            'corpus of the first target that gathers one is used.', None, Corpus),
+                 'init': ('Name of the atom to produce while the corpus is empty.', None, str)})
+class g_corpus(Generator):
+    """
+    Pick the seeds from a corpus of data which have increased the coverage of a
+    target (refer to :class:`framework.targets.local.LocalTarget`). The seeds are
+    meant to be altered by the following disruptors. While the corpus is empty, the
+    atom `init` is produced if provided.
+
+    The seeds of a corpus restored from the FmkDB are raw data, unless a data model
+    has been provided to :meth:`framework.coverage.Corpus.restore_from_fmkdb`
+    to absorb them. Raw seeds can only be altered by byte-level disruptors.
+    """
+    def setup(self, dm, user_input):
+        self._corpus = self.corpus
+        return True
+
+    def generate_data(self, dm, monitor, target):
+        if self._corpus is None:
+            for tg in target.values():
+                if tg.get_corpus() is not None:
+                    self._corpus = tg.get_corpus()
+                    break
+
+        entry = None if self._corpus is None else self._corpus.select()
+        if entry is None and self.init is not None:
+            return Data(dm.get_atom(self.init))
+        elif entry is None:
+            data = Data()
+            data.make_unusable()
+            self.need_reset()
+            return data
+
+        data = Data(entry.seed.get_content(do_copy=True))
+        data.add_info('corpus entry with {:d} new tuples, picked {:d} time(s)'
+                      .format(entry.new_bits, entry.nb_picked))
+        return data
+
+
 #######################
 # STATEFUL DISRUPTORS #
 #######################
@@ -676,63 +719,75 @@ class sd_crossover(SwapperDisruptor):
         def __init__(self, node):
             self.node = node
 
+            # One-time index of the frozen graph. Nodes are referenced by handle, thus
+            # neither selecting the shared sub-graphs nor swapping them requires path lookups.
+            self.nodes = []
             self.leafs = []
+            self._parent = {}
+            self._subnodes_qty = {}
+
+            to_visit = [(node, None)]
+            while to_visit:
+                current, parent = to_visit.pop()
+                if id(current) in self._parent:
+                    continue
+                self._parent[id(current)] = parent
+                self.nodes.append(current)
+                if id(parent) in self._subnodes_qty:
+                    # a node used more than once within the graph is only indexed (and
+                    # counted) the first time
+                    self._subnodes_qty[id(parent)] += 1
+
+                if current.is_term():
+                    self.leafs.append(current)
+                    continue
+                elif current.is_nonterm():
+                    subnodes = current.cc.frozen_node_list
+                    if subnodes is None:
+                        subnodes = []
+                    self._subnodes_qty[id(current)] = 0
+                elif current.is_genfunc() and current.cc.env is not None:
+                    # the generated node is indexed, but the generator node itself is never
+                    # merged, as its contents are not a plain composition of its subnodes
+                    subnodes = [current.cc.generated_node]
+                else:
+                    subnodes = []
 
-            for path, node in self.node.iter_paths():
-                if node.is_term() and path not in self.leafs:
-                    self.leafs.append(path)
+                for subnode in reversed(subnodes):
+                    to_visit.append((subnode, current))
 
             self.shared = None
 
         def compute_sub_graphs(self, percentage):
-            random.shuffle(self.leafs)
-            self.shared = self.leafs[:int(round(len(self.leafs) * percentage))]
-            self.shared.sort()
-
-            change = True
-            while change:
-
-                change = False
-                index = 0
-                length = len(self.shared)
-
-                while index < length:
-
-                    current_path = self.shared[index]
-
-                    slash_index = current_path[::-1].find('/')
-
-                    # check if we are dealing with the root node
-                    if slash_index == -1:
-                        index += 1
-                        continue
-
-                    parent_path = current_path[:-current_path[::-1].find('/') - 1]
-                    children_nb = self._count_brothers(index, parent_path)
-                    if children_nb == self.node.get_node_by_path(parent_path).cc.get_subnode_qty():
-                        self._merge_brothers(index, parent_path, children_nb)
-                        change = True
-                        index += 1
-                        length = len(self.shared)
-                    else:
-                        index += children_nb
-
-        def _count_brothers(self, index, pattern):
-            count = 1
-            p = re.compile(u'^' + pattern + '($|/*)')
-            for i in range(index + 1, len(self.shared)):
-                if re.match(p, self.shared[i]) is not None:
-                    count += 1
-            return count
-
-        def _merge_brothers(self, index, pattern, length):
-            for _ in range(0, length, 1):
-                del self.shared[index]
-            self.shared.insert(index, pattern)
+            tc_random.shuffle(self.leafs)
+            selected = self.leafs[:int(round(len(self.leafs) * percentage))]
+
+            # A non-terminal node is merged when all its subnodes are (leaf or merged), then
+            # the same is checked for its parent, and so on up to the root.
+            covered = set()
+            selected_qty = {}
+            to_merge = list(selected)
+            while to_merge:
+                current = to_merge.pop()
+                covered.add(id(current))
+                parent = self._parent[id(current)]
+                if parent is None or id(parent) not in self._subnodes_qty:
+                    continue
+                qty = selected_qty.get(id(parent), 0) + 1
+                selected_qty[id(parent)] = qty
+                if qty == self._subnodes_qty[id(parent)]:
+                    to_merge.append(parent)
+
+            self.shared = []
+            for n in self.nodes:
+                if id(n) in covered:
+                    parent = self._parent[id(n)]
+                    if parent is None or id(parent) not in covered:
+                        self.shared.append(n)
 
     def setup(self, dm, user_input):
         if self.percentage_to_share is None:
-            self.percentage_to_share = float(random.randint(3, 7)) / 10.0
+            self.percentage_to_share = float(tc_random.randint(3, 7)) / 10.0
         elif not (0 < self.percentage_to_share < 1):
             print("Invalid percentage, a float between 0 and 1 need to be provided")
             return False
@@ -749,18 +804,16 @@ class sd_crossover(SwapperDisruptor):
 
         source = self.Operand(prev_content)
         source.compute_sub_graphs(self.percentage_to_share)
-        random.shuffle(source.shared)
+        tc_random.shuffle(source.shared)
 
         param = self.Operand(self.node)
         param.compute_sub_graphs(1.0 - self.percentage_to_share)
-        random.shuffle(param.shared)
+        tc_random.shuffle(param.shared)
 
         swap_nb = len(source.shared) if len(source.shared) < len(param.shared) else len(param.shared)
 
         for i in range(swap_nb):
-            node_1 = source.node.get_node_by_path(path=source.shared[i])
-            node_2 = param.node.get_node_by_path(path=param.shared[i])
-            self._swap_nodes(node_1, node_2)
+            self._swap_nodes(source.shared[i], param.shared[i])
 
 
 @disruptor(tactics, dtype="tCOMB", weight=1,
@@ -803,8 +856,8 @@ class sd_combine(SwapperDisruptor):
         swap_nb = len(source) if len(source) < len(param) else len(param)
         swap_nb = int(math.ceil(swap_nb / 2.0))
 
-        random.shuffle(source)
-        random.shuffle(param)
+        tc_random.shuffle(source)
+        tc_random.shuffle(param)
 
         for i in range(swap_nb):
             self._swap_nodes(source[i], param[i])
@@ -1078,12 +1131,14 @@ class d_corrupt_node_bits(Disruptor):
                 prev_data.add_info('INVALID INPUT')
                 return prev_data
 
+            rng = tc_random if prev_data.prng is None else prev_data.prng.stream('d_corrupt_node_bits')
+
             if self.nb > 0:
                 try:
-                    l = random.sample(l, self.nb)
+                    l = rng.sample(l, self.nb)
                 except ValueError:
                     prev_data.add_info('Only one Node (Terminal) has been found!')
-                    l = random.sample(l, 1)
+                    l = rng.sample(l, 1)
 
             for i in l:
                 val = i.to_bytes()
@@ -1092,7 +1147,7 @@ class d_corrupt_node_bits(Disruptor):
 
                 if self.new_val is None:
                     if val != b'':
-                        val = corrupt_bits(val, n=1, ascii=self.ascii)
+                        val = corrupt_bits(val, n=1, ascii=self.ascii, rng=rng)
                         prev_data.add_info('corrupted data: {!s}'.format(truncate_info(val)))
                     else:
                         prev_data.add_info('Nothing to corrupt!')
@@ -1109,7 +1164,8 @@ class d_corrupt_node_bits(Disruptor):
             ret = prev_data
 
         else:
-            new_val = corrupt_bits(prev_data.to_bytes(), ascii=self.ascii)
+            rng = tc_random if prev_data.prng is None else prev_data.prng.stream('d_corrupt_node_bits')
+            new_val = corrupt_bits(prev_data.to_bytes(), ascii=self.ascii, rng=rng)
             prev_data.update_from(new_val)
             prev_data.add_info('Corruption performed on a byte string as no Node is available')
             ret = prev_data
@@ -21,19 +21,19 @@
 #
 ################################################################################
 
-import copy
 import datetime
 import threading
 import collections
 
 class FeedbackSource(object):
 
-    def __init__(self, src, subref=None, reliability=None, related_tg=None):
+    def __init__(self, src, subref=None, reliability=None, related_tg=None, related_data=None):
         self._subref = subref
         self._name = str(src) if subref is None else str(src) + ' - ' + str(subref)
         self._obj = src
         self._reliability = reliability
         self._related_tg = related_tg
+        self._related_data = related_data
 
     def __str__(self):
         return self._name
@@ -52,46 +52,66 @@ class FeedbackSource(object):
     def related_tg(self):
         return self._related_tg
 
+    @property
+    def related_data(self):
+        return self._related_data
+
 
 class FeedbackCollector(object):
-    fbk_lock = threading.Lock()
 
     def __init__(self):
+        # each collector has its own lock, so that the feedback of the various targets,
+        # probes and operators can be gathered concurrently
+        self.fbk_lock = threading.Lock()
         self.cleanup()
         self._feedback_collector = collections.OrderedDict()
         self._feedback_collector_tstamped = collections.OrderedDict()
         self._tstamped_bstring = None
 
-    def add_fbk_from(self, ref, fbk, status=0):
+    def add_fbk_from(self, ref, fbk, status=0, related_data=None):
+        """
+        Args:
+            ref: reference of the feedback source
+            fbk: feedback record
+            status (int): should be negative for error
+            related_data (Data): if provided, the data that triggered this feedback. Useful
+              when several data are processed concurrently by the target, to attach the feedback
+              to the right data ID within the FmkDB. The feedback of distinct data are
+              kept apart even if they share the same reference.
+        """
         now = datetime.datetime.now()
+        key = ref if related_data is None else (ref, id(related_data))
         with self.fbk_lock:
-            if ref not in self._feedback_collector:
-                self._feedback_collector[ref] = {}
-                self._feedback_collector[ref]['data'] = []
-                self._feedback_collector[ref]['status'] = 0
-                self._feedback_collector_tstamped[ref] = []
-            self._feedback_collector[ref]['data'].append(fbk)
-            self._feedback_collector[ref]['status'] = status
-            self._feedback_collector_tstamped[ref].append(now)
+            entry = self._feedback_collector.get(key)
+            if entry is None:
+                entry = {'ref': ref, 'data': [], 'status': 0, 'related_data': related_data}
+                self._feedback_collector[key] = entry
+                self._feedback_collector_tstamped[key] = []
+            entry['data'].append(fbk)
+            entry['status'] = status
+            self._feedback_collector_tstamped[key].append(now)
 
     def has_fbk_collector(self):
         return len(self._feedback_collector) > 0
 
     def __iter__(self):
         with self.fbk_lock:
-            fbk_collector = copy.copy(self._feedback_collector)
-            fbk_collector_ts = copy.copy(self._feedback_collector_tstamped)
-        for ref, fbk in fbk_collector.items():
-            yield ref, fbk['data'], fbk['status'], fbk_collector_ts[ref]
+            fbk_items = [(fbk['ref'], fbk['data'], fbk['status'], self._feedback_collector_tstamped[key])
+                         for key, fbk in self._feedback_collector.items()]
+        for item in fbk_items:
+            yield item
 
-    def iter_and_cleanup_collector(self):
+    def iter_and_cleanup_collector(self, with_related_data=False):
         with self.fbk_lock:
             fbk_collector = self._feedback_collector
             fbk_collector_ts = self._feedback_collector_tstamped
             self._feedback_collector = collections.OrderedDict()
             self._feedback_collector_tstamped = collections.OrderedDict()
-        for ref, fbk in fbk_collector.items():
-            yield ref, fbk['data'], fbk['status'], fbk_collector_ts[ref]
+        for key, fbk in fbk_collector.items():
+            if with_related_data:
+                yield fbk['ref'], fbk['data'], fbk['status'], fbk_collector_ts[key], fbk['related_data']
+            else:
+                yield fbk['ref'], fbk['data'], fbk['status'], fbk_collector_ts[key]
 
     def set_error_code(self, err_code):
         self._err_code = err_code
@@ -23,15 +23,22 @@
 
 import os
 import sys
+import time
 import datetime
 import threading
 import itertools
 
+try:
+    import queue as queue
+except:
+    import Queue as queue
+
 from libs.external_modules import *
 from libs.utils import get_caller_object
 from framework.data import Data
 from framework.global_resources import *
 from framework.database import Database
+from framework.segment_log import SegmentLog
 from framework.knowledge.feedback_collector import FeedbackSource
 from libs.utils import ensure_dir
 import framework.global_resources as gr
@@ -45,9 +52,13 @@ class Logger(object):
 
     fmkDB = None
 
+    ASYNC_QUEUE_SIZE = 10000
+    ASYNC_BATCH_SIZE = 500
+
     def __init__(self, name=None, prefix='', record_data=False, explicit_data_recording=False,
                  export_orig=True, export_raw_data=True, console_display_limit=800,
-                 enable_file_logging=False):
+                 enable_file_logging=False, async_logging=False, console_rate_limit=None,
+                 quiet_data=None, segment_log=False, compress_segment_log=False):
         '''
         Args:
           name (str): Name to be used in the log filenames. If not specified, the name of the project
@@ -66,6 +77,21 @@ class Logger(object):
             If this threshold is overrun, the message to print on the console will be truncated.
           prefix (str): prefix to use for printing on the console.
           enable_file_logging (bool): If True, file logging will be enabled.
+          async_logging (bool): If True, console and file outputs are handed over to a background
+            writer thread through a bounded queue, and file writes are flushed by batch. Console
+            messages that cannot be queued because the queue is full are dropped.
+          console_rate_limit (int): maximum number of console messages to display per second.
+            Messages above this rate are dropped, and the number of dropped messages is
+            displayed afterwards. If None, console output is not rate-limited.
+          quiet_data (int): If not None, the logger does not display (nor write in the log file)
+            the data sent to the targets and the feedback retrieved for each test case, but only
+            a summary every `quiet_data` test cases. The other messages are still displayed and
+            data are still fully recorded in the FmkDB.
+          segment_log (bool): If True, emitted data and retrieved feedback are also appended to
+            a binary segment log (refer to :class:`framework.segment_log.SegmentLog`) located in
+            ``logs/<name>_segments/``. When `record_data` is also True, emitted data are no more
+            stored in separate files but only in this log.
+          compress_segment_log (bool): If True, the records of the segment log are compressed.
         '''
         self.name = name
         self.p = prefix
@@ -82,30 +108,155 @@ class Logger(object):
         self._enable_file_logging = enable_file_logging
         self._fd = None
 
+        self._async_logging = async_logging
+        self._log_queue = None
+        self._log_writer = None
+
+        self._console_rate_limit = console_rate_limit
+        self._console_window_start = 0
+        self._console_msg_cpt = 0
+        self._console_dropped = 0
+        self._console_lck = threading.Lock()
+
+        self.quiet_data = quiet_data
+        self._quiet_data_errors = 0
+
+        self._segment_log_enabled = segment_log
+        self._compress_segment_log = compress_segment_log
+        self._segment_log = None
+
         self._tg_fbk = []
         self._tg_fbk_lck = threading.Lock()
 
-        def init_logfn(x, nl_before=True, nl_after=False, rgb=None, style=None, verbose=False,
-                       do_record=True):
-            if issubclass(x.__class__, Data):
-                data = self._handle_binary_content(x.to_bytes(), raw=self.export_raw_data)
-                rgb = None
-                style = None
-            elif isinstance(x, str):
-                data = x
-            else:
-                data = self._handle_binary_content(x, raw=self.export_raw_data)
-            self.print_console(data, nl_before=nl_before, nl_after=nl_after, rgb=rgb, style=style)
+        self.log_fn = self._log_fn
+
+    def __str__(self):
+        return 'Logger'
+
+    def _log_fn(self, x, nl_before=True, nl_after=False, rgb=None, style=None, verbose=False,
+                do_record=True, data_log=False):
+        if data_log and self.quiet_data:
+            return None
+
+        if issubclass(x.__class__, Data):
+            data = self._handle_binary_content(x.to_bytes(), raw=self.export_raw_data)
+            rgb = None
+            style = None
+        elif isinstance(x, str):
+            data = x
+        else:
+            data = self._handle_binary_content(x, raw=self.export_raw_data)
+        self.print_console(data, nl_before=nl_before, nl_after=nl_after, rgb=rgb, style=style)
+
+        if self._fd is None:
             if verbose and issubclass(x.__class__, Data):
                 x.show()
+            return data
 
+        if not do_record:
             return data
+        try:
+            self._write_to_file(data + '\n')
+            if verbose and issubclass(x.__class__, Data):
+                x.show(log_func=self._write_to_file)
+            if self._log_queue is None:
+                self._fd.flush()
+        except ValueError:
+            self.print_console('\n*** ERROR: The log file has been closed.' \
+                               ' (Maybe because the Logger has been stopped and has not been restarted yet.)',
+                               rgb=Color.ERROR)
+
+        return data
+
+    def _write_to_file(self, text):
+        if self._log_queue is not None:
+            self._log_queue.put(('file', text))
+        else:
+            self._fd.write(text)
 
-        self.log_fn = init_logfn
+    def _start_log_writer(self):
+        self._log_queue = queue.Queue(maxsize=self.ASYNC_QUEUE_SIZE)
+        self._log_writer = threading.Thread(target=self._log_writer_loop, args=(self._log_queue,),
+                                            name='Logger writer')
+        self._log_writer.daemon = True
+        self._log_writer.start()
 
-    def __str__(self):
-        return 'Logger'
+    def _stop_log_writer(self):
+        if self._log_queue is None:
+            return
+        log_queue = self._log_queue
+        self._log_queue = None
+        log_queue.put((None, None))
+        self._log_writer.join()
+        self._log_writer = None
+
+    def _log_writer_loop(self, log_queue):
+        stop = False
+        while not stop:
+            batch = [log_queue.get()]
+            try:
+                while len(batch) < self.ASYNC_BATCH_SIZE:
+                    batch.append(log_queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            file_chunks = []
+            for kind, item in batch:
+                if kind is None:
+                    stop = True
+                elif kind == 'console':
+                    sys.stdout.write(self._format_console_msg(*item))
+                else:
+                    file_chunks.append(item)
+
+            sys.stdout.flush()
+            if file_chunks:
+                try:
+                    self._fd.write(''.join(file_chunks))
+                    self._fd.flush()
+                except ValueError:
+                    pass
+
+    def _console_rate_exceeded(self):
+        dropped = 0
+        with self._console_lck:
+            now = time.time()
+            if now - self._console_window_start >= 1.0:
+                dropped = self._console_dropped
+                self._console_window_start = now
+                self._console_msg_cpt = 0
+                self._console_dropped = 0
+
+            if self._console_msg_cpt >= self._console_rate_limit:
+                self._console_dropped += 1
+                exceeded = True
+            else:
+                self._console_msg_cpt += 1
+                exceeded = False
+
+        if dropped:
+            self._report_dropped_console_msgs(dropped)
+
+        return exceeded
+
+    def _report_dropped_console_msgs(self, dropped):
+        msg = '*** {:d} console message(s) dropped (rate limit: {:d}/s) ***' \
+            .format(dropped, self._console_rate_limit)
+        self._output_console((msg, True, False, Color.WARNING, None, None, False))
+
+
+    def get_segment_log_path(self):
+        if not self._segment_log_enabled or self.name is None:
+            return None
+        return os.path.join(logs_folder, self.name + '_segments')
 
+    def flush_segment_log(self):
+        """
+        Make the records appended to the segment log so far readable by
+        a :class:`framework.segment_log.SegmentLogReader`.
+        """
+        if self._segment_log is not None:
+            self._segment_log.flush()
 
     def _handle_binary_content(self, content, raw=False):
         content = gr.unconvert_from_internal_repr(content)
@@ -129,6 +280,12 @@ class Logger(object):
         with self._tg_fbk_lck:
             self._tg_fbk = []
 
+        with self._console_lck:
+            self._console_window_start = 0
+            self._console_msg_cpt = 0
+            self._console_dropped = 0
+        self._quiet_data_errors = 0
+
         if self.name is None:
             self.log_fn = lambda x: x
 
@@ -139,45 +296,37 @@ class Logger(object):
             log_file = os.path.join(logs_folder, self.now + '_' + self.name + '_log')
             self._fd = open(log_file, 'w')
 
-            def intern_func(x, nl_before=True, nl_after=False, rgb=None, style=None, verbose=False,
-                            do_record=True):
-                if issubclass(x.__class__, Data):
-                    data = self._handle_binary_content(x.to_bytes(), raw=self.export_raw_data)
-                    rgb = None
-                    style = None
-                elif isinstance(x, str):
-                    data = x
-                else:
-                    data = self._handle_binary_content(x, raw=self.export_raw_data)
-                self.print_console(data, nl_before=nl_before, nl_after=nl_after, rgb=rgb, style=style)
-                if not do_record:
-                    return data
-                try:
-                    self._fd.write(data)
-                    self._fd.write('\n')
-                    if verbose and issubclass(x.__class__, Data):
-                        x.show(log_func=self._fd.write)
-                    self._fd.flush()
-                except ValueError:
-                    self.print_console('\n*** ERROR: The log file has been closed.' \
-                                       ' (Maybe because the Logger has been stopped and has not been restarted yet.)',
-                                       rgb=Color.ERROR)
-
-                return data
-
-            self.log_fn = intern_func
-
         else:
             # No file logging
             pass
 
+        if self._segment_log_enabled and self.name is not None:
+            self._segment_log = SegmentLog(self.get_segment_log_path(),
+                                           compress=self._compress_segment_log)
+            self._segment_log.open()
+
+        if self._async_logging:
+            self._start_log_writer()
+
         self.print_console('*** Logger is started ***\n', nl_before=False, rgb=Color.COMPONENT_START)
 
     def stop(self):
 
+        with self._console_lck:
+            dropped = self._console_dropped
+            self._console_dropped = 0
+        if dropped:
+            self._report_dropped_console_msgs(dropped)
+
+        self._stop_log_writer()
+
         if self._fd:
             self._fd.close()
 
+        if self._segment_log is not None:
+            self._segment_log.close()
+            self._segment_log = None
+
         self.reset_current_state()
         self._current_sent_date = None
         self._last_data_IDs = {}
@@ -205,10 +354,11 @@ class Logger(object):
             dm_name = Database.DEFAULT_DM_NAME if dm is None else dm.name
             self._current_group_id = group_id
 
+            raw_data = self._current_data.to_bytes()
             last_data_id = None
             for tg_ref, ack_date in self._current_ack_dates.items():
                 last_data_id = self.fmkDB.insert_data(init_dmaker, dm_name,
-                                                           self._current_data.to_bytes(),
+                                                           raw_data,
                                                            self._current_size,
                                                            self._current_sent_date,
                                                            ack_date,
@@ -224,6 +374,11 @@ class Logger(object):
 
                 self._current_data.set_data_id(last_data_id)
 
+                if self._segment_log is not None:
+                    self._segment_log.append_data(last_data_id, raw_data, self._current_sent_date,
+                                                  dm_name=dm_name, dtype=init_dmaker,
+                                                  file_extension=None if dm is None else dm.file_extension)
+
                 if self._current_orig_data_id is not None:
                     self.fmkDB.insert_steps(last_data_id, 1, None, None,
                                             self._current_orig_data_id,
@@ -301,23 +456,27 @@ class Logger(object):
 
         processed_feedback = self._process_target_feedback(content)
         fbk_cond = status_code is not None and status_code < 0
+        if fbk_cond and self.quiet_data:
+            self._quiet_data_errors += 1
         hdr_color = Color.FEEDBACK_ERR if fbk_cond else Color.FEEDBACK
         body_color = Color.FEEDBACK_HLIGHT if fbk_cond else None
         if not processed_feedback:
             msg_hdr = "### Status from '{!s}': {!s}".format(source, status_code)
         else:
             msg_hdr = "### Feedback from '{!s}' (status={!s}):".format(source, status_code)
-        self.log_fn(msg_hdr, rgb=hdr_color, do_record=record)
+        self.log_fn(msg_hdr, rgb=hdr_color, do_record=record, data_log=True)
         if processed_feedback:
             if isinstance(processed_feedback, list):
                 for dfbk in processed_feedback:
-                    self.log_fn(dfbk, rgb=body_color, do_record=record)
+                    self.log_fn(dfbk, rgb=body_color, do_record=record, data_log=True)
             else:
-                self.log_fn(processed_feedback, rgb=body_color, do_record=record)
+                self.log_fn(processed_feedback, rgb=body_color, do_record=record, data_log=True)
 
         if record:
             assert isinstance(source, FeedbackSource)
-            if source.related_tg is not None:
+            if source.related_data is not None and source.related_data.get_data_id() is not None:
+                data_id = source.related_data.get_data_id()
+            elif source.related_tg is not None:
                 try:
                     data_id = self._last_data_IDs[source.related_tg]
                 except KeyError:
@@ -338,6 +497,15 @@ class Logger(object):
                                            self._encode_target_feedback(content),
                                            status_code=status_code)
 
+            if self._segment_log is not None and data_id is not None:
+                if isinstance(content, list):
+                    for fbk, ts in zip(content, timestamp):
+                        self._segment_log.append_feedback(data_id, source, self._encode_target_feedback(fbk),
+                                                          date=ts, status=status_code)
+                else:
+                    self._segment_log.append_feedback(data_id, source, self._encode_target_feedback(content),
+                                                      date=timestamp, status=status_code)
+
     def log_collected_feedback(self, preamble=None, epilogue=None):
         """
         Used within the scope of the Logger feedback-collector feature.
@@ -368,7 +536,7 @@ class Logger(object):
         record = self.shall_record()
 
         if preamble is not None:
-            self.log_fn(preamble, do_record=record, rgb=Color.FMKINFO)
+            self.log_fn(preamble, do_record=record, rgb=Color.FMKINFO, data_log=True)
 
         for idx, fbk_record in enumerate(fbk_list):
             timestamp, fbk_src, fbk, status = fbk_record
@@ -380,7 +548,7 @@ class Logger(object):
                 error_detected[fbk_src.obj] = False
 
         if epilogue is not None:
-            self.log_fn(epilogue, do_record=record, rgb=Color.FMKINFO)
+            self.log_fn(epilogue, do_record=record, rgb=Color.FMKINFO, data_log=True)
 
         return error_detected
 
@@ -390,12 +558,12 @@ class Logger(object):
         record = self.shall_record()
 
         if preamble is not None:
-            self.log_fn(preamble, do_record=record, rgb=Color.FMKINFO)
+            self.log_fn(preamble, do_record=record, rgb=Color.FMKINFO, data_log=True)
 
         self._log_feedback(source, content, status_code, timestamp, record=record)
 
         if epilogue is not None:
-            self.log_fn(epilogue, do_record=record, rgb=Color.FMKINFO)
+            self.log_fn(epilogue, do_record=record, rgb=Color.FMKINFO, data_log=True)
 
 
     def log_operator_feedback(self, operator, content, status_code, timestamp):
@@ -436,16 +604,24 @@ class Logger(object):
     def start_new_log_entry(self, preamble=''):
         self.__idx += 1
         self._current_sent_date = datetime.datetime.now()
+
+        if self.quiet_data:
+            if self.__idx % self.quiet_data == 0:
+                msg = "*** [ {:d} test cases sent | {:d} negative feedback over the last {:d} ] ***" \
+                    .format(self.__idx, self._quiet_data_errors, self.quiet_data)
+                self.log_fn(msg, rgb=Color.FMKINFO)
+                self._quiet_data_errors = 0
+
         now = self._current_sent_date.strftime("%d/%m/%Y - %H:%M:%S")
         msg = "====[ {:d} ]==[ {:s} ]====".format(self.__idx, now)
         msg += '='*(max(80-len(msg),0))
-        self.log_fn(msg, rgb=Color.NEWLOGENTRY, style=FontStyle.BOLD)
+        self.log_fn(msg, rgb=Color.NEWLOGENTRY, style=FontStyle.BOLD, data_log=True)
 
         return self._current_sent_date
 
     def log_dmaker_step(self, num):
         msg = "### Step %d:" % num
-        self.log_fn(msg, rgb=Color.DMAKERSTEP)
+        self.log_fn(msg, rgb=Color.DMAKERSTEP, data_log=True)
 
     def log_generator_info(self, dmaker_type, name, user_input, data_id=None, disabled=False):
         msg = "### Initial Generator (currently disabled):\n" if disabled else ''
@@ -459,7 +635,7 @@ class Logger(object):
         if not disabled:
             self._current_dmaker_list.append((dmaker_type, name, user_input))
             self._current_src_data_id = data_id
-        self.log_fn(msg, rgb=Color.DISABLED if disabled else Color.DATAINFO)
+        self.log_fn(msg, rgb=Color.DISABLED if disabled else Color.DATAINFO, data_log=True)
 
     def log_disruptor_info(self, dmaker_type, name, user_input):
         if user_input:
@@ -469,7 +645,7 @@ class Logger(object):
             msg = " |- disruptor type: %s | disruptor name: %s | No user input" % (dmaker_type, name)
 
         self._current_dmaker_list.append((dmaker_type, name, user_input))
-        self.log_fn(msg, rgb=Color.DATAINFO)
+        self.log_fn(msg, rgb=Color.DATAINFO, data_log=True)
 
     def log_data_info(self, data_info, dmaker_type, data_maker_name):
         if not data_info:
@@ -477,12 +653,12 @@ class Logger(object):
 
         self._current_dmaker_info[(dmaker_type,data_maker_name)] = data_info
 
-        self.log_fn(" |- data info:", rgb=Color.DATAINFO)
+        self.log_fn(" |- data info:", rgb=Color.DATAINFO, data_log=True)
         for msg in data_info:
             if len(msg) > 400:
                 msg = msg[:400] + ' ...'
 
-            self.log_fn('    |_ ' + msg, rgb=Color.DATAINFO)
+            self.log_fn('    |_ ' + msg, rgb=Color.DATAINFO, data_log=True)
 
     def log_info(self, info):
         msg = "### Info: {:s}".format(info)
@@ -491,8 +667,8 @@ class Logger(object):
     def log_target_ack_date(self):
         for tg_ref, ack_date in self._current_ack_dates.items():
             msg = "### Ack from '{!s}' received at: ".format(tg_ref)
-            self.log_fn(msg, nl_after=False, rgb=Color.LOGSECTION)
-            self.log_fn(str(ack_date), nl_before=False)
+            self.log_fn(msg, nl_after=False, rgb=Color.LOGSECTION, data_log=True)
+            self.log_fn(str(ack_date), nl_before=False, data_log=True)
 
     def set_target_ack_date(self, tg_ref, date):
         if self._current_ack_dates is None:
@@ -517,7 +693,7 @@ class Logger(object):
                 msgs = ("### Original Data:", data)
 
             for msg in msgs:
-                self.log_fn(msg, rgb=Color.LOGSECTION)
+                self.log_fn(msg, rgb=Color.LOGSECTION, data_log=True)
 
             ret = True
 
@@ -525,11 +701,15 @@ class Logger(object):
 
             if data is None:
                 ret = False
+            elif self._segment_log is not None and data.get_data_id() is not None:
+                self.log_fn("### Original data is recorded with the data ID: {:d}".format(data.get_data_id()),
+                            rgb=Color.DATAINFO, data_log=True)
+                ret = True
             else:
                 ffn = self._export_data_func(data)
                 if ffn:
-                    self.log_fn("### Original data is stored in the file:", rgb=Color.DATAINFO)
-                    self.log_fn(ffn)
+                    self.log_fn("### Original data is stored in the file:", rgb=Color.DATAINFO, data_log=True)
+                    self.log_fn(ffn, data_log=True)
                     ret = True
                 else:
                     self.print_console("ERROR: saving data in an extenal file has failed!",
@@ -543,26 +723,29 @@ class Logger(object):
 
     def log_data(self, data, verbose=False):
 
-        self.log_fn("### Data size: ", rgb=Color.LOGSECTION, nl_after=False)
+        self.log_fn("### Data size: ", rgb=Color.LOGSECTION, nl_after=False, data_log=True)
         self._current_size = data.get_length()
-        self.log_fn("%d bytes" % self._current_size, nl_before=False)
+        self.log_fn("%d bytes" % self._current_size, nl_before=False, data_log=True)
 
         if self.__explicit_data_recording and not data.is_recordable():
             self.last_data_recordable = False
-            self.log_fn("### Data emitted but not recorded", rgb=Color.LOGSECTION)
+            self.log_fn("### Data emitted but not recorded", rgb=Color.LOGSECTION, data_log=True)
             return False
 
         self._current_data = data
         self.last_data_recordable = self._current_data.is_recordable()
 
         if not self.__record_data:
-            self.log_fn("### Data emitted:", rgb=Color.LOGSECTION)
-            self.log_fn(data, nl_after=True, verbose=verbose)
+            self.log_fn("### Data emitted:", rgb=Color.LOGSECTION, data_log=True)
+            self.log_fn(data, nl_after=True, verbose=verbose, data_log=True)
+        elif self._segment_log is not None:
+            self.log_fn("### Emitted data is stored in the segment log:", rgb=Color.LOGSECTION, data_log=True)
+            self.log_fn(self._segment_log.path, data_log=True)
         else:
             ffn = self._export_data_func(data)
             if ffn:
-                self.log_fn("### Emitted data is stored in the file:", rgb=Color.LOGSECTION)
-                self.log_fn(ffn)
+                self.log_fn("### Emitted data is stored in the file:", rgb=Color.LOGSECTION, data_log=True)
+                self.log_fn(ffn, data_log=True)
                 ret = True
             else:
                 self.print_console("ERROR: saving data in an extenal file has failed!",
@@ -627,6 +810,27 @@ class Logger(object):
     def print_console(self, msg, nl_before=True, nl_after=False, rgb=None, style=None,
                       raw_limit=None, limit_output=True):
 
+        if self._console_rate_limit is not None and self._console_rate_exceeded():
+            return
+
+        if isinstance(msg, Data):
+            msg = repr(msg)
+
+        self._output_console((msg, nl_before, nl_after, rgb, style, raw_limit, limit_output))
+
+    def _output_console(self, console_args):
+        if self._log_queue is not None:
+            try:
+                self._log_queue.put_nowait(('console', console_args))
+            except queue.Full:
+                with self._console_lck:
+                    self._console_dropped += 1
+        else:
+            sys.stdout.write(self._format_console_msg(*console_args))
+            sys.stdout.flush()
+
+    def _format_console_msg(self, msg, nl_before, nl_after, rgb, style, raw_limit, limit_output):
+
         if raw_limit is None:
             raw_limit = self._console_display_limit
 
@@ -635,9 +839,6 @@ class Logger(object):
 
         prefix = p + self.p
 
-        if isinstance(msg, Data):
-            msg = repr(msg)
-
         suffix = ''
         if limit_output and len(msg) > raw_limit:
             msg = msg[:raw_limit]
@@ -651,7 +852,4 @@ class Logger(object):
         if style is None:
             style = ''
 
-        sys.stdout.write(style + prefix)
-        sys.stdout.write(msg)
-        sys.stdout.write(suffix + FontStyle.END)
-        sys.stdout.flush()
+        return style + prefix + msg + suffix + FontStyle.END
@@ -25,6 +25,7 @@ from __future__ import print_function
 
 import os
 import sys
+import bisect
 import functools
 import itertools
 import random
@@ -38,11 +39,11 @@ import struct
 import math
 
 from enum import Enum
-from random import shuffle
 
 sys.path.append('.')
 
 from framework.basic_primitives import *
+from framework.prng import tc_random
 from libs.external_modules import *
 from framework.global_resources import *
 from framework.error_handling import *
@@ -106,6 +107,83 @@ def flatten(nested):
             yield x
 
 
+class WeightedComponents(object):
+    '''
+    Array-backed view of a list of weighted components (``[weight1, comp1, weight2, comp2, ...]``)
+    such as the shapes of a non-terminal node or the components of a ``=+`` section.
+    Components are identified (e.g., for exclusion) by the index of their weight within the list.
+    '''
+
+    def __init__(self, comp_list):
+        self.source = comp_list
+        self.positions = []
+        self.weights = []
+        self.components = []
+        self.cumulative_weights = []
+
+        total = 0
+        for idx, weight, comp in split_verbose_with(lambda x: isinstance(x, int), comp_list):
+            total += weight
+            self.positions.append(idx)
+            self.weights.append(weight)
+            self.components.append(comp[0])
+            self.cumulative_weights.append(total)
+
+        self.total_weight = total
+        # heavier components first, the first declared one winning in case of equality
+        self.by_weight = sorted(range(len(self.weights)), key=lambda i: -self.weights[i])
+        self._slots = dict((pos, i) for i, pos in enumerate(self.positions))
+
+    def exclusion_mask(self, excluded_idx):
+        mask = 0
+        for idx in excluded_idx:
+            slot = self._slots.get(idx)
+            if slot is not None:
+                mask |= 1 << slot
+        return mask
+
+    def get_total_weight(self, mask=0):
+        if not mask:
+            return self.total_weight
+        return sum(w for i, w in enumerate(self.weights) if not mask >> i & 1)
+
+    def heavier(self, mask=0, accept=None):
+        '''
+        Returns:
+            int: slot of the heavier component not excluded by ``mask`` and accepted by ``accept``
+              (``None`` if there is no such component)
+        '''
+        for i in self.by_weight:
+            if mask >> i & 1:
+                continue
+            if accept is None or accept(self.components[i]):
+                return i
+        return None
+
+    def pick(self, r, mask=0, accept=None):
+        '''
+        Returns:
+            int: slot of the first component (not excluded by ``mask`` and accepted by ``accept``)
+              whose cumulative weight reaches ``r`` (``None`` if there is no such component)
+        '''
+        nb = len(self.components)
+        if mask:
+            s = 0
+            for i in range(nb):
+                if mask >> i & 1:
+                    continue
+                s += self.weights[i]
+                if s >= r and (accept is None or accept(self.components[i])):
+                    return i
+            return None
+
+        i = bisect.bisect_left(self.cumulative_weights, r)
+        if accept is not None:
+            while i < nb and not accept(self.components[i]):
+                i += 1
+        return i if i < nb else None
+
+
 nodes_weight_re = re.compile('(.*?)\((.*)\)')
 
 
@@ -1165,7 +1243,7 @@ class DynNode_Helpers(object):
         self._curr_pos += idx+1
 
     def make_private(self, env=None):
-        if env and env.id_list is None:
+        if env and env.id_map is None:
             env.register_basic_djob(self._update_dyn_helper, args=[env],
                                     prio=Node.DJOBS_PRIO_dynhelpers)
         elif env:
@@ -1174,13 +1252,13 @@ class DynNode_Helpers(object):
             pass
 
     def _update_dyn_helper(self, env):
-        if env.id_list is not None:
+        if env.id_map is not None:
             # print('*** DynHelper: delayed update')
             new_node_pos = {}
             # new_node_ids = {}
-            for old_id, new_id in env.id_list:
-                pos = self._node_pos.get(old_id, None)
-                if pos is not None:
+            for old_id, pos in self._node_pos.items():
+                new_id = env.id_map.get(old_id, None)
+                if new_id is not None:
                     # print('*** DynHelper: updated')
                     new_node_pos[new_id] = pos
                     # idx = self._node_ids.index(old_id)
@@ -2204,6 +2282,7 @@ class NodeInternals_NonTerm(NodeInternals):
         self.subnodes_order_total_weight = 0
         self.subnodes_attrs = {}
         self.separator = None
+        self._clear_shapes_cache()
 
         if self.encoder:
             self.encoder.reset()
@@ -2221,6 +2300,21 @@ class NodeInternals_NonTerm(NodeInternals):
         self.encoder = encoder
         encoder.reset()
 
+    def _clear_shapes_cache(self):
+        # New objects are created (instead of clearing them) as they may be shared
+        # with a copy of these internals.
+        # - id(comp_list) --> WeightedComponents of 'comp_list'
+        self._components_tables = {}
+        # - id(node_list) --> (node_list, expanded node_list, nodes of its '=+' sections)
+        self._expanded_nodelists = {}
+
+    def _get_components_table(self, comp_list):
+        table = self._components_tables.get(id(comp_list))
+        if table is None or table.source is not comp_list:
+            table = WeightedComponents(comp_list)
+            self._components_tables[id(comp_list)] = table
+        return table
+
     def __iter_csts(self, node_list):
         for delim, sublist in node_list:
             yield delim, sublist
@@ -2321,6 +2415,7 @@ class NodeInternals_NonTerm(NodeInternals):
             self.separator =  internals.separator
             self.subnodes_set = internals.subnodes_set
             self.customize(internals.custo)
+            self._clear_shapes_cache()
 
         elif subnodes_order is not None:
             # This case is used by self.make_private_subnodes()
@@ -2380,6 +2475,8 @@ class NodeInternals_NonTerm(NodeInternals):
 
                             modified_csts[id(node_list)].append(idx)
 
+        self._clear_shapes_cache()
+
     def _make_private_specific(self, ignore_frozen_state, accept_external_entanglement):
         if self.encoder:
             self.encoder = copy.copy(self.encoder)
@@ -2580,77 +2677,46 @@ class NodeInternals_NonTerm(NodeInternals):
         else:
             raise ValueError('No values are provided!')
 
+        self._clear_shapes_cache()
         self.reset_state(recursive=False, exclude_self=False)
 
+    def _component_exists(self, comp):
+        shall_exist = self._existence_from_node(self._get_node_from(comp))
+        return shall_exist is None or shall_exist
+
     def _get_random_component(self, comp_list, total_weight, check_existence=False):
-        r = random.uniform(0, total_weight)
-        s = 0
-
-        for weight, comp in split_with(lambda x: isinstance(x, int), comp_list):
-            s += weight
-            if check_existence:
-                shall_exist = self._existence_from_node(self._get_node_from(comp[0]))
-                if shall_exist is not None and not shall_exist:
-                    continue
-            if s >= r:  # if check_existence is False, we always return here
-                return comp[0]
-        else:
-            return None
+        r = tc_random.uniform(0, total_weight)
+        table = self._get_components_table(comp_list)
+        i = table.pick(r, accept=self._component_exists if check_existence else None)
+        return None if i is None else table.components[i]
 
     def _get_heavier_component(self, comp_list, check_existence=False):
-        current_weight = -1
-        current_comp = None
-        for weight, comp in split_with(lambda x: isinstance(x, int), comp_list):
-            if check_existence:
-                shall_exist = self._existence_from_node(self._get_node_from(comp[0]))
-                if shall_exist is not None and not shall_exist:
-                    continue
-            if weight > current_weight:
-                current_weight = weight
-                current_comp = comp[0]
-
-        return current_comp
+        table = self._get_components_table(comp_list)
+        i = table.heavier(accept=self._component_exists if check_existence else None)
+        return None if i is None else table.components[i]
 
     @staticmethod
     def _get_next_heavier_component(comp_list, excluded_idx=[]):
-        current_weight = -1
-        for idx, weight, comp in split_verbose_with(lambda x: isinstance(x, int), comp_list):
-            if idx in excluded_idx:
-                continue
-            if weight > current_weight:
-                current_weight = weight
-                current_comp = comp[0]
-                current_idx = idx
-
-        if current_weight == -1:
+        table = comp_list if isinstance(comp_list, WeightedComponents) else WeightedComponents(comp_list)
+        i = table.heavier(mask=table.exclusion_mask(excluded_idx))
+        if i is None:
             return [], None
         else:
-            return current_comp, current_idx
+            return table.components[i], table.positions[i]
 
     @staticmethod
     def _get_next_random_component(comp_list, excluded_idx=[], seed=None):
-        total_weight = 0
-        for idx, weight, comp in split_verbose_with(lambda x: isinstance(x, int), comp_list):
-            if idx in excluded_idx:
-                continue
-            total_weight += weight
-
+        table = comp_list if isinstance(comp_list, WeightedComponents) else WeightedComponents(comp_list)
+        mask = table.exclusion_mask(excluded_idx)
         if seed is None:
-            r = random.uniform(0, total_weight)
+            r = tc_random.uniform(0, table.get_total_weight(mask))
         else:
             r = seed
-        s = 0
-        for idx, weight, comp in split_verbose_with(lambda x: isinstance(x, int), comp_list):
-            if idx in excluded_idx:
-                continue
-            s += weight
-            if s >= r:
-                ret = comp[0], idx, r
-                break
+        i = table.pick(r, mask=mask)
+        if i is None:
+            return [], None, r
         else:
-            ret = [], None, r
-
-        return ret
+            return table.components[i], table.positions[i], r
 
 
     def structure_will_change(self):
@@ -2734,6 +2800,24 @@ class NodeInternals_NonTerm(NodeInternals):
 
     def _generate_expanded_nodelist(self, node_list, determinist=True):
 
+        cached = self._expanded_nodelists.get(id(node_list))
+        if cached is not None and cached[0] is node_list and \
+                all(n.synchronized_with(SyncScope.Existence) is None for n in cached[2]):
+            expanded_node_list = list(cached[1])
+        else:
+            expanded_node_list, pick_nodes = self._expand_nodelist(node_list)
+            # the expansion of '=+' sections depends on the existence of their nodes
+            if all(n.synchronized_with(SyncScope.Existence) is None for n in pick_nodes):
+                self._expanded_nodelists[id(node_list)] = (node_list, list(expanded_node_list), pick_nodes)
+
+        if not determinist:
+            tc_random.shuffle(expanded_node_list)
+
+        return expanded_node_list
+
+    def _expand_nodelist(self, node_list):
+
+        pick_nodes = []
         expanded_node_list = []
         for idx, delim, sublist in self.__iter_csts_verbose(node_list):
             if delim[1] == '>' or delim[1:3] == '=.':
@@ -2755,6 +2839,7 @@ class NodeInternals_NonTerm(NodeInternals):
                 if sublist[0] > -1:
                     for weight, comp in split_with(lambda x: isinstance(x, int), sublist[1]):
                         node, mini, maxi = self._get_node_and_attrs_from(comp[0])
+                        pick_nodes.append(node)
                         shall_exist = self._existence_from_node(node)
                         if shall_exist is not None and not shall_exist:
                             continue
@@ -2764,6 +2849,7 @@ class NodeInternals_NonTerm(NodeInternals):
                 else:
                     for node_desc in sublist[1]:
                         node, mini, maxi = self._get_node_and_attrs_from(node_desc)
+                        pick_nodes.append(node)
                         shall_exist = self._existence_from_node(node)
                         if shall_exist is not None and not shall_exist:
                             continue
@@ -2776,10 +2862,7 @@ class NodeInternals_NonTerm(NodeInternals):
         if not expanded_node_list:
             expanded_node_list.append(node_list)
 
-        if not determinist:
-            shuffle(expanded_node_list)
-
-        return expanded_node_list
+        return expanded_node_list, pick_nodes
 
     def _construct_subnodes(self, node_desc, subnode_list, mode, ignore_sep_fstate, ignore_separator=False, lazy_mode=True):
 
@@ -2804,7 +2887,7 @@ class NodeInternals_NonTerm(NodeInternals):
         if self.is_attr_set(NodeInternals.Determinist):
             nb = (mini + maxi) // 2
         else:
-            nb = random.randint(mini, maxi)
+            nb = tc_random.randint(mini, maxi)
 
         qty = self._qty_from_node(node)
         if qty is not None:
@@ -2917,7 +3000,7 @@ class NodeInternals_NonTerm(NodeInternals):
                 if self.subcomp_exhausted:
                     self.subcomp_exhausted = False
 
-                    node_list, idx = self._get_next_heavier_component(self.subnodes_order,
+                    node_list, idx = self._get_next_heavier_component(self._get_components_table(self.subnodes_order),
                                                                       excluded_idx=self.excluded_components)
                     self.excluded_components.append(idx)
                     # 'len(self.subnodes_order)' is always even
@@ -2933,7 +3016,7 @@ class NodeInternals_NonTerm(NodeInternals):
                     if self.subcomp_exhausted:
                         self.subcomp_exhausted = False
 
-                        node_list, idx, self.component_seed = self._get_next_random_component(self.subnodes_order,
+                        node_list, idx, self.component_seed = self._get_next_random_component(self._get_components_table(self.subnodes_order),
                                                                                               excluded_idx=self.excluded_components)
                         self.excluded_components.append(idx)
                         self.exhausted = len(self.excluded_components) == len(self.subnodes_order) // 2
@@ -2954,10 +3037,10 @@ class NodeInternals_NonTerm(NodeInternals):
                 # avoid memory waste, thus we need to reconstruct
                 # dynamically some part of the state
                 if determinist:
-                    node_list, idx = self._get_next_heavier_component(self.subnodes_order,
+                    node_list, idx = self._get_next_heavier_component(self._get_components_table(self.subnodes_order),
                                                                       excluded_idx=self.excluded_components)
                 else:
-                    node_list, idx, self.component_seed = self._get_next_random_component(self.subnodes_order,
+                    node_list, idx, self.component_seed = self._get_next_random_component(self._get_components_table(self.subnodes_order),
                                                                                           excluded_idx=self.excluded_components,
                                                                                           seed=self.component_seed)
 
@@ -3027,7 +3110,7 @@ class NodeInternals_NonTerm(NodeInternals):
                     # unfold the Nodes one after another
                     if delim[2:] == '..':
                         for i in range(lg):
-                            node = random.choice(l)
+                            node = tc_random.choice(l)
                             l.remove(node)
                             self._construct_subnodes(node, sublist_tmp, delim[0], ignore_sep_fstate)
 
@@ -3035,13 +3118,13 @@ class NodeInternals_NonTerm(NodeInternals):
                     else:
                         list_unfold = []
                         for i in range(lg):
-                            node = random.choice(l)
+                            node = tc_random.choice(l)
                             l.remove(node)
                             self._construct_subnodes(node, list_unfold, delim[0], ignore_sep_fstate, ignore_separator=True)
 
                         lg = len(list_unfold)
                         for i in range(lg):
-                            node = random.choice(list_unfold)
+                            node = tc_random.choice(list_unfold)
                             list_unfold.remove(node)
                             sublist_tmp.append(node)
                             if self.separator is not None:
@@ -3061,7 +3144,7 @@ class NodeInternals_NonTerm(NodeInternals):
                             shall_exist = self._existence_from_node(n)
                             if shall_exist is None or shall_exist:
                                 ndesc_list.append(ndesc)
-                        node = random.choice(ndesc_list) if ndesc_list else None
+                        node = tc_random.choice(ndesc_list) if ndesc_list else None
                     if node is None:
                         continue
                     else:
@@ -3329,6 +3412,8 @@ class NodeInternals_NonTerm(NodeInternals):
                         if n is old:
                             sublist[idx] = new
 
+        self._clear_shapes_cache()
+
     def _parse_node_desc(self, node_desc):
         mini, maxi = self.subnodes_attrs[node_desc]
         return node_desc, mini, maxi
@@ -3749,7 +3834,7 @@ class NodeInternals_NonTerm(NodeInternals):
             consumed_size = 0
             tmp_list = []
 
-            node_list, idx = NodeInternals_NonTerm._get_next_heavier_component(self.subnodes_order,
+            node_list, idx = NodeInternals_NonTerm._get_next_heavier_component(self._get_components_table(self.subnodes_order),
                                                                                excluded_idx=abs_excluded_components)
 
             abs_excluded_components.append(idx)
@@ -4035,7 +4120,8 @@ class NodeInternals_NonTerm(NodeInternals):
                         while dont_stop:
 
                             if t_weight > -1:
-                                node_desc, idx = NodeInternals_NonTerm._get_next_heavier_component(comp_list=node_desc_list, excluded_idx=excl_comp)
+                                node_desc, idx = NodeInternals_NonTerm._get_next_heavier_component(comp_list=self._get_components_table(sublist[1]),
+                                                                                                   excluded_idx=excl_comp)
                                 if node_desc is None:
                                     break
                                 excl_comp.append(idx)
@@ -4183,14 +4269,14 @@ class NodeInternals_NonTerm(NodeInternals):
                         self._perform_first_step = False
 
                     if determinist:
-                        node_list, idx = self._get_next_heavier_component(self.subnodes_order,
+                        node_list, idx = self._get_next_heavier_component(self._get_components_table(self.subnodes_order),
                                                                           excluded_idx=self.excluded_components)
                     else:
                         # In this case we don't recover the previous
                         # seed as the node is random and recovering
                         # the seed would make little sense because of
                         # the related overhead
-                        node_list, idx, self.component_seed = self._get_next_random_component(self.subnodes_order,
+                        node_list, idx, self.component_seed = self._get_next_random_component(self._get_components_table(self.subnodes_order),
                                                                                               excluded_idx=self.excluded_components,
                                                                                               seed=self.component_seed)
 
@@ -6329,14 +6415,14 @@ class Env4NT(object):
         if node_id in self.drawn_node_attrs:
             del self.drawn_node_attrs[node_id]
 
-    def update_node_ids(self, id_list):
+    def update_node_ids(self, id_map):
         if not self.drawn_node_attrs:
             return
 
         new_attrs = {}
-        for old_id, new_id in id_list:
-            obj = self.drawn_node_attrs.get(old_id, None)
-            if obj is not None:
+        for old_id, obj in self.drawn_node_attrs.items():
+            new_id = id_map.get(old_id, None)
+            if new_id is not None:
                 new_attrs[new_id] = obj
 
         self.drawn_node_attrs = new_attrs
@@ -6357,9 +6443,11 @@ class Env4NT(object):
 class Env(object):
 
     knowledge_source = None
+    prng = None  # PRNGContext set by the framework when test cases are seeded
 
     def __init__(self):
-        self.exhausted_nodes = []
+        # exhausted nodes are kept in an ordered set (values are not used)
+        self.exhausted_nodes = collections.OrderedDict()
         self.nodes_to_corrupt = {}
         self.env4NT = Env4NT()
         self.delayed_jobs_enabled = True
@@ -6367,7 +6455,8 @@ class Env(object):
         self._djob_keys = None
         self._djob_groups = None
         self._dm = None
-        self.id_list = None
+        # id(node) --> id(copied node), set by update_node_refs() when the Env is copied
+        self.id_map = None
         self._reentrancy_cpt = 0
         # self._knowledge_source = None
 
@@ -6417,17 +6506,17 @@ class Env(object):
         return len(self.exhausted_nodes) > 0
 
     def get_exhausted_nodes(self):
-        return copy.copy(self.exhausted_nodes)
+        return list(self.exhausted_nodes)
 
     def notify_exhausted_node(self, node):
-        self.exhausted_nodes.append(node)
+        self.exhausted_nodes[node] = None
 
     def is_node_exhausted(self, node):
         return node in self.exhausted_nodes
 
     def clear_exhausted_node(self, node):
         try:
-            self.exhausted_nodes.remove(node)
+            del self.exhausted_nodes[node]
         except:
             print('*** requested node.name:       ', node.name)
             print('*** requested node:            ', node)
@@ -6444,20 +6533,17 @@ class Env(object):
         return len(self.exhausted_nodes)
 
     def clear_all_exhausted_nodes(self):
-        self.exhausted_nodes = []
+        self.exhausted_nodes = collections.OrderedDict()
 
     def update_node_refs(self, node_dico, ignore_frozen_state):
 
-        exh_nodes = []
+        self.id_map = dict((id(old_node), id(new_node)) for old_node, new_node in node_dico.items())
+
+        # only the nodes referenced by the Env are looked up in 'node_dico'
         new_nodes_to_corrupt = {}
-        self.id_list = []
-        for old_node, new_node in node_dico.items():
-            self.id_list.append((id(old_node), id(new_node)))
-            if old_node in self.exhausted_nodes:
-                exh_nodes.append(new_node)
-            if old_node in self.nodes_to_corrupt.keys():
-                op = self.nodes_to_corrupt[old_node]
-                del self.nodes_to_corrupt[old_node]
+        for old_node, op in self.nodes_to_corrupt.items():
+            new_node = node_dico.get(old_node, None)
+            if new_node is not None:
                 new_nodes_to_corrupt[new_node] = op
 
         self.nodes_to_corrupt = new_nodes_to_corrupt
@@ -6466,11 +6552,16 @@ class Env(object):
             return
 
         if ignore_frozen_state:
-            self.exhausted_nodes = []
+            self.exhausted_nodes = collections.OrderedDict()
             self.env4NT.reset()
         else:
+            exh_nodes = collections.OrderedDict()
+            for old_node in self.exhausted_nodes:
+                new_node = node_dico.get(old_node, None)
+                if new_node is not None:
+                    exh_nodes[new_node] = None
             self.exhausted_nodes = exh_nodes
-            self.env4NT.update_node_ids(self.id_list)
+            self.env4NT.update_node_ids(self.id_map)
 
     # def update_id_list(self):
     #     self.id_list = []
@@ -6508,9 +6599,8 @@ class Env(object):
 
     def execute_basic_djobs(self, prio):
         assert(prio in self._sorted_jobs)
-        jobs = copy.copy(self._sorted_jobs[prio])
-        del self._sorted_jobs[prio] # func() may triggers this func,
-                                    # thus we cleanup before
+        jobs = self._sorted_jobs.pop(prio) # func() may triggers this func,
+                                           # thus we cleanup before
         for func, args in jobs:
             func(*args)
 
@@ -6550,25 +6640,31 @@ class Env(object):
         del self._sorted_jobs[prio][id(group)][key]
         if not self._sorted_jobs[prio][id(group)]:
             self._djob_groups[prio].remove(group)
+            del self._sorted_jobs[prio][id(group)]
+            if not self._sorted_jobs[prio]:
+                # no more jobs for this priority, thus djobs_exists() and
+                # delayed_jobs_pending will not trigger useless processing
+                del self._sorted_jobs[prio]
+                del self._djob_keys[prio]
+                del self._djob_groups[prio]
 
     def cleanup_remaining_djobs(self, prio):
         if prio not in self._sorted_jobs:
             return
 
-        groups = self.get_all_djob_groups(prio=prio)
-        if groups is not None:
-            for gr in groups:
-                gr_id = id(gr)
-                if gr_id not in self._sorted_jobs[prio]:
-                    continue
-                for n in reversed(gr):
-                    if id(n) in self._sorted_jobs[prio][gr_id]:
-                        func, args, cleanup = self._sorted_jobs[prio][gr_id][id(n)]
-                        cleanup(*args)
-
-        del self._sorted_jobs[prio]
+        # the jobs are removed before the cleanup functions are called
+        jobs = self._sorted_jobs.pop(prio)
         del self._djob_keys[prio]
-        del self._djob_groups[prio]
+        groups = self._djob_groups.pop(prio)
+        for gr in groups:
+            gr_jobs = jobs.get(id(gr), None)
+            if not gr_jobs:
+                continue
+            for n in reversed(gr):
+                job = gr_jobs.get(id(n), None)
+                if job is not None:
+                    func, args, cleanup = job
+                    cleanup(*args)
 
     def __copy__(self):
         new_env = type(self)()
@@ -6596,7 +6692,7 @@ class Env(object):
         # new_env._sorted_jobs = copy.copy(self._sorted_jobs)
         # new_env._djob_keys = copy.copy(self._djob_keys)
         # new_env._djob_groups = copy.copy(self._djob_groups)
-        # new_env.id_list = copy.copy(self.id_list)
+        # new_env.id_map = copy.copy(self.id_map)
         # new_env.cpt = 0
         return new_env
 
@@ -21,7 +21,9 @@
 #
 ################################################################################
 
+import collections
 import inspect
+import re
 import string
 import sys
 import six
@@ -35,6 +37,31 @@ from framework.node import Node, NodeInternals_Empty, GenFuncCusto, NonTermCusto
 
 import framework.value_types as fvt
 
+class NodeTemplate(object):
+    """
+    Graph template compiled from a data descriptor through :meth:`NodeBuilder.compile`.
+    The compiled graph is never handed out, each call to :meth:`instantiate` returns
+    a new copy of it.
+    """
+
+    def __init__(self, node):
+        self._node = node
+
+    @property
+    def name(self):
+        return self._node.name
+
+    def instantiate(self, name=None):
+        """
+        Args:
+            name (str): name of the new root node (by default the one of the descriptor)
+
+        Returns:
+            Node: a new graph, independent from the ones previously instantiated
+        """
+        return self._node.get_clone(name)
+
+
 class NodeBuilder(object):
 
     HIGH_PRIO = 1
@@ -70,6 +97,8 @@ class NodeBuilder(object):
         'debug'
     ]
 
+    _valid_keys_set = frozenset(valid_keys)
+
     def __init__(self, dm=None, delayed_jobs=True, add_env=True):
         """
         Help the process of data description. This class is able to construct a
@@ -96,9 +125,24 @@ class NodeBuilder(object):
 
     def _verify_keys_conformity(self, desc):
         for k in desc.keys():
-            if k not in self.valid_keys:
+            if k not in self._valid_keys_set:
                 raise KeyError("The description key '{:s}' is not recognized!".format(k))
 
+    def compile(self, desc):
+        """
+        Compile a data descriptor into a :class:`NodeTemplate`, from which graphs can be
+        instantiated without processing the descriptor again.
+
+        Args:
+            desc (dict): data descriptor
+
+        Returns:
+            NodeTemplate: the compiled descriptor
+        """
+        nb = NodeBuilder(dm=self.dm, delayed_jobs=self.delayed_jobs,
+                         add_env=self._add_env_to_the_node)
+        return NodeTemplate(nb.create_graph_from_desc(desc))
+
 
     def create_graph_from_desc(self, desc):
         self.sorted_todo = {}
@@ -636,14 +680,15 @@ class NodeBuilder(object):
     def _register_todo(self, node, func, args=None, unpack_args=True, prio=MEDIUM_PRIO):
         if self.sorted_todo.get(prio, None) is None:
             self.sorted_todo[prio] = []
-        self.sorted_todo[prio].insert(0, (node, func, args, unpack_args))
+        self.sorted_todo[prio].append((node, func, args, unpack_args))
 
     def _create_todo_list(self):
+        # within a priority, the last registered job is executed first
         todo = []
         tdl = sorted(self.sorted_todo.items(), key=lambda x: x[0])
         self.sorted_todo = {}
         for prio, sub_tdl in tdl:
-            todo += sub_tdl
+            todo += reversed(sub_tdl)
         return todo
 
     # Should be called at the last time to avoid side effects (e.g.,
@@ -809,9 +854,15 @@ class StateMachine(State):
         self.states = {}
         self.inputs = None
 
-        for name, cls in inspect.getmembers(self.__class__):
-            if inspect.isclass(cls) and issubclass(cls, State) and hasattr(cls, 'INITIAL'):
-                self.states[cls] = cls(self)
+        # the states of a machine are looked up only once per class
+        state_classes = self.__class__.__dict__.get('_state_classes')
+        if state_classes is None:
+            state_classes = [cls for name, cls in inspect.getmembers(self.__class__)
+                             if inspect.isclass(cls) and issubclass(cls, State) and hasattr(cls, 'INITIAL')]
+            self.__class__._state_classes = state_classes
+
+        for cls in state_classes:
+            self.states[cls] = cls(self)
 
         State.__init__(self, self if machine is None else machine)
 
@@ -848,6 +899,14 @@ def initial(cls):
 
 class RegexParser(StateMachine):
 
+    cache_size = 256
+    _shapes_cache = collections.OrderedDict()
+
+    # regexes that can be converted without running the state machine
+    _literals_regex = re.compile(r'^[^\\()\[\]{}*+?.]*\Z')
+    _char_class_regex = re.compile(r'^\[((?:[^\\()\[\]{}*+?\-](?:-[^\\()\[\]{}*+?\-])?)+)\]([*+?]?)\Z')
+    _char_range_regex = re.compile(r'([^-])(?:-([^-]))?')
+
     @initial
     class Initial(State):
 
@@ -1386,11 +1445,7 @@ class RegexParser(StateMachine):
         for nodes in self.shapes:
             node_nb += len(nodes)
 
-        name = self._name + '_' + str(node_nb + 1)
-        self.current_shape.append(self._create_terminal_node(name, type,
-                                                             values=self.values,
-                                                             alphabet=self.alphabet,
-                                                             qty=(self.min, self.max)))
+        self.current_shape.append((node_nb + 1, type, self.values, self.alphabet, (self.min, self.max)))
         self.reset()
 
     def reset(self):
@@ -1405,15 +1460,44 @@ class RegexParser(StateMachine):
         self.int_to_string = chr if sys.version_info[0] == 2 and self.charset != MH.Charset.UNICODE else six.unichr
 
         if self.charset == MH.Charset.ASCII:
-            max = 0x7F
+            self.max_code_point = 0x7F
             self.codec = 'ascii'
         elif self.charset == MH.Charset.UNICODE:
-            max = 0xFFFF
+            self.max_code_point = 0xFFFF
             self.codec = 'utf8'
         else:
-            max = 0xFF
+            self.max_code_point = 0xFF
             self.codec = 'latin-1'
 
+        key = (inputs, charset)
+        cache = RegexParser._shapes_cache
+        shapes = cache.get(key)
+        if shapes is None:
+            if not self._parse_simple_regex(inputs):
+                self._parse_regex(inputs)
+            shapes = tuple(tuple(nodes) for nodes in self.shapes)
+            cache[key] = shapes
+            while len(cache) > self.cache_size:
+                cache.popitem(last=False)
+        else:
+            cache[key] = cache.pop(key)  # most recently used
+
+        self.shapes = []
+        for nodes in shapes:
+            self.shapes.append([self._create_terminal_node(self._name + '_' + str(idx), type,
+                                                           values=None if values is None else list(values),
+                                                           alphabet=alphabet, qty=qty)
+                                for idx, type, values, alphabet, qty in nodes])
+
+        return self._create_non_terminal_node()
+
+    @staticmethod
+    def clear_cache():
+        RegexParser._shapes_cache.clear()
+
+    def _parse_regex(self, inputs):
+        max = self.max_code_point
+
         def get_complement(chars):
             return ''.join([self.int_to_string(i) for i in range(0, max + 1) if self.int_to_string(i) not in chars])
         self.get_complement = get_complement
@@ -1431,7 +1515,43 @@ class RegexParser(StateMachine):
         self.inputs = [None] + list(inputs) + [None]
         self.run(self)
 
-        return self._create_non_terminal_node()
+    def _parse_simple_regex(self, inputs):
+        """
+        Handle without the state machine the regexes that are only made of an alternation
+        of strings or of a character class.
+
+        Returns:
+            bool: ``True`` if the regex has been handled
+        """
+        if self.charset in (MH.Charset.ASCII, MH.Charset.ASCII_EXT) and \
+                any(ord(c) > self.max_code_point for c in inputs):
+            return False  # let the state machine raise the CharsetError
+
+        if self._literals_regex.match(inputs):
+            self.values = inputs.split('|')
+            self.flush()
+            return True
+
+        match = self._char_class_regex.match(inputs)
+        if match is None:
+            return False
+
+        alphabet = ''
+        for lower, upper in self._char_range_regex.findall(match.group(1)):
+            alphabet += lower
+            if upper:
+                if lower > upper:
+                    return False  # let the state machine raise the InvalidRangeError
+                for i in range(ord(lower) + 1, ord(upper) + 1):
+                    alphabet += self.int_to_string(i)
+
+        self.alphabet = alphabet
+        qty = match.group(2)
+        if qty:
+            self.min = 1 if qty == '+' else 0
+            self.max = 1 if qty == '?' else None
+        self.flush()
+        return True
 
     def _create_terminal_node(self, name, type, values=None, alphabet=None, qty=None):
 
@@ -27,6 +27,7 @@ import os
 import traceback
 import random
 import collections
+import heapq
 
 import copy
 import re
@@ -40,6 +41,7 @@ import signal
 
 from functools import wraps
 
+from framework.data_model import AtomPool
 from framework.database import FeedbackGate
 from framework.knowledge.feedback_collector import FeedbackSource
 from framework.error_handling import *
@@ -47,7 +49,10 @@ from framework.evolutionary_helpers import EvolutionaryScenariosFactory
 from framework.logger import *
 from framework.monitor import *
 from framework.operator_helpers import *
+from framework.prng import PRNGContext, tc_random
 from framework.project import *
+from framework.segment_log import SegmentLog, SegmentLogReader
+from framework.sharding import ShardedCampaign, ShardCoordinator
 from framework.scenario import *
 from framework.tactics_helpers import *
 from framework.target_helpers import *
@@ -179,41 +184,209 @@ class EnforceOrder(object):
         return wrapped_func
 
 
-class FmkTask(threading.Thread):
+class FmkTask(object):
 
-    def __init__(self, name, func, arg, period=None,
+    def __init__(self, name, func, arg, period=None, targets=None,
                  error_func=lambda x: x, cleanup_func=lambda: None):
-        threading.Thread.__init__(self)
+        '''
+        Args:
+            name: identifier of the task
+            func: function (or list of functions) called with `arg` each time the task is executed.
+              If `targets` is provided, `func` has to return the data to send to them
+              (if `func` is None, `arg` is the data to send).
+            arg: parameter of `func`
+            period (float): time interval between two executions of the task. If None, the
+              task is executed only once.
+            targets (list): targets the task sends data to.
+            error_func: called if the task crashes
+            cleanup_func: called after the execution of a task which is not periodic
+        '''
         self._name = name
         self._func = func
         self._arg = arg
-        self._period = period
-        self._stop = threading.Event()
+        self._period = None if period is None else max(period, 0.01)
+        self._targets = targets
         self._error_func = error_func
-        self._cleanup_func=cleanup_func
+        self._cleanup_func = cleanup_func
+        self._stop = threading.Event()
+
+        self.deadline = None
+        self.nb_runs = 0
+        self.jitter_max = 0.0
+        self._jitter_sum = 0.0
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def period(self):
+        return self._period
+
+    @property
+    def targets(self):
+        return self._targets
+
+    @property
+    def jitter_mean(self):
+        return self._jitter_sum / self.nb_runs if self.nb_runs else 0.0
+
+    def record_jitter(self, jitter):
+        self.nb_runs += 1
+        self._jitter_sum += jitter
+        self.jitter_max = max(self.jitter_max, jitter)
+
+    def get_data(self):
+        return self._arg if self._func is None else self._func(self._arg)
+
+    def execute(self):
+        if isinstance(self._func, list):
+            for f in self._func:
+                f(self._arg)
+        else:
+            self._func(self._arg)
+
+    def handle_error(self):
+        self._error_func("Task '{!s}' has crashed!".format(self._name))
+
+    def cleanup(self):
+        self._cleanup_func()
+
+    def is_stopped(self):
+        return self._stop.is_set()
+
+    def stop(self):
+        self._stop.set()
+
+
+class TaskScheduler(object):
+    '''
+    Executes every :class:`FmkTask` from a single thread, which sleeps until
+    the nearest deadline of a heap.
+
+    Periodic tasks are scheduled at a fixed rate: the next deadline of a task is computed
+    from its previous one and not from the end of its execution, thus the period does not
+    drift. If a task is late by more than one period, the missed executions are skipped.
+    The data of the tasks that are due at the same time (within :attr:`batch_window`)
+    and share a target are sent to it at once, if the target accepts them
+    (refer to :meth:`Target.can_send_multiple_data`).
+    '''
+
+    batch_window = 0.005
+
+    def __init__(self):
+        self._heap = []
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stop_event = None
+
+    def add_task(self, task):
+        with self._cond:
+            task.deadline = time.time()
+            self._push(task)
+            if self._thread is None:
+                self._stop_event = threading.Event()
+                self._thread = threading.Thread(target=self._run, args=(self._stop_event,),
+                                                name='fuddly task scheduler')
+                self._thread.start()
+            self._cond.notify()
+
+    def _push(self, task):
+        # the sequence number keeps tasks with the same deadline in insertion order
+        heapq.heappush(self._heap, (task.deadline, self._seq, task))
+        self._seq += 1
 
-    def run(self):
-        while not self._stop.is_set():
+    def stop(self):
+        with self._cond:
+            thread = self._thread
+            if thread is None:
+                return
+            self._stop_event.set()
+            self._thread = None
+            self._heap = []
+            self._cond.notify()
+        if thread is not threading.current_thread():
+            thread.join()
+
+    def _run(self, stop_event):
+        while True:
+            with self._cond:
+                while not stop_event.is_set():
+                    while self._heap and self._heap[0][2].is_stopped():
+                        heapq.heappop(self._heap)
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    delay = self._heap[0][0] - time.time()
+                    if delay <= 0:
+                        break
+                    self._cond.wait(delay)
+
+                if stop_event.is_set():
+                    return
+
+                now = time.time()
+                due_tasks = []
+                while self._heap and self._heap[0][0] <= now + self.batch_window:
+                    task = heapq.heappop(self._heap)[2]
+                    if not task.is_stopped():
+                        due_tasks.append(task)
+
+            self._execute(due_tasks)
+
+            with self._cond:
+                if stop_event.is_set():
+                    return
+                now = time.time()
+                for task in due_tasks:
+                    if task.is_stopped():
+                        continue
+                    task.deadline += task.period
+                    if task.deadline <= now:
+                        missed = int((now - task.deadline) // task.period) + 1
+                        task.deadline += missed * task.period
+                    self._push(task)
+
+    def _execute(self, tasks):
+        batches = collections.OrderedDict()
+        for task in tasks:
+            task.record_jitter(abs(time.time() - task.deadline))
             try:
-                # print("\n*** Function '{!s}' executed by Task '{!s}' ***".format(self._func, self._name))
-                if isinstance(self._func, list):
-                    for f in self._func:
-                        f(self._arg)
+                if task.targets is None:
+                    task.execute()
                 else:
-                    self._func(self._arg)
+                    data = task.get_data()
+                    for tg in task.targets:
+                        batches.setdefault(tg, []).append((task, data))
             except DataProcessTermination:
-                break
+                task.stop()
             except:
-                self._error_func("Task '{!s}' has crashed!".format(self._name))
-                break
-            if self._period is not None:
-                self._stop.wait(max(self._period,0.01))
-            else:
-                self._cleanup_func()
-                break
+                task.handle_error()
+                task.stop()
 
-    def stop(self):
-        self._stop.set()
+        for tg, batch in batches.items():
+            data_list = [data for _, data in batch]
+            if len(batch) > 1 and tg.can_send_multiple_data(data_list):
+                try:
+                    tg.send_multiple_data_sync(data_list, from_fmk=False)
+                except:
+                    for task, _ in batch:
+                        task.handle_error()
+                        task.stop()
+                continue
+
+            for task, data in batch:
+                try:
+                    tg.send_data_sync(data, from_fmk=False)
+                except:
+                    task.handle_error()
+                    task.stop()
+
+        for task in tasks:
+            if task.period is None and not task.is_stopped():
+                task.stop()
+                task.cleanup()
 
 
 class FmkPlumbing(object):
@@ -222,10 +395,11 @@ class FmkPlumbing(object):
     Defines the methods to operate every sub-systems of fuddly
     '''
 
-    def __init__(self, exit_on_error=False, debug_mode=False, quiet=False):
+    def __init__(self, exit_on_error=False, debug_mode=False, quiet=False, fmkdb_path=None):
         self._debug_mode = debug_mode
         self._exit_on_error = exit_on_error
         self._quiet = quiet
+        self._fmkdb_path = fmkdb_path
 
         self.prj_list = []
         self.dm_list = []
@@ -263,10 +437,16 @@ class FmkPlumbing(object):
 
         self._task_list = {}
         self._task_list_lock = threading.Lock()
+        self._task_scheduler = TaskScheduler()
 
         self._hc_timeout = {}  # health-check tiemout, further initialized as a dict (tg -> hc_timeout)
         self._hc_timeout_max = None
 
+        self._atom_pool_size = None
+        self._atom_pool_dm = None
+
+        self._prng = None
+
         self._current_sent_date = None
 
         self.error = False
@@ -300,7 +480,7 @@ class FmkPlumbing(object):
                 self.config.write(cfile)
         atexit.register(save_config)
 
-        self.fmkDB = Database()
+        self.fmkDB = Database(fmkdb_path=self._fmkdb_path)
         ok = self.fmkDB.start()
         if not ok:
             raise InvalidFmkDB("The database {:s} is invalid!".format(self.fmkDB.fmk_db_path))
@@ -494,6 +674,7 @@ class FmkPlumbing(object):
 
         else:
             self._cleanup_all_dmakers()
+            self.dm.disable_atom_pool()
             self.dm.cleanup()
 
             dm_params = self._import_dm(prefix, name, reload_dm=True)
@@ -1044,6 +1225,8 @@ class FmkPlumbing(object):
                     self.__dynamic_generator_ids[self.dm].append(dmaker_type)
                     self.fmkDB.insert_dmaker(self.dm.name, dmaker_type, gen_cls_name, True, True)
 
+            self._apply_atom_pool_setting()
+
             print(colorize("*** Data Model '%s' loaded ***" % self.dm.name, rgb=Color.DATA_MODEL_LOADED))
             self._dm_to_be_reloaded = False
 
@@ -1133,6 +1316,10 @@ class FmkPlumbing(object):
             self.lg.stop()
             self.prj.stop()
 
+            if self._atom_pool_dm is not None:
+                self._atom_pool_dm.disable_atom_pool()
+                self._atom_pool_dm = None
+
             self._stop()
 
             signal.signal(signal.SIGINT, sig_int_handler)
@@ -1570,6 +1757,173 @@ class FmkPlumbing(object):
     def disable_wkspace(self):
         self._wkspace_enabled = False
 
+    @EnforceOrder(accepted_states=['S1','S2'])
+    def set_prng_seed(self, seed=None, index=0, do_record=False):
+        '''
+        Make the generation of each test case depend only on @seed and on its index, so
+        that any test case can be regenerated directly (through prng_seek()) without
+        replaying the previous ones. Before each call to get_data(), the :class:`random.Random`
+        of a :class:`PRNGContext` positioned at the current index is bound to the current
+        thread through :data:`framework.prng.tc_random`, from which the framework draws
+        its random numbers. The other threads, and the global :mod:`random` module, are
+        thus left untouched. This context is also attached to the produced Data
+        (``Data.prng``) and to the node environments (``Env.prng``) for data makers
+        needing their own sub-streams.
+
+        Note that the state of stateful data makers (e.g., model walkers) still depends on
+        the previous test cases, and that data makers drawing directly from the
+        :mod:`random` module are not reproducible (they should use ``tc_random`` instead).
+
+        Args:
+          seed (int): seed of the campaign. If ``None``, seeding is disabled.
+          index (int): index of the next test case to generate.
+        '''
+        if seed is None:
+            self._prng = None
+            Env.prng = None
+            tc_random.bind(None)
+            self.lg.log_fmk_info('PRNG seeding disabled', do_record=do_record)
+        else:
+            self._prng = PRNGContext(seed=seed, index=index)
+            Env.prng = self._prng
+            self.lg.log_fmk_info('PRNG seed = {!s} (next test case index: {:d})'.format(seed, index),
+                                 do_record=do_record)
+        return True
+
+    @EnforceOrder(accepted_states=['S1','S2'])
+    def prng_seek(self, index):
+        if self._prng is None:
+            self.set_error('The PRNG is not seeded (refer to set_prng_seed())',
+                           code=Error.CommandError)
+            return False
+        self._prng.seek(index)
+        return True
+
+    @property
+    def prng(self):
+        return self._prng
+
+    @EnforceOrder(accepted_states=['S1','S2'])
+    def set_atom_pool(self, size=None, do_record=False):
+        '''
+        Make the data model hand out atoms that are cloned in advance by a background
+        thread, instead of cloning them on each request. The setting is kept when
+        data models are (re)loaded.
+
+        Args:
+          size (int): number of instances kept ready for each atom. The pool is
+            disabled if ``None`` or 0.
+        '''
+        if size is not None and size < 0:
+            self.lg.log_fmk_info('Wrong atom pool size!', do_record=False)
+            return False
+
+        self._atom_pool_size = size if size else None
+        self._apply_atom_pool_setting()
+        if self._atom_pool_size:
+            self.lg.log_fmk_info('Atom pool enabled (size = {:d})'.format(self._atom_pool_size),
+                                 do_record=do_record)
+        else:
+            self.lg.log_fmk_info('Atom pool disabled', do_record=do_record)
+        return True
+
+    def _apply_atom_pool_setting(self):
+        if self._atom_pool_dm is not None and self._atom_pool_dm is not self.dm:
+            self._atom_pool_dm.disable_atom_pool()
+            self._atom_pool_dm = None
+
+        if self._atom_pool_size:
+            pool = self.dm.atom_pool
+            if pool is None or pool.size != self._atom_pool_size:
+                self.dm.enable_atom_pool(size=self._atom_pool_size)
+            self._atom_pool_dm = self.dm
+        elif self._atom_pool_dm is not None:
+            self._atom_pool_dm.disable_atom_pool()
+            self._atom_pool_dm = None
+
+    def _is_walking_disruptor(self, action):
+        if isinstance(action, (tuple, list)):
+            action = action[0]
+        dmaker_type = action[0] if isinstance(action, (tuple, list)) else action
+        for tactics in (self._tactics, self._generic_tactics):
+            dmakers = tactics.get_disruptors_list(dmaker_type)
+            if dmakers:
+                for info in dmakers.values():
+                    args_desc = info['obj']._args_desc
+                    if not args_desc or 'init' not in args_desc or 'max_steps' not in args_desc:
+                        return False
+                return True
+        return False
+
+    @EnforceOrder(accepted_states=['S1','S2'])
+    def run_sharded_campaign(self, action_list, nb, nb_shards, walk=None, seed=None,
+                             nb_local_workers=None, address=('localhost', 0), timeout=None):
+        '''
+        Split a campaign of @nb test cases into @nb_shards disjoint ranges of test case
+        indexes, run each one in its own fuddly process with the current project, data
+        model and targets, then merge their records into the fmkDB, in the order of the
+        test case indexes (refer to :class:`framework.sharding.ShardedCampaign`).
+
+        Args:
+          action_list (list): actions as expected by get_data()
+          nb (int): number of test cases of the campaign
+          nb_shards (int): number of shards
+          walk (bool): if ``True``, the campaign is a model walk performed by the last
+            disruptor of @action_list. If ``None``, it is the case if this disruptor supports
+            the parameters ``init`` and ``max_steps``.
+          seed (int): seed of the campaign. If ``None``, the current PRNG seed is used if
+            set_prng_seed() has been called, otherwise a random one is chosen.
+          nb_local_workers (int): number of workers to spawn on this host (default to
+            @nb_shards). The other ones shall be launched through ``tools/shard_worker.py``.
+          address (tuple): (host, port) on which the shard coordinator will listen
+          timeout (float): maximum time to wait for the completion of the shards
+
+        Returns:
+          list: a :class:`framework.sharding.ShardReport` for each shard, or ``None``
+          if the campaign failed
+        '''
+        if self.dm.name not in self._name2dm:
+            self.set_error('Sharding is not supported with multiple data models',
+                           code=Error.CommandError)
+            return None
+
+        if walk is None:
+            walk = len(action_list) > 1 and self._is_walking_disruptor(action_list[-1])
+        if seed is None and self._prng is not None:
+            seed = self._prng.seed
+
+        try:
+            campaign = ShardedCampaign(self.prj.name, action_list, nb, dm_name=self.dm.name,
+                                       tg_ids=self._tg_ids, seed=seed, walk=walk)
+            coordinator = ShardCoordinator(campaign, nb_shards, address=address)
+        except (ValueError, IOError, OSError) as e:
+            self.set_error('Cannot set up the sharded campaign: {!s}'.format(e),
+                           code=Error.CommandError)
+            return None
+
+        self.lg.log_fmk_info('Sharded campaign ({:s}, seed = {!s}): {:d} shards, coordinator '
+                             'listening on {:s}:{:d}'
+                             .format('model walk' if walk else 'random', campaign.seed,
+                                     len(coordinator.shards), *coordinator.address),
+                             do_record=False)
+
+        coordinator.spawn_local_workers(nb=nb_local_workers)
+        try:
+            reports = coordinator.run(self.fmkDB, timeout=timeout)
+        except ShardingError as e:
+            self.set_error('Sharded campaign failed: {!s}'.format(e), code=Error.CommandError)
+            return None
+
+        for rep in reports:
+            shard = rep.shard
+            ids = 'none' if rep.data_ids is None else '{:d}..{:d}'.format(*rep.data_ids)
+            self.lg.log_fmk_info('Shard #{:d} [test cases {:d}..{:d}]: {:d} sent --> FmkDB Data IDs: {:s}'
+                                 .format(shard.shard_id, shard.start, shard.start+shard.count-1,
+                                         rep.nb_sent, ids),
+                                 do_record=False)
+
+        return reports
+
     @EnforceOrder(accepted_states=['S1','S2'])
     def set_fuzz_delay(self, delay, do_record=False):
         if delay >= 0 or delay == -1:
@@ -2017,16 +2371,16 @@ class FmkPlumbing(object):
                             # In this case each time we send the periodic we walk through the process
                             # (thus, sending a new data each time)
                             periodic_data = data_desc
-                            func = functools.partial(self._send_periodic, final_data_tg_ids)
+                            func = self._get_periodic_data
                         else:
                             periodic_data = self._handle_data_desc(data_desc,
                                                                    resolve_dataprocess=resolve_dataprocess,
                                                                    original_data=data)
-                            targets = [self.targets[x] for x in final_data_tg_ids]
-                            func = [tg.send_data_sync for tg in targets]
+                            func = None
+                        targets = [self.targets[x] for x in final_data_tg_ids]
 
                         if periodic_data is not None:
-                            task = FmkTask(idx, func, periodic_data, period=period,
+                            task = FmkTask(idx, func, periodic_data, period=period, targets=targets,
                                            error_func=self._handle_user_code_exception,
                                            cleanup_func=functools.partial(self._unregister_task, idx))
                             self._register_task(idx, task)
@@ -2076,14 +2430,12 @@ class FmkPlumbing(object):
 
         return valid_tg_ids
 
-    def _send_periodic(self, tg_ids, data_desc):
+    def _get_periodic_data(self, data_desc):
         data = self._handle_data_desc(data_desc)
-        if data is not None:
-            for tg in [self.targets[tg_id] for tg_id in tg_ids]:
-                tg.send_data_sync(data, from_fmk=False)
-        else:
+        if data is None:
             self.set_error(msg="Data descriptor handling returned 'None'!", code=Error.UserCodeError)
             raise DataProcessTermination
+        return data
 
     def _unregister_task(self, id, ign_error=False):
         with self._task_list_lock:
@@ -2100,7 +2452,7 @@ class FmkPlumbing(object):
         with self._task_list_lock:
             if id not in self._task_list:
                 self._task_list[id] = task
-                task.start()
+                self._task_scheduler.add_task(task)
             else:
                 self.set_error('WARNING: Task ID #{!s} already exists. '
                                'Task ignored.'.format(id), code=Error.UserCodeError)
@@ -2109,6 +2461,7 @@ class FmkPlumbing(object):
         for id in self._task_list:
             self._task_list[id].stop()
         self._task_list = {}
+        self._task_scheduler.stop()
 
     @EnforceOrder(accepted_states=['S2'])
     def stop_all_tasks(self):
@@ -2412,15 +2765,15 @@ class FmkPlumbing(object):
 
                 if self.fmkDB.enabled:
                     data_id = self.lg.commit_data_table_entry(self.group_id, self.prj.name)
-                    if data_id is None:
+                    if not self.lg.quiet_data and data_id is None:
                         self.lg.print_console('### Data not recorded in FmkDB',
                                               rgb=Color.DATAINFO, nl_after=True)
-                    else:
+                    elif not self.lg.quiet_data:
                         self.lg.print_console('### FmkDB Data ID: {!r}'.format(data_id),
                                               rgb=Color.DATAINFO, nl_after=True)
 
                 if multiple_data:
-                    self.lg.log_fn("--------------------------", rgb=Color.SUBINFO)
+                    self.lg.log_fn("--------------------------", rgb=Color.SUBINFO, data_log=True)
 
                 self.lg.log_target_ack_date()
 
@@ -2477,10 +2830,12 @@ class FmkPlumbing(object):
                 err_detected = True
 
             if tg_fbk.has_fbk_collector():
-                for ref, fbk, status, tstamp in tg_fbk.iter_and_cleanup_collector():
+                for ref, fbk, status, tstamp, related_data in \
+                        tg_fbk.iter_and_cleanup_collector(with_related_data=True):
                     if status < 0:
                         err_detected = True
-                    self.lg.log_target_feedback_from(source=FeedbackSource(tg, subref=ref),
+                    self.lg.log_target_feedback_from(source=FeedbackSource(tg, subref=ref,
+                                                                           related_data=related_data),
                                                      content=fbk,
                                                      status_code=status,
                                                      timestamp=tstamp,
@@ -2612,6 +2967,28 @@ class FmkPlumbing(object):
                 data.set_data_model(dm)
             self._register_in_data_bank(None, data)
 
+    def segment_log_fetch_data(self, path=None, start_id=None, end_id=None):
+        if path is None:
+            path = self.lg.get_segment_log_path()
+            if path is None:
+                self.set_error('The Logger does not use a segment log!',
+                               code=Error.CommandError)
+                return False
+        # the current session may be still in the buffers of the live log
+        self.lg.flush_segment_log()
+        reader = SegmentLogReader(path)
+        for rec in reader.iter_records(start_id, end_id, record_type=SegmentLog.DATA):
+            data = Data(rec.content)
+            data.set_data_id(rec.data_id)
+            data.set_initial_dmaker((str(rec.info), None, None))
+            data.from_fmkdb = True
+            if rec.source != Database.DEFAULT_DM_NAME:
+                dm = self.get_data_model_by_name(rec.source)
+                data.set_data_model(dm)
+            self._register_in_data_bank(None, data)
+        reader.close()
+        return True
+
     def _log_fmk_info(self, msg):
         if self.lg:
             self.lg.log_fmk_info(msg, do_record=False)
@@ -3029,7 +3406,8 @@ class FmkPlumbing(object):
         return True
 
     @EnforceOrder(accepted_states=['S2'])
-    def get_data(self, action_list, data_orig=None, valid_gen=False, save_seed=False):
+    def get_data(self, action_list, data_orig=None, valid_gen=False, save_seed=False,
+                 copy_orig=True):
         '''
         @action_list shall have a format compatible with what follows:
         [(action_1, UserInput_1), ...,
@@ -3038,6 +3416,9 @@ class FmkPlumbing(object):
         [action_1, (action_2, UserInput_2), ... action_n]
 
         where action_N can be either: dmaker_type_N or (dmaker_type_N, dmaker_name_N)
+
+        @copy_orig: if False, @data_orig is not copied before being processed, thus
+        its content may be altered in place (useful when the caller does not need it anymore)
         '''
 
         l = []
@@ -3060,12 +3441,22 @@ class FmkPlumbing(object):
         clone_dmaker = self._tactics.clone_generator
         clone_gen_dmaker = self._generic_tactics.clone_generator
 
+        if self._prng is not None:
+            tc_prng = self._prng.at(self._prng.index)
+            self._prng.next()
+            tc_random.bind(tc_prng.generator())
+        else:
+            tc_prng = None
+
         if data_orig != None:
-            data = copy.copy(data_orig)
             initial_generator_info = data_orig.get_initial_dmaker()
             # print('\n***')
             # print(data_orig.get_history(), data_orig.info_list, data_orig.info)
-            data.generate_info_from_content(original_data=data_orig)
+            if copy_orig:
+                data = copy.copy(data_orig)
+                data.generate_info_from_content(original_data=data_orig)
+            else:
+                data = data_orig
             history = data.get_history()
             # print(history, data_orig.info_list, data_orig.info)
             if history:
@@ -3281,6 +3672,9 @@ class FmkPlumbing(object):
                     else:
                         raise ValueError
 
+                    if tc_prng is not None and data is not None:
+                        data.prng = tc_prng
+
                     self._do_after_dmaker_data_retrieval(data)
 
                     if invalid_data:
@@ -3464,6 +3858,10 @@ class FmkPlumbing(object):
         else:
             for tk_id, tk in self._task_list.items():
                 msg = "Task ID #{!s}".format(tk_id)
+                if tk.period is not None:
+                    msg += " (period: {:.3f}s, executions: {:d}, jitter mean: {:.3f}ms, " \
+                           "max: {:.3f}ms)".format(tk.period, tk.nb_runs, tk.jitter_mean * 1000,
+                                                   tk.jitter_max * 1000)
                 self.lg.print_console(msg, rgb=Color.SUBINFO)
         self.lg.print_console('\n', nl_before=False)
 
@@ -3887,6 +4285,35 @@ class FmkShell(cmd.Cmd):
 
         return False
 
+    def do_logger_quiet_data(self, line):
+        '''
+        Only display a summary every N test cases instead of the data sent to the targets
+        and the feedback retrieved from them. Data and feedback are still recorded in the FmkDB.
+        This command modify the current Project's Logger.
+        |  syntax: logger_quiet_data [N]
+        |  |_ without argument, the quiet-data mode is disabled
+        '''
+        self.__error = True
+
+        args = line.split()
+        args_len = len(args)
+
+        if args_len > 1:
+            return False
+        elif args_len == 0:
+            self.fz.lg.quiet_data = None
+        else:
+            try:
+                val = int(args[0])
+            except ValueError:
+                return False
+            if val < 1:
+                return False
+            self.fz.lg.quiet_data = val
+
+        self.__error = False
+        return False
+
     def complete_config(self, text, line, bgidx, endix, target=None):
         init = False
         if target is None:
@@ -4767,6 +5194,45 @@ class FmkShell(cmd.Cmd):
         return False
 
 
+    def do_send_loop_sharded(self, line):
+        '''
+        Execute the 'send' command in a loop split over several fuddly processes, each one
+        dealing with its own range of test case indexes. Their records are then merged into
+        the fmkDB. If the last disruptor is a model walker, the walk is split, otherwise
+        the PRNG seed (refer to 'set_prng_seed') makes the shards disjoint.
+        |_ syntax: send_loop_sharded <#shards> <#loop> <generator_type> [disruptor_type_1 ... disruptor_type_n]
+        '''
+        args = line.split()
+        args_len = len(args)
+
+        self.__error = True
+
+        if args_len < 3:
+            return False
+
+        args, tg_ids = self._retrieve_tg_ids(args)
+        if tg_ids:
+            self.__error_msg = "Targets of a sharded campaign are the currently loaded ones"
+            return False
+
+        try:
+            nb_shards = int(args.pop(0))
+            max_loop = int(args.pop(0))
+        except ValueError:
+            return False
+
+        t = self.__parse_instructions(args)
+        if t is None:
+            self.__error_msg = "Syntax Error!"
+            return False
+
+        if self.fz.run_sharded_campaign(t, max_loop, nb_shards) is None:
+            return False
+
+        self.__error = False
+        return False
+
+
     def do_send_with(self, line):
         '''
         Generate data from specific generator
@@ -5057,6 +5523,83 @@ class FmkShell(cmd.Cmd):
         return False
 
 
+    def do_set_prng_seed(self, line):
+        '''
+        Make each test case reproducible from its index, by seeding the PRNG
+        before each data generation from the provided seed and the test case index.
+        |  syntax: set_prng_seed [seed [index]]
+        |  |_ seed: integer seed of the campaign (without argument, seeding is disabled)
+        |  |_ index: index of the next test case to generate (default: 0)
+        '''
+        self.__error = True
+
+        args = line.split()
+        args_len = len(args)
+
+        if args_len > 2:
+            return False
+        try:
+            seed = int(args[0]) if args_len > 0 else None
+            index = int(args[1]) if args_len > 1 else 0
+        except ValueError:
+            return False
+
+        self.fz.set_prng_seed(seed, index=index)
+
+        self.__error = False
+        return False
+
+    def do_prng_seek(self, line):
+        '''
+        Set the index of the next test case to generate, in order to regenerate it
+        (the PRNG has to be seeded through 'set_prng_seed').
+        |  syntax: prng_seek <index>
+        '''
+        self.__error = True
+
+        args = line.split()
+        if len(args) != 1:
+            return False
+        try:
+            index = int(args[0])
+        except ValueError:
+            return False
+
+        if not self.fz.prng_seek(index):
+            return False
+
+        self.__error = False
+        return False
+
+    def do_set_atom_pool(self, line):
+        '''
+        Make the data model hand out atoms cloned in advance by a background
+        thread, instead of cloning them each time they are requested.
+        |  syntax: set_atom_pool [size]
+        |  |_ size: number of instances kept ready for each atom (default: 2)
+        |      0  : disable the atom pool
+        '''
+        self.__error = True
+
+        args = line.split()
+        args_len = len(args)
+
+        if args_len > 1:
+            return False
+        elif args_len == 0:
+            size = AtomPool.DEFAULT_SIZE
+        else:
+            try:
+                size = int(args[0])
+            except ValueError:
+                return False
+
+        if not self.fz.set_atom_pool(size):
+            return False
+
+        self.__error = False
+        return False
+
     def do_set_burst(self, line):
         '''
         Set the burst value. Used by the FMK to decide when delay
@@ -5433,6 +5976,37 @@ class FmkShell(cmd.Cmd):
         self.__error = False
         return False
 
+    def do_segment_log_fetch_data(self, line):
+        '''
+        Fetch the data from a segment log and fill the Data Bank with it. If data IDs are given,
+        only fetch the data between the two references. If no path is given, the segment log
+        of the current Project's Logger is used.
+        |_ syntax: segment_log_fetch_data [first_data_id] [last_data_id] [path]
+        '''
+
+        self.__error = True
+        self.__error_msg = "Syntax Error!"
+
+        args = line.split()
+
+        if len(args) > 3:
+            return False
+
+        path = args.pop() if len(args) == 3 else None
+        try:
+            ids = [int(a) for a in args]
+        except ValueError:
+            return False
+        sid = ids[0] if len(ids) > 0 else None
+        eid = ids[1] if len(ids) > 1 else None
+
+        if not self.fz.segment_log_fetch_data(path=path, start_id=sid, end_id=eid):
+            self.__error_msg = "The Logger does not use a segment log!"
+            return False
+
+        self.__error = False
+        return False
+
     def do_fmkdb_enable(self, line):
         '''Enable FmkDB recording'''
         self.fz.enable_fmkdb()
@@ -0,0 +1,122 @@
+################################################################################
+#
+#  Copyright 2016 Eric Lacombe <eric.lacombe@security-labs.org>
+#
+################################################################################
+#
+#  This file is part of fuddly.
+#
+#  fuddly is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  fuddly is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with fuddly. If not, see <http://www.gnu.org/licenses/>
+#
+################################################################################
+
+
+import hashlib
+import random
+import threading
+
+
+class PRNGContext(object):
+    """
+    Seeded pseudo-random context used to make the generation of test cases
+    reproducible on an individual basis.
+
+    The random numbers used by a test case only depend on the context seed and on
+    the index of the test case, and not on what has been generated before. Each
+    sub-stream (e.g., one per data maker or per node) is a :class:`random.Random`
+    seeded with a hash of ``(seed, index, stream path)``. Thus, any test case index
+    can be reached directly through :meth:`seek` without replaying the previous ones,
+    which also allows to spread a campaign over several workers.
+
+    Args:
+        seed (int): seed of the context. If ``None``, a random one is chosen.
+        index (int): index of the current test case.
+    """
+
+    def __init__(self, seed=None, index=0):
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(64)
+        self.seed = seed
+        self.index = index
+
+    def derive_seed(self, *path):
+        """
+        Return the seed (64-bit integer) derived from the context seed and the
+        provided path.
+        """
+        h = hashlib.sha256(repr((self.seed,) + path).encode('utf8'))
+        return int(h.hexdigest()[:16], 16)
+
+    def stream(self, *path):
+        """
+        Return a new :class:`random.Random` for the provided stream path (e.g., a data maker
+        name, a node name, ...) and the current test case index.
+        """
+        return random.Random(self.derive_seed('stream', self.index, *path))
+
+    def generator(self):
+        """
+        Return the :class:`random.Random` of the current test case index. The framework
+        binds it to the generating thread through :data:`tc_random` before generating
+        each test case, as most of the value types and data makers rely on it.
+        """
+        return random.Random(self.derive_seed('global', self.index))
+
+    def seek(self, index):
+        self.index = index
+
+    def next(self):
+        self.index += 1
+
+    def at(self, index):
+        """
+        Return a copy of the context positioned at the test case ``index``.
+        """
+        return PRNGContext(seed=self.seed, index=index)
+
+    def __repr__(self):
+        return 'PRNGContext(seed={!r}, index={:d})'.format(self.seed, self.index)
+
+
+class TestCaseRandom(object):
+    """
+    Drop-in replacement of the :mod:`random` module functions, used by the framework
+    wherever random numbers are drawn to generate test cases (value types, nodes,
+    generic data makers, ...).
+
+    In a thread to which the :class:`random.Random` of a test case has been bound
+    (refer to :meth:`bind`), the numbers are drawn from it, otherwise from the
+    :mod:`random` module. The generation of a seeded test case is thus not disturbed
+    by the other threads drawing random numbers (atom pool, feedback handlers, probes,
+    threaded targets, ...), and does not disturb them.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def bind(self, generator):
+        """
+        Bind a :class:`random.Random` to the current thread, or unbind it if ``None``.
+        """
+        self._local.generator = generator
+
+    def get_generator(self):
+        generator = getattr(self._local, 'generator', None)
+        return random if generator is None else generator
+
+    def __getattr__(self, name):
+        return getattr(self.get_generator(), name)
+
+
+tc_random = TestCaseRandom()
@@ -44,11 +44,24 @@ class Project(object):
 
     feedback_gate = None
 
-    def __init__(self, enable_fbk_processing=True):
+    def __init__(self, enable_fbk_processing=True, fbk_processing_workers=1):
+        '''
+        Args:
+            enable_fbk_processing (bool): if `True`, the feedback retrieved from the targets
+              and the probes is processed by the registered feedback handlers.
+            fbk_processing_workers (int): number of threads running the feedback handlers. The
+              feedback of a given source is always processed in order by the same thread, but
+              if more than one thread is used, the feedback handlers have to be thread-safe as
+              they may be called concurrently for different sources.
+        '''
+        assert fbk_processing_workers >= 1
         self.monitor = Monitor()
         self._knowledge_source = InformationCollector()
+        self._knowledge_lock = threading.Lock()
         self._fbk_processing_enabled = enable_fbk_processing
-        self._feedback_processing_thread = None
+        self._fbk_processing_workers = fbk_processing_workers
+        self._feedback_processing_threads = None
+        self._feedback_fifos = None
         self._fbk_handlers = []
 
         self.scenario_target_mapping = None
@@ -85,22 +98,24 @@ class Project(object):
     def trigger_feedback_handlers(self, source, timestamp, content, status):
         if not self._fbk_processing_enabled:
             return
-        self._feedback_fifo.put((source, timestamp, content, status))
+        # the feedback of one source is always dispatched to the same worker to preserve its order
+        fifo = self._feedback_fifos[hash(str(source)) % len(self._feedback_fifos)]
+        fifo.put((source, timestamp, content, status))
 
-    def _feedback_processing(self):
+    def _feedback_processing(self, feedback_fifo):
         '''
-        core function of the feedback processing thread
+        core function of the feedback processing threads
         '''
-        while self._run_fbk_handling_thread:
-            try:
-                fbk_tuple = self._feedback_fifo.get(timeout=0.5)
-            except queue.Empty:
-                continue
+        while True:
+            fbk_tuple = feedback_fifo.get()
+            if fbk_tuple is None:
+                break
 
             for fh in self._fbk_handlers:
                 info = fh.process_feedback(self.dm, *fbk_tuple)
                 if info:
-                    self.knowledge_source.add_information(info)
+                    with self._knowledge_lock:
+                        self.knowledge_source.add_information(info)
 
     def estimate_last_data_impact_uniqueness(self):
         similarity = UNIQUE
@@ -180,11 +195,17 @@ class Project(object):
             fh._start()
 
         if self._fbk_processing_enabled:
-            self._run_fbk_handling_thread = True
-            self._feedback_fifo = queue.Queue()
-            self._feedback_processing_thread = threading.Thread(target=self._feedback_processing,
-                                                                name='fuddly feedback processing')
-            self._feedback_processing_thread.start()
+            self._feedback_fifos = []
+            self._feedback_processing_threads = []
+            for i in range(self._fbk_processing_workers):
+                fifo = queue.Queue()
+                name = 'fuddly feedback processing'
+                if self._fbk_processing_workers > 1:
+                    name += ' #{:d}'.format(i)
+                th = threading.Thread(target=self._feedback_processing, args=(fifo,), name=name)
+                self._feedback_fifos.append(fifo)
+                self._feedback_processing_threads.append(th)
+                th.start()
 
 
     def stop(self):
@@ -194,11 +215,13 @@ class Project(object):
         DataMaker.knowledge_source = None
         ScenarioEnv.knowledge_source = None
 
-        if self._fbk_processing_enabled:
-            self._run_fbk_handling_thread = False
-            if self._feedback_processing_thread:
-                self._feedback_processing_thread.join()
-            self._feedback_fifo = None
+        if self._fbk_processing_enabled and self._feedback_processing_threads:
+            for fifo in self._feedback_fifos:
+                fifo.put(None)
+            for th in self._feedback_processing_threads:
+                th.join()
+            self._feedback_processing_threads = None
+            self._feedback_fifos = None
 
         for fh in self._fbk_handlers:
             fh._stop()
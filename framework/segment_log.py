@@ -0,0 +1,362 @@
+################################################################################
+#
+#  Copyright 2016 Eric Lacombe <eric.lacombe@security-labs.org>
+#
+################################################################################
+#
+#  This file is part of fuddly.
+#
+#  fuddly is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  fuddly is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with fuddly. If not, see <http://www.gnu.org/licenses/>
+#
+################################################################################
+
+
+import os
+import re
+import mmap
+import time
+import zlib
+import bisect
+import struct
+import collections
+from datetime import datetime
+
+from libs.utils import ensure_dir
+
+
+SegmentLogRecord = collections.namedtuple('SegmentLogRecord',
+                                          ['type', 'data_id', 'timestamp', 'status',
+                                           'source', 'info', 'file_extension', 'content'])
+
+
+class SegmentLog(object):
+    '''
+    Append-only binary log used to record emitted data and retrieved feedback
+    without creating a file per test case.
+
+    The log is a folder of segments. Each segment is made of a log file, where
+    length-prefixed records are appended, and of a sidecar index file that contains
+    fixed-size entries (data ID, record offset, record type). When a segment reaches
+    `max_segment_size`, a new one is started. Record contents can be compressed with zlib.
+
+    Use :class:`SegmentLogReader` to read it back.
+    '''
+
+    DATA = 1
+    FEEDBACK = 2
+
+    FLAG_COMPRESSED = 0x1
+
+    # type, flags, data ID, timestamp, status, source size, info size,
+    # file extension size, content size
+    RECORD_HDR = struct.Struct('<BBQdiIIII')
+    # data ID, record offset, record type
+    INDEX_ENTRY = struct.Struct('<QQB')
+
+    DEFAULT_MAX_SEGMENT_SIZE = 64*1024*1024
+
+    _segment_regexp = re.compile(r'^segment_(\d{6})\.log$')
+
+    def __init__(self, path, max_segment_size=DEFAULT_MAX_SEGMENT_SIZE, compress=False):
+        '''
+        Args:
+          path (str): folder where the segments are stored.
+          max_segment_size (int): size in bytes above which a new segment is started.
+          compress (bool): If True, record contents are compressed with zlib.
+        '''
+        self.path = path
+        self.max_segment_size = max_segment_size
+        self.compress = compress
+        self._log_fd = None
+        self._idx_fd = None
+        self._segment_nb = None
+        self._segment_size = 0
+
+    @staticmethod
+    def segment_files(path, segment_nb):
+        base = os.path.join(path, 'segment_{:06d}'.format(segment_nb))
+        return base + '.log', base + '.idx'
+
+    @classmethod
+    def list_segments(cls, path):
+        if not os.path.isdir(path):
+            return []
+        segments = []
+        for fname in os.listdir(path):
+            m = cls._segment_regexp.match(fname)
+            if m:
+                segments.append(int(m.group(1)))
+        return sorted(segments)
+
+    def open(self):
+        ensure_dir(os.path.join(self.path, ''))
+        segments = self.list_segments(self.path)
+        segment_nb = segments[-1] if segments else 0
+        self._open_segment(segment_nb)
+        if self._segment_size >= self.max_segment_size:
+            self._rotate()
+
+    def close(self):
+        if self._log_fd is not None:
+            self._log_fd.close()
+            self._idx_fd.close()
+            self._log_fd = None
+            self._idx_fd = None
+
+    def flush(self):
+        if self._log_fd is not None:
+            self._log_fd.flush()
+            self._idx_fd.flush()
+
+    def is_open(self):
+        return self._log_fd is not None
+
+    def _open_segment(self, segment_nb):
+        log_path, idx_path = self.segment_files(self.path, segment_nb)
+        self._log_fd = open(log_path, 'ab')
+        self._idx_fd = open(idx_path, 'ab')
+        self._segment_nb = segment_nb
+        self._segment_size = self._log_fd.tell()
+
+    def _rotate(self):
+        self.close()
+        self._open_segment(self._segment_nb + 1)
+
+    @staticmethod
+    def _date_to_timestamp(date):
+        if date is None:
+            return 0.0
+        elif isinstance(date, (int, float)):
+            return float(date)
+        return time.mktime(date.timetuple()) + date.microsecond / 1000000.0
+
+    @staticmethod
+    def _to_bytes(val):
+        if val is None:
+            return b''
+        elif isinstance(val, bytes):
+            return val
+        else:
+            return str(val).encode('utf8')
+
+    def _append(self, rtype, data_id, date, status, source, info, content, file_ext=None):
+        if self._segment_size >= self.max_segment_size:
+            self._rotate()
+
+        source = self._to_bytes(source)
+        info = self._to_bytes(info)
+        file_ext = self._to_bytes(file_ext)
+        content = self._to_bytes(content)
+        flags = 0
+        if self.compress:
+            content = zlib.compress(content)
+            flags |= self.FLAG_COMPRESSED
+
+        hdr = self.RECORD_HDR.pack(rtype, flags, data_id, self._date_to_timestamp(date),
+                                   status, len(source), len(info), len(file_ext), len(content))
+        offset = self._segment_size
+        self._log_fd.write(hdr + source + info + file_ext)
+        self._log_fd.write(content)
+        self._idx_fd.write(self.INDEX_ENTRY.pack(data_id, offset, rtype))
+        self._segment_size += len(hdr) + len(source) + len(info) + len(file_ext) + len(content)
+
+    def append_data(self, data_id, content, date=None, dm_name=None, dtype=None,
+                    file_extension=None):
+        '''
+        Append an emitted data to the log.
+
+        Args:
+          data_id (int): FmkDB ID of the data.
+          content (bytes): the data itself.
+          date (datetime): the sending date.
+          dm_name (str): name of the data model the data comes from.
+          dtype (str): type of the initial data maker.
+          file_extension (str): extension of the files of the data model, used
+            when the data is exported.
+        '''
+        self._append(self.DATA, data_id, date, 0, dm_name, dtype, content,
+                     file_ext=file_extension)
+
+    def append_feedback(self, data_id, source, content, date=None, status=None):
+        '''
+        Append a feedback related to the data `data_id` to the log.
+
+        Args:
+          data_id (int): FmkDB ID of the data the feedback is related to.
+          source: the feedback source.
+          content (bytes): the feedback itself.
+          date (datetime): the feedback timestamp.
+          status (int): the feedback status code.
+        '''
+        self._append(self.FEEDBACK, data_id, date, 0 if status is None else status,
+                     source, None, content)
+
+
+class SegmentLogReader(object):
+    '''
+    Read a :class:`SegmentLog` back. Segments and their indexes are memory-mapped.
+    The records of a given data ID range are located by bisecting the index of each
+    segment, the segments whose data ID range does not intersect being skipped.
+    '''
+
+    # data ID field of an index entry
+    _index_data_id = struct.Struct('<Q')
+
+    def __init__(self, path):
+        self.path = path
+        self._segments = []
+        self._indexes = {}
+        for segment_nb in SegmentLog.list_segments(path):
+            log_path, idx_path = SegmentLog.segment_files(path, segment_nb)
+            log_map = self._map_file(log_path)
+            idx_map = self._map_file(idx_path)
+            if log_map is not None and idx_map is not None:
+                self._segments.append((log_map, idx_map))
+
+    @staticmethod
+    def _map_file(path):
+        try:
+            with open(path, 'rb') as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return None
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (IOError, OSError):
+            return None
+
+    def close(self):
+        for log_map, idx_map in self._segments:
+            log_map.close()
+            idx_map.close()
+        self._segments = []
+        self._indexes = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _read_record(self, log_map, offset):
+        hdr = SegmentLog.RECORD_HDR
+        if offset + hdr.size > len(log_map):
+            return None
+        rtype, flags, data_id, timestamp, status, src_sz, info_sz, ext_sz, content_sz = \
+            hdr.unpack_from(log_map, offset)
+        start = offset + hdr.size
+        end = start + src_sz + info_sz + ext_sz + content_sz
+        if end > len(log_map):
+            # truncated record (e.g., the logger has been killed)
+            return None
+        source = log_map[start:start+src_sz].decode('utf8')
+        start += src_sz
+        info = log_map[start:start+info_sz].decode('utf8')
+        start += info_sz
+        file_ext = log_map[start:start+ext_sz].decode('utf8')
+        start += ext_sz
+        content = log_map[start:end]
+        if flags & SegmentLog.FLAG_COMPRESSED:
+            content = zlib.decompress(content)
+        return SegmentLogRecord(rtype, data_id, datetime.fromtimestamp(timestamp), status,
+                                source, info, file_ext, content)
+
+    def _get_index(self, segment):
+        '''
+        Return the data IDs of the index entries of a segment sorted in ascending order,
+        along with the entry numbers in the same order (None if the index is
+        already sorted). Data IDs increase monotonically, but the feedback of a data
+        may be appended after more recent data (e.g., in burst mode), thus the
+        entries are sorted once, when the segment is looked up for the first time.
+        '''
+        index = self._indexes.get(segment)
+        if index is None:
+            log_map, idx_map = self._segments[segment]
+            entry_sz = SegmentLog.INDEX_ENTRY.size
+            unpack_id = self._index_data_id.unpack_from
+            ids = [unpack_id(idx_map, i * entry_sz)[0]
+                   for i in range(len(idx_map) // entry_sz)]
+            if all(ids[i] <= ids[i+1] for i in range(len(ids) - 1)):
+                index = (ids, None)
+            else:
+                order = sorted(range(len(ids)), key=ids.__getitem__)
+                index = ([ids[i] for i in order], order)
+            self._indexes[segment] = index
+        return index
+
+    def _lookup(self, segment, first_id, last_id):
+        '''
+        Return the numbers of the index entries of a segment related to the data
+        IDs within [first_id, last_id], in the order they have been appended.
+        '''
+        ids, order = self._get_index(segment)
+        if not ids or (first_id is not None and ids[-1] < first_id) or \
+                (last_id is not None and ids[0] > last_id):
+            return []
+        lo = 0 if first_id is None else bisect.bisect_left(ids, first_id)
+        hi = len(ids) if last_id is None else bisect.bisect_right(ids, last_id)
+        if order is None:
+            return range(lo, hi)
+        else:
+            return sorted(order[lo:hi])
+
+    def iter_records(self, first_id=None, last_id=None, record_type=None):
+        '''
+        Iterate over the records in the order they have been appended.
+
+        Args:
+          first_id (int): only consider records related to data IDs >= `first_id`.
+          last_id (int): only consider records related to data IDs <= `last_id`.
+          record_type (int): only consider records of this type
+            (:attr:`SegmentLog.DATA` or :attr:`SegmentLog.FEEDBACK`).
+
+        Returns:
+          generator of :class:`SegmentLogRecord`
+        '''
+        entry = SegmentLog.INDEX_ENTRY
+        for segment, (log_map, idx_map) in enumerate(self._segments):
+            if first_id is None and last_id is None:
+                entries = range(len(idx_map) // entry.size)
+            else:
+                entries = self._lookup(segment, first_id, last_id)
+            for i in entries:
+                data_id, offset, rtype = entry.unpack_from(idx_map, i * entry.size)
+                if record_type is not None and rtype != record_type:
+                    continue
+                rec = self._read_record(log_map, offset)
+                if rec is not None:
+                    yield rec
+
+    def get_data(self, data_id):
+        for rec in self.iter_records(data_id, data_id, record_type=SegmentLog.DATA):
+            return rec
+        return None
+
+    def get_feedback(self, data_id):
+        return list(self.iter_records(data_id, data_id, record_type=SegmentLog.FEEDBACK))
+
+    def export_data(self, folder, first_id=None, last_id=None):
+        '''
+        Write the data of the provided data ID range in `folder` (one file per data).
+
+        Returns:
+          list: the pairs (data ID, file path) of the exported data
+        '''
+        exported = []
+        for rec in self.iter_records(first_id, last_id, record_type=SegmentLog.DATA):
+            ext = rec.file_extension if rec.file_extension else 'bin'
+            fname = os.path.join(folder, '{:d}.{:s}'.format(rec.data_id, ext))
+            ensure_dir(fname)
+            with open(fname, 'wb') as f:
+                f.write(rec.content)
+            exported.append((rec.data_id, fname))
+        return exported
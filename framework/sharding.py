@@ -0,0 +1,392 @@
+################################################################################
+#
+#  Copyright 2016 Eric Lacombe <eric.lacombe@security-labs.org>
+#
+################################################################################
+#
+#  This file is part of fuddly.
+#
+#  fuddly is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  fuddly is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with fuddly. If not, see <http://www.gnu.org/licenses/>
+#
+################################################################################
+
+
+import binascii
+import collections
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from multiprocessing.connection import Client, Listener
+
+import framework.global_resources as gr
+from framework.error_handling import ShardingError
+from framework.global_resources import UI
+from framework.prng import PRNGContext
+
+AUTHKEY_ENV_VAR = 'FUDDLY_SHARD_AUTHKEY'
+
+_CHUNK_SIZE = 1024*1024
+
+
+class Shard(object):
+    """
+    Range of test case indexes ``[start, start+count)`` of a sharded campaign.
+    """
+
+    def __init__(self, shard_id, start, count):
+        self.shard_id = shard_id
+        self.start = start
+        self.count = count
+
+    def __repr__(self):
+        return 'Shard(id={:d}, start={:d}, count={:d})'.format(self.shard_id, self.start, self.count)
+
+
+ShardReport = collections.namedtuple('ShardReport', ['shard', 'nb_sent', 'data_ids'])
+
+
+def split_range(nb, nb_shards, start=0):
+    """
+    Split the test case indexes ``[start, start+nb)`` into at most @nb_shards disjoint
+    and contiguous ranges of (almost) equal size.
+
+    Returns:
+        list: the :class:`Shard` objects, ordered by test case indexes
+    """
+    if nb < 1 or nb_shards < 1:
+        raise ValueError('the number of test cases and of shards shall be positive')
+
+    nb_shards = min(nb, nb_shards)
+    q, r = divmod(nb, nb_shards)
+    shards = []
+    for i in range(nb_shards):
+        count = q + 1 if i < r else q
+        shards.append(Shard(i, start, count))
+        start += count
+
+    return shards
+
+
+class ShardedCampaign(object):
+    """
+    Description of a campaign that can be split into disjoint shards run by distinct
+    fuddly instances.
+
+    Shards are made disjoint in one of the following ways:
+
+    - random campaign (``walk=False``): the shard ``[start, start+count)`` is run with
+      the PRNG seeded by ``set_prng_seed(seed, index=start)``, thus its test cases are
+      the ones a single fuddly instance would have produced for these indexes.
+    - model walk (``walk=True``): the parameters ``init`` and ``max_steps`` of the last
+      data maker of @actions (e.g., ``tTYPE``, ``tWALK``, ...) are set to the shard range.
+      Each shard is run with the PRNG seeded by ``set_prng_seed(seed, index=0)`` so that
+      every shard walks the same generated data.
+
+    Args:
+        project (str): name of the project to run
+        actions (list): actions as expected by :meth:`FmkPlumbing.get_data`
+        nb (int): number of test cases of the campaign
+        dm_name (str): name of the data model to load (default one of the project if ``None``)
+        tg_ids (list): target IDs to use
+        seed (int): seed of the campaign. If ``None``, a random one is chosen.
+        walk (bool): if ``True``, shard the campaign as a model walk.
+    """
+
+    def __init__(self, project, actions, nb, dm_name=None, tg_ids=None, seed=None, walk=False):
+        self.project = project
+        self.actions = list(actions)
+        self.nb = nb
+        self.dm_name = dm_name
+        self.tg_ids = tg_ids
+        self.seed = PRNGContext(seed=seed).seed
+        self.walk = walk
+
+    def split(self, nb_shards):
+        return split_range(self.nb, nb_shards)
+
+    def get_shard_actions(self, shard):
+        """
+        Return the actions to provide to :meth:`FmkPlumbing.get_data` for running @shard.
+        """
+        actions = list(self.actions)
+        if self.walk:
+            action, user_input = self._split_action(actions[-1])
+            inputs = {} if user_input is None else dict(user_input.get_inputs())
+            inputs['init'] = shard.start + 1
+            inputs['max_steps'] = shard.count
+            actions[-1] = (action, UI(**inputs))
+        return actions
+
+    @staticmethod
+    def _split_action(full_action):
+        if isinstance(full_action, (tuple, list)):
+            return full_action[0], full_action[1]
+        else:
+            return full_action, None
+
+    # UI objects cannot be pickled, thus user inputs are sent as dictionaries
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        actions = []
+        for full_action in self.actions:
+            action, user_input = self._split_action(full_action)
+            actions.append((action, None if user_input is None else user_input.get_inputs()))
+        state['actions'] = actions
+        return state
+
+    def __setstate__(self, state):
+        actions = []
+        for action, inputs in state['actions']:
+            actions.append(action if inputs is None else (action, UI(**inputs)))
+        state['actions'] = actions
+        self.__dict__.update(state)
+
+
+def run_shard(campaign, shard, fmkdb_path):
+    """
+    Run @shard of @campaign within a new fuddly instance recording into @fmkdb_path.
+
+    Returns:
+        int: the number of test cases sent
+    """
+    from framework.plumbing import FmkPlumbing
+
+    fmk = FmkPlumbing(exit_on_error=True, quiet=True, fmkdb_path=fmkdb_path)
+    fmk.start()
+    try:
+        ok = fmk.run_project(name=campaign.project, tg_ids=campaign.tg_ids,
+                             dm_name=campaign.dm_name)
+        if not ok:
+            raise ShardingError('cannot run the project {!r}'.format(campaign.project))
+
+        fmk.set_prng_seed(campaign.seed, index=0 if campaign.walk else shard.start)
+        actions = campaign.get_shard_actions(shard)
+
+        nb_sent = 0
+        while nb_sent < shard.count:
+            data = fmk.get_data(actions)
+            if data is None:
+                break
+            nb_sent += 1
+            if not fmk.send_data_and_log(data):
+                break
+    finally:
+        fmk.stop()
+
+    return nb_sent
+
+
+def run_shard_worker(address, authkey):
+    """
+    Connect to the :class:`ShardCoordinator` listening on @address, run the shard it
+    provides, then send back the outcomes and the related fmkDB.
+    """
+    conn = Client(address, authkey=authkey)
+    try:
+        msg = conn.recv()
+        if msg is None:
+            return
+        campaign, shard = msg
+
+        tmp_dir = tempfile.mkdtemp(prefix='fuddly_shard_')
+        fmkdb_path = os.path.join(tmp_dir, 'fmkDB.db')
+        try:
+            try:
+                nb_sent = run_shard(campaign, shard, fmkdb_path)
+            except Exception:
+                conn.send(('error', shard.shard_id, traceback.format_exc()))
+                return
+
+            conn.send(('done', shard.shard_id, nb_sent))
+            with open(fmkdb_path, 'rb') as f:
+                while True:
+                    chunk = f.read(_CHUNK_SIZE)
+                    conn.send_bytes(chunk)
+                    if not chunk:
+                        break
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    finally:
+        conn.close()
+
+
+class ShardCoordinator(object):
+    """
+    Split a :class:`ShardedCampaign` into shards, dispatch them to the workers connecting
+    to it (one shard per worker), and merge the fmkDB of each shard into a single one.
+
+    Workers can be spawned locally through :meth:`spawn_local_workers`, or launched on
+    other hosts with ``tools/shard_worker.py --connect HOST:PORT`` (the authentication key
+    being provided through the environment variable ``FUDDLY_SHARD_AUTHKEY``, as an
+    hexadecimal string). In the latter case, @address has to be reachable from them.
+
+    Args:
+        campaign (ShardedCampaign): the campaign to run
+        nb_shards (int): number of shards
+        address (tuple): (host, port) the coordinator will listen on. If port is 0,
+          a free one is chosen.
+        authkey (bytes): authentication key shared with the workers. If ``None``, a random
+          one is generated.
+    """
+
+    def __init__(self, campaign, nb_shards, address=('localhost', 0), authkey=None):
+        self.campaign = campaign
+        self.shards = campaign.split(nb_shards)
+        self.authkey = os.urandom(16) if authkey is None else authkey
+
+        self._listener = Listener(address, authkey=self.authkey)
+        self.address = self._listener.address
+
+        self._local_workers = []
+        self._results = {}
+        self._errors = []
+        self._lock = threading.Lock()
+        self._all_done = threading.Event()
+        self._stop_event = threading.Event()
+        self._handlers = []
+        self._accept_thread = None
+        self._tmp_dir = None
+
+    def spawn_local_workers(self, nb=None):
+        """
+        Launch @nb worker processes on this host (one per shard if ``None``).
+        """
+        nb = len(self.shards) if nb is None else nb
+        worker = os.path.join(gr.app_folder, 'tools', 'shard_worker.py')
+        env = dict(os.environ)
+        env[AUTHKEY_ENV_VAR] = binascii.hexlify(self.authkey).decode('ascii')
+        cmd = [sys.executable, worker, '--connect', '{:s}:{:d}'.format(*self.address)]
+
+        with open(os.devnull, 'w') as devnull:
+            for i in range(nb):
+                self._local_workers.append(
+                    subprocess.Popen(cmd, env=env, stdin=devnull, stdout=devnull, stderr=devnull))
+
+    def run(self, fmkdb, timeout=None):
+        """
+        Dispatch the shards, wait for their completion and merge their records into
+        @fmkdb, in the order of the shards. Thus, data IDs and group IDs follow the order
+        of the test case indexes whatever the order of completion of the shards.
+
+        Args:
+            fmkdb (Database): the fmkDB receiving the records of the shards
+            timeout (float): maximum time to wait for the completion of the shards
+
+        Returns:
+            list: a :class:`ShardReport` for each shard
+        """
+        self._tmp_dir = tempfile.mkdtemp(prefix='fuddly_shards_')
+        try:
+            self._accept_thread = threading.Thread(None, self._accept_workers, 'shard_accept')
+            self._accept_thread.start()
+
+            deadline = None if timeout is None else time.time() + timeout
+            while not self._all_done.wait(0.1):
+                if self._errors:
+                    break
+                if deadline is not None and time.time() > deadline:
+                    raise ShardingError('timeout while waiting for the shards completion')
+                for w in self._local_workers:
+                    if w.poll() not in (None, 0):
+                        raise ShardingError('a local worker exited with code {:d}'.format(w.returncode))
+
+            for h in self._handlers:
+                h.join()
+
+            if self._errors:
+                raise ShardingError('\n'.join(self._errors))
+
+            reports = []
+            for shard in self.shards:
+                nb_sent, path = self._results[shard.shard_id]
+                data_ids = fmkdb.merge_fmkdb(path)
+                reports.append(ShardReport(shard, nb_sent, data_ids))
+
+        finally:
+            self.stop()
+            shutil.rmtree(self._tmp_dir, ignore_errors=True)
+
+        return reports
+
+    def stop(self):
+        self._stop_event.set()
+        if self._accept_thread is not None and self._accept_thread.is_alive():
+            # wake up the accepting thread
+            try:
+                Client(self.address, authkey=self.authkey).close()
+            except Exception:
+                pass
+            self._accept_thread.join()
+        self._listener.close()
+
+        for w in self._local_workers:
+            if w.poll() is None:
+                w.terminate()
+            w.wait()
+        self._local_workers = []
+
+    def _accept_workers(self):
+        pending = list(self.shards)
+        while pending:
+            try:
+                conn = self._listener.accept()
+            except Exception:
+                # e.g., authentication failure
+                if self._stop_event.is_set():
+                    break
+                continue
+
+            if self._stop_event.is_set():
+                conn.close()
+                break
+
+            h = threading.Thread(None, self._handle_worker, 'shard_worker', args=(conn, pending.pop(0)))
+            self._handlers.append(h)
+            h.start()
+
+    def _handle_worker(self, conn, shard):
+        try:
+            conn.send((self.campaign, shard))
+            msg = conn.recv()
+            if msg[0] == 'error':
+                self._set_outcome(shard, error='Shard #{:d} failed:\n{:s}'.format(shard.shard_id, msg[2]))
+                return
+
+            path = os.path.join(self._tmp_dir, 'fmkDB_{:d}.db'.format(shard.shard_id))
+            with open(path, 'wb') as f:
+                while True:
+                    chunk = conn.recv_bytes()
+                    if not chunk:
+                        break
+                    f.write(chunk)
+            self._set_outcome(shard, result=(msg[2], path))
+
+        except (EOFError, IOError, OSError):
+            self._set_outcome(shard, error='Shard #{:d}: connection lost with its worker'.format(shard.shard_id))
+        finally:
+            conn.close()
+
+    def _set_outcome(self, shard, result=None, error=None):
+        with self._lock:
+            if error is not None:
+                self._errors.append(error)
+            else:
+                self._results[shard.shard_id] = result
+            if len(self._results) + len(self._errors) == len(self.shards):
+                self._all_done.set()
@@ -29,6 +29,7 @@ import collections
 from functools import partial
 
 from framework.data import *
+from framework.prng import tc_random
 from framework.global_resources import *
 import framework.scenario as sc
 
@@ -319,7 +320,7 @@ class Tactics(object):
 
     
     def __get_random_data_maker(self, dict_var, dmaker_type, total_weight, valid):
-        r = random.uniform(0, total_weight)
+        r = tc_random.uniform(0, total_weight)
         s = 0
 
         if not valid:
@@ -134,6 +134,19 @@ class Target(object):
         '''
         raise NotImplementedError
 
+    def can_send_multiple_data(self, data_list):
+        '''
+        To be overloaded by targets whose :meth:`send_multiple_data` sends every data of
+        `data_list`. Used by the framework to send the data of several tasks in one shot.
+
+        Args:
+            data_list (list): list of data to be sent
+
+        Returns:
+            bool: True if `data_list` can be sent through one call to :meth:`send_multiple_data`
+        '''
+        return False
+
 
     def is_target_ready_for_new_data(self):
         '''
@@ -175,6 +188,13 @@ class Target(object):
         '''
         return None
 
+    def get_corpus(self):
+        '''
+        If overloaded, should return the :class:`framework.coverage.Corpus` made of the
+        data that have increased the coverage of the target.
+        '''
+        return None
+
     def collect_pending_feedback(self, timeout=0):
         """
         If overloaded, it can be used by the framework to retrieve additional feedback from the
@@ -315,6 +335,9 @@ class EmptyTarget(Target):
         if self._feedback_enabled:
             self._sending_time = datetime.datetime.now()
 
+    def can_send_multiple_data(self, data_list):
+        return True
+
     def is_target_ready_for_new_data(self):
         if self._feedback_enabled and self.feedback_timeout is not None and \
                 self._sending_time is not None:
@@ -21,25 +21,91 @@
 #
 ################################################################################
 
+
+import collections
+import datetime
+import errno
 import fcntl
+import mmap
+import multiprocessing
 import os
 import random
 import select
 import signal
+import struct
 import subprocess
+import time
 
+from framework.coverage import Corpus
 from framework.global_resources import workspace_folder
 from framework.target_helpers import Target
 from framework.knowledge.feedback_collector import FeedbackCollector
 
 
 class LocalTarget(Target):
+    '''
+    Generic target class for interacting with a program running on the same
+    platform as fuddly.
+
+    By default the program is executed once for each data sent to it. If the
+    program acts as a harness that is able to process several test cases in a
+    row, the persistent mode (``persistent=True``) can be used instead: the
+    program is then launched once and kept alive across test cases, and it is
+    only relaunched after it has crashed or hung.
+
+    In persistent mode, the program is started with the environment variables
+    ``FUDDLY_CTRL_FD`` and ``FUDDLY_STATUS_FD`` which give the file descriptors
+    of two pipes implementing the following protocol:
+
+    - for each test case, fuddly writes on ``FUDDLY_CTRL_FD`` a frame made of the
+      length of the data (unsigned 32-bit little-endian integer) followed by the data;
+    - once the test case has been processed, the program writes on ``FUDDLY_STATUS_FD``
+      a signed 32-bit little-endian integer following the POSIX wait status encoding
+      (0 when everything went fine). A fork-server shim can thus directly forward
+      the status returned by ``waitpid()`` for the child that processed the data.
+
+    If the program terminates instead of answering, its own wait status is used
+    to report the problem.
+
+    When the program is executed once per test case and the data is provided through
+    a file, the parameter `delivery` specifies how this file is handled:
+
+    - ``DELIVERY_FILE``: a regular file is written within the fuddly workspace
+      for each test case;
+    - ``DELIVERY_TMPFS``: a regular file is written within a tmpfs-backed folder
+      (:attr:`tmpfs_folder`), avoiding any disk I/O;
+    - ``DELIVERY_MEMFD``: the data is written in an anonymous memory file created once
+      through ``memfd_create()`` and provided to the program as ``/dev/fd/<N>``
+      (Linux only, the file extension is lost);
+    - ``DELIVERY_MMAP``: a file is created once within the fuddly workspace,
+      memory-mapped, and then truncated and rewritten in place for each test case.
+
+    If the program has been instrumented to record its edge coverage (e.g., built with
+    ``afl-clang-fast``), a :class:`framework.coverage.CoverageMap` can be provided through
+    the parameter `coverage`. The bitmap is then shared with the program and analyzed
+    after each test case. The data that increase the coverage are added to the
+    corpus of the target (refer to :meth:`get_corpus`), and a feedback entry from
+    ``Coverage`` is reported for them. The generator ``CORPUS`` picks its seeds from
+    this corpus.
+    '''
 
     _feedback_mode = Target.FBK_WAIT_UNTIL_RECV
     supported_feedback_mode = [Target.FBK_WAIT_UNTIL_RECV]
 
+    CTRL_FD_ENV = 'FUDDLY_CTRL_FD'
+    STATUS_FD_ENV = 'FUDDLY_STATUS_FD'
+
+    DELIVERY_FILE = 1
+    DELIVERY_TMPFS = 2
+    DELIVERY_MEMFD = 3
+    DELIVERY_MMAP = 4
+
+    tmpfs_folder = '/dev/shm'
+    mmap_initial_size = 1024 * 1024
+
     def __init__(self, target_path=None, pre_args='', post_args='',
-                 tmpfile_ext='.bin', send_via_stdin=False, send_via_cmdline=False):
+                 tmpfile_ext='.bin', send_via_stdin=False, send_via_cmdline=False,
+                 persistent=False, delivery=DELIVERY_FILE, coverage=None, corpus=None):
         Target.__init__(self)
         self._suffix = '{:0>12d}'.format(random.randint(2 ** 16, 2 ** 32))
         self._app = None
@@ -47,7 +113,20 @@ class LocalTarget(Target):
         self._post_args = post_args
         self._send_via_stdin = send_via_stdin
         self._send_via_cmdline = send_via_cmdline
+        self._persistent = persistent
+        self._ctrl_fd = None
+        self._status_fd = None
+        self._delivery = delivery
+        self._memfd = None
+        self._mmap_fd = None
+        self._mmap = None
+        self._mmap_size = 0
         self._data_sent = None
+        self._current_data = None
+        self._coverage = coverage
+        if coverage is not None and corpus is None:
+            corpus = Corpus()
+        self._corpus = corpus
         self._feedback_computed = None
         self._feedback = FeedbackCollector()
         self.set_target_path(target_path)
@@ -57,7 +136,14 @@ class LocalTarget(Target):
         pre_args = self._pre_args
         post_args = self._post_args
         args = ', Args: ' + pre_args + post_args if pre_args or post_args else ''
-        return 'Program: ' + self._target_path + args
+        mode = ', Mode: persistent' if self._persistent else ''
+        if self._delivery != self.DELIVERY_FILE:
+            delivery = {self.DELIVERY_TMPFS: 'tmpfs', self.DELIVERY_MEMFD: 'memfd',
+                        self.DELIVERY_MMAP: 'mmap'}[self._delivery]
+            mode += ', Delivery: ' + delivery
+        if self._coverage is not None:
+            mode += ', Coverage: {:d} bytes'.format(self._coverage.map_size)
+        return 'Program: ' + self._target_path + args + mode
 
     def set_tmp_file_extension(self, tmpfile_ext):
         self._tmpfile_ext = tmpfile_ext
@@ -80,6 +166,17 @@ class LocalTarget(Target):
     def get_post_args(self):
         return self._post_args
 
+    def set_persistent_mode(self, persistent):
+        if not persistent:
+            self._stop_persistent_app()
+        self._persistent = persistent
+
+    def is_persistent(self):
+        return self._persistent
+
+    def get_corpus(self):
+        return self._corpus
+
     def initialize(self):
         '''
         To be overloaded if some intial setup for the target is necessary.
@@ -97,59 +194,233 @@ class LocalTarget(Target):
             print('/!\\ ERROR /!\\: the LocalTarget path has not been set')
             return False
 
+        if not self._setup_delivery():
+            return False
+
+        if self._coverage is not None:
+            try:
+                self._coverage.setup()
+            except OSError as e:
+                print('/!\\ ERROR /!\\: the coverage bitmap cannot be set up ({!s})'.format(e))
+                return False
+
         self._data_sent = False
 
         return self.initialize()
 
     def stop(self):
+        self._stop_persistent_app()
+        self._release_delivery()
+        if self._coverage is not None:
+            self._coverage.release()
         return self.terminate()
 
+    def _get_tmp_file_path(self, folder=workspace_folder):
+        return os.path.join(folder, 'fuzz_test_' + self._suffix + self._tmpfile_ext)
+
+    def _setup_delivery(self):
+        if self._delivery == self.DELIVERY_TMPFS:
+            if not os.path.isdir(self.tmpfs_folder):
+                print('/!\\ ERROR /!\\: the tmpfs folder {!s} does not exist'
+                      .format(self.tmpfs_folder))
+                return False
+
+        elif self._delivery == self.DELIVERY_MEMFD and self._memfd is None:
+            if not hasattr(os, 'memfd_create'):
+                print('/!\\ ERROR /!\\: memfd_create() is not supported on this platform')
+                return False
+            self._memfd = os.memfd_create('fuzz_test_' + self._suffix)
+
+        elif self._delivery == self.DELIVERY_MMAP and self._mmap is None:
+            self._mmap_size = self.mmap_initial_size
+            self._mmap_fd = os.open(self._get_tmp_file_path(), os.O_RDWR | os.O_CREAT, 0o644)
+            os.ftruncate(self._mmap_fd, self._mmap_size)
+            self._mmap = mmap.mmap(self._mmap_fd, self._mmap_size)
+
+        return True
+
+    def _release_delivery(self):
+        if self._memfd is not None:
+            os.close(self._memfd)
+            self._memfd = None
+        if self._mmap is not None:
+            self._mmap.close()
+            os.close(self._mmap_fd)
+            self._mmap = None
+            self._mmap_fd = None
+            self._mmap_size = 0
+
+    @staticmethod
+    def _write_all(fd, data):
+        data = memoryview(data)
+        while data:
+            written = os.write(fd, data)
+            data = data[written:]
+
+    def _write_to_mmap(self, data):
+        size = len(data)
+        if size > self._mmap_size:
+            self._mmap.close()
+            self._mmap_size = max(size, 2 * self._mmap_size)
+            os.ftruncate(self._mmap_fd, self._mmap_size)
+            self._mmap = mmap.mmap(self._mmap_fd, self._mmap_size)
+        os.ftruncate(self._mmap_fd, size)
+        self._mmap[:size] = data
+
+    def _deliver_data(self, data):
+        """
+        Make the data available to the program through a file.
+
+        Returns:
+            tuple: the path to provide to the program and the file descriptors it
+            has to inherit.
+        """
+        if self._delivery == self.DELIVERY_MEMFD:
+            os.ftruncate(self._memfd, 0)
+            os.lseek(self._memfd, 0, os.SEEK_SET)
+            self._write_all(self._memfd, data)
+            return '/dev/fd/{:d}'.format(self._memfd), (self._memfd,)
+
+        elif self._delivery == self.DELIVERY_MMAP:
+            self._write_to_mmap(data)
+            return self._get_tmp_file_path(), ()
+
+        else:
+            if self._delivery == self.DELIVERY_TMPFS:
+                name = self._get_tmp_file_path(folder=self.tmpfs_folder)
+            else:
+                name = self._get_tmp_file_path()
+            with open(name, 'wb') as f:
+                 f.write(data)
+            return name, ()
+
     def _before_sending_data(self):
         self._feedback_computed = False
 
+    def _build_cmd(self, name):
+        name = [] if name is None else [name]
+        if self._pre_args is not None and self._post_args is not None:
+            cmd = [self._target_path] + self._pre_args.split() + name + self._post_args.split()
+        elif self._pre_args is not None:
+            cmd = [self._target_path] + self._pre_args.split() + name
+        elif self._post_args is not None:
+            cmd = [self._target_path] + name + self._post_args.split()
+        else:
+            cmd = [self._target_path] + name
+        return cmd
+
+    @staticmethod
+    def _set_nonblocking(fileobj):
+        fl = fcntl.fcntl(fileobj, fcntl.F_GETFL)
+        fcntl.fcntl(fileobj, fcntl.F_SETFL, fl | os.O_NONBLOCK)
+
+    def _get_env(self):
+        if self._coverage is None:
+            return None
+        env = dict(os.environ)
+        env.update(self._coverage.get_env())
+        return env
+
     def send_data(self, data, from_fmk=False):
         self._before_sending_data()
+        self._current_data = data
         data = data.to_bytes()
 
+        if self._coverage is not None:
+            self._coverage.clear()
+
+        if self._persistent:
+            self._send_data_to_persistent_app(data)
+            self._data_sent = True
+            return
+
+        pass_fds = ()
         if self._send_via_stdin:
             name = ''
         elif self._send_via_cmdline:
             name = data
         else:
-            name = os.path.join(workspace_folder, 'fuzz_test_' + self._suffix + self._tmpfile_ext)
-            with open(name, 'wb') as f:
-                 f.write(data)
+            name, pass_fds = self._deliver_data(data)
 
-        if self._pre_args is not None and self._post_args is not None:
-            cmd = [self._target_path] + self._pre_args.split() + [name] + self._post_args.split()
-        elif self._pre_args is not None:
-            cmd = [self._target_path] + self._pre_args.split() + [name]
-        elif self._post_args is not None:
-            cmd = [self._target_path, name] + self._post_args.split()
-        else:
-            cmd = [self._target_path, name]
+        cmd = self._build_cmd(name)
 
         stdin_arg = subprocess.PIPE if self._send_via_stdin else None
         self._app = subprocess.Popen(args=cmd, stdin=stdin_arg, stdout=subprocess.PIPE,
-                                     stderr=subprocess.PIPE)
+                                     stderr=subprocess.PIPE, pass_fds=pass_fds,
+                                     env=self._get_env())
 
         if self._send_via_stdin:
             with self._app.stdin as f:
                 f.write(data)
 
         if not self._send_via_stdin and not self._send_via_cmdline:
-            fl = fcntl.fcntl(self._app.stderr, fcntl.F_GETFL)
-            fcntl.fcntl(self._app.stderr, fcntl.F_SETFL, fl | os.O_NONBLOCK)
-
-            fl = fcntl.fcntl(self._app.stdout, fcntl.F_GETFL)
-            fcntl.fcntl(self._app.stdout, fcntl.F_SETFL, fl | os.O_NONBLOCK)
+            self._set_nonblocking(self._app.stderr)
+            self._set_nonblocking(self._app.stdout)
 
         self._data_sent = True
 
+    def _launch_persistent_app(self):
+        ctrl_rfd, self._ctrl_fd = os.pipe()
+        self._status_fd, status_wfd = os.pipe()
+
+        env = self._get_env() or dict(os.environ)
+        env[self.CTRL_FD_ENV] = str(ctrl_rfd)
+        env[self.STATUS_FD_ENV] = str(status_wfd)
+
+        try:
+            self._app = subprocess.Popen(args=self._build_cmd(None), stdout=subprocess.PIPE,
+                                         stderr=subprocess.PIPE, env=env,
+                                         pass_fds=(ctrl_rfd, status_wfd))
+        except:
+            self._close_persistent_channels()
+            raise
+        finally:
+            os.close(ctrl_rfd)
+            os.close(status_wfd)
+
+        self._set_nonblocking(self._app.stderr)
+        self._set_nonblocking(self._app.stdout)
+
+    def _send_data_to_persistent_app(self, data):
+        if self._app is None or self._app.poll() is not None:
+            self._stop_persistent_app()
+            self._launch_persistent_app()
+
+        frame = struct.pack('<I', len(data)) + data
+        try:
+            self._write_all(self._ctrl_fd, frame)
+        except OSError as e:
+            if e.errno != errno.EPIPE:
+                raise
+            # the program died while reading the test case, get_feedback() will
+            # report its wait status
+
+    def _close_persistent_channels(self):
+        for fd in (self._ctrl_fd, self._status_fd):
+            if fd is not None:
+                os.close(fd)
+        self._ctrl_fd = None
+        self._status_fd = None
+
+    def _stop_persistent_app(self):
+        if self._app is not None and self._persistent:
+            if self._app.poll() is None:
+                self._app.kill()
+            self._app.wait()
+            self._app.stdout.close()
+            self._app.stderr.close()
+            self._app = None
+        self._close_persistent_channels()
+
     def cleanup(self):
         if self._app is None:
             return
 
+        if self._persistent:
+            # the program is kept alive for the next test case
+            self._data_sent = False
+            return
+
         try:
             os.kill(self._app.pid, signal.SIGTERM)
         except:
@@ -157,6 +428,127 @@ class LocalTarget(Target):
         finally:
             self._data_sent = False
 
+    def _read_status(self, timeout):
+        """
+        Wait for the status of the current test case from the persistent program.
+
+        Returns:
+            tuple: (status, alive) where status is a wait status or None if the
+            program did not answer within `timeout`, and alive is False if the
+            program has terminated.
+        """
+        status = b''
+        fd = self._status_fd
+        while len(status) < 4:
+            ret = select.select([fd], [], [], timeout)
+            if not ret[0]:
+                return None, True
+            chunk = os.read(fd, 4 - len(status))
+            if not chunk:
+                # EOF: the program has terminated or has closed its status channel
+                exit_status = self._app.poll()
+                if exit_status is None:
+                    self._app.kill()
+                    exit_status = self._app.wait()
+                if exit_status < 0:
+                    return -exit_status, False
+                else:
+                    return exit_status << 8, False
+            status += chunk
+
+        return struct.unpack('<i', status)[0], True
+
+    def _report_wait_status(self, status):
+        if os.WIFSIGNALED(status):
+            sig = os.WTERMSIG(status)
+            self._feedback.add_fbk_from("Application[{:d}]".format(self._app.pid),
+                                        "Terminated by signal {:d}".format(sig),
+                                        status=-sig)
+            return True
+        elif os.WIFEXITED(status) and os.WEXITSTATUS(status) != 0:
+            code = os.WEXITSTATUS(status)
+            self._feedback.add_fbk_from("Application[{:d}]".format(self._app.pid),
+                                        "Non-zero exit status ({:d})".format(code),
+                                        status=-code)
+            return True
+        else:
+            return False
+
+    def _get_persistent_app_feedback(self, timeout):
+        err_detected = False
+
+        status, alive = self._read_status(timeout)
+        if status is None:
+            err_detected = True
+            self._feedback.add_fbk_from("Application[{:d}]".format(self._app.pid),
+                                        "No status received before timeout (hang?)",
+                                        status=-4)
+            alive = False
+        elif self._report_wait_status(status):
+            err_detected = True
+
+        output_err, byte_string = self._read_app_output(timeout=0)
+
+        if not alive:
+            # the program will be relaunched when the next data will be sent
+            self._stop_persistent_app()
+
+        return err_detected or output_err, byte_string
+
+    def _read_app_output(self, timeout):
+        ret = select.select([self._app.stdout, self._app.stderr], [], [], timeout)
+        if ret[0]:
+            stdout_msgs = [fd.read() or b'' for fd in ret[0][:-1]]
+            return self._check_app_output(stdout_msgs, ret[0][-1].read())
+        else:
+            return False, b''
+
+    def _drain_app_output(self, timeout):
+        """
+        Read the outputs of the program until it closes them or `timeout` expires.
+        It prevents the program from blocking on a full pipe while its termination
+        is awaited.
+        """
+        outputs = collections.OrderedDict([(self._app.stdout, []), (self._app.stderr, [])])
+        pending = list(outputs.keys())
+        deadline = time.time() + timeout
+        while pending:
+            ret = select.select(pending, [], [], max(0, deadline - time.time()))
+            if not ret[0]:
+                break
+            for fd in ret[0]:
+                chunk = os.read(fd.fileno(), 65536)
+                if chunk:
+                    outputs[fd].append(chunk)
+                else:
+                    pending.remove(fd)
+
+        return [b''.join(chunks) for chunks in outputs.values()]
+
+    def _check_app_output(self, stdout_msgs, stderr_msg):
+        err_detected = False
+
+        byte_string = b''
+        for msg in stdout_msgs:
+            byte_string += msg + b'\n\n'
+
+        if b'error' in byte_string or b'invalid' in byte_string:
+            err_detected = True
+            self._feedback.add_fbk_from("LocalTarget[stdout]",
+                                         "Application outputs errors on stdout",
+                                        status=-1)
+
+        if stderr_msg:
+            err_detected = True
+            self._feedback.add_fbk_from("LocalTarget[stderr]",
+                                         "Application outputs on stderr",
+                                        status=-2)
+            byte_string += stderr_msg
+        else:
+            byte_string = byte_string[:-2]  # remove '\n\n'
+
+        return err_detected, byte_string
+
     def get_feedback(self, timeout=0.2):
         timeout = self.feedback_timeout if timeout is None else timeout
         if self._feedback_computed:
@@ -174,40 +566,206 @@ class LocalTarget(Target):
         elif self._app is None:
             return self._feedback
 
-        exit_status = self._app.poll()
-        if exit_status is not None and exit_status < 0:
-            err_detected = True
-            self._feedback.add_fbk_from("Application[{:d}]".format(self._app.pid),
-                                         "Negative return status ({:d})".format(exit_status),
-                                        status=exit_status)
-
-        ret = select.select([self._app.stdout, self._app.stderr], [], [], timeout)
-        if ret[0]:
-            byte_string = b''
-            for fd in ret[0][:-1]:
-                byte_string += fd.read() + b'\n\n'
-
-            if b'error' in byte_string or b'invalid' in byte_string:
+        if self._persistent:
+            err_detected, byte_string = self._get_persistent_app_feedback(timeout)
+        else:
+            if self._coverage is not None:
+                # the bitmap is complete only once the program has terminated, which
+                # requires its outputs to be drained first
+                deadline = time.time() + timeout
+                stdout_msg, stderr_msg = self._drain_app_output(timeout)
+                try:
+                    self._app.wait(timeout=max(0, deadline - time.time()))
+                except subprocess.TimeoutExpired:
+                    pass
+            exit_status = self._app.poll()
+            if exit_status is not None and exit_status < 0:
                 err_detected = True
-                self._feedback.add_fbk_from("LocalTarget[stdout]",
-                                             "Application outputs errors on stdout",
-                                            status=-1)
+                self._feedback.add_fbk_from("Application[{:d}]".format(self._app.pid),
+                                             "Negative return status ({:d})".format(exit_status),
+                                            status=exit_status)
 
-            stderr_msg = ret[0][-1].read()
-            if stderr_msg:
-                err_detected = True
-                self._feedback.add_fbk_from("LocalTarget[stderr]",
-                                             "Application outputs on stderr",
-                                            status=-2)
-                byte_string += stderr_msg
+            if self._coverage is not None:
+                output_err, byte_string = self._check_app_output([stdout_msg], stderr_msg)
             else:
-                byte_string = byte_string[:-2]  # remove '\n\n'
+                output_err, byte_string = self._read_app_output(timeout)
+            err_detected = err_detected or output_err
 
-        else:
-            byte_string = b''
+        if self._coverage is not None:
+            self._analyze_coverage()
 
         if err_detected:
             self._feedback.set_error_code(-1)
         self._feedback.set_bytes(byte_string)
 
-        return self._feedback
\ No newline at end of file
+        return self._feedback
+
+    def _analyze_coverage(self):
+        new_bits = self._coverage.analyze()
+        if new_bits:
+            self._corpus.add(self._current_data, new_bits)
+            self._feedback.add_fbk_from(Corpus.fbk_ref,
+                                        Corpus.fbk_template.format(new_bits,
+                                                                   self._coverage.edges_covered),
+                                        related_data=self._current_data)
+
+
+class PooledLocalTarget(LocalTarget):
+    '''
+    Generic target class that runs concurrently several instances of the same
+    program, each one with its own temporary file. Every data sent to this target
+    is dispatched to a free instance, and the feedback of each instance is attached
+    to the data it has processed.
+
+    Instances are processed concurrently only if several data are sent before
+    the feedback is retrieved, which is the case when data are sent through
+    :meth:`send_multiple_data` or when the framework works in burst mode
+    (refer to ``set_burst`` within the ``fuddly`` shell). When all instances are
+    busy, the feedback of the oldest one is retrieved before reusing it.
+
+    Any parameter of :class:`LocalTarget` can be provided (as keyword argument) and
+    applies to every instance, except `coverage` which is not supported.
+    '''
+
+    def __init__(self, nb_instances=None, **kwargs):
+        if nb_instances is None:
+            nb_instances = multiprocessing.cpu_count()
+        assert nb_instances > 0
+        assert kwargs.get('coverage') is None
+        self._instances = [LocalTarget(**kwargs) for i in range(nb_instances)]
+        LocalTarget.__init__(self, **kwargs)
+        for idx, inst in enumerate(self._instances):
+            inst._suffix = '{:s}_{:0>3d}'.format(self._suffix, idx)
+        self._free_instances = collections.deque(self._instances)
+        self._busy_instances = collections.deque()
+        self._done_instances = collections.deque()
+        self._err_detected = False
+
+    def get_description(self):
+        desc = LocalTarget.get_description(self)
+        return desc + ', Instances: {:d}'.format(len(self._instances))
+
+    def set_tmp_file_extension(self, tmpfile_ext):
+        LocalTarget.set_tmp_file_extension(self, tmpfile_ext)
+        for inst in self._instances:
+            inst.set_tmp_file_extension(tmpfile_ext)
+
+    def set_target_path(self, target_path):
+        LocalTarget.set_target_path(self, target_path)
+        for inst in self._instances:
+            inst.set_target_path(target_path)
+
+    def set_pre_args(self, pre_args):
+        LocalTarget.set_pre_args(self, pre_args)
+        for inst in self._instances:
+            inst.set_pre_args(pre_args)
+
+    def set_post_args(self, post_args):
+        LocalTarget.set_post_args(self, post_args)
+        for inst in self._instances:
+            inst.set_post_args(post_args)
+
+    def set_persistent_mode(self, persistent):
+        LocalTarget.set_persistent_mode(self, persistent)
+        for inst in self._instances:
+            inst.set_persistent_mode(persistent)
+
+    def get_instance_count(self):
+        return len(self._instances)
+
+    def start(self):
+        if not self._target_path:
+            print('/!\\ ERROR /!\\: the PooledLocalTarget path has not been set')
+            return False
+
+        for inst in self._instances:
+            if not inst.start():
+                return False
+
+        self._data_sent = False
+
+        return self.initialize()
+
+    def stop(self):
+        for inst in self._instances:
+            inst.stop()
+        self._free_instances = collections.deque(self._instances)
+        self._busy_instances.clear()
+        self._done_instances.clear()
+        return self.terminate()
+
+    def _acquire_instance(self):
+        if self._free_instances:
+            return self._free_instances.popleft()
+
+        if not self._done_instances:
+            inst, data = self._busy_instances.popleft()
+            timeout = 0.2 if self.feedback_timeout is None else self.feedback_timeout
+            self._harvest_feedback(inst, data, timeout=timeout)
+            self._done_instances.append(inst)
+
+        inst = self._done_instances.popleft()
+        inst.cleanup()
+        return inst
+
+    def send_data(self, data, from_fmk=False):
+        self._before_sending_data()
+        inst = self._acquire_instance()
+        inst.send_data(data, from_fmk=from_fmk)
+        self._busy_instances.append((inst, data))
+        self._data_sent = True
+
+    def send_multiple_data(self, data_list, from_fmk=False):
+        for data in data_list:
+            self.send_data(data, from_fmk=from_fmk)
+
+    def can_send_multiple_data(self, data_list):
+        return True
+
+    def _harvest_feedback(self, inst, data, timeout):
+        idx = self._instances.index(inst)
+        fbk = inst.get_feedback(timeout=timeout)
+        for ref, fbk_list, status, tstamps in fbk.iter_and_cleanup_collector():
+            for content in fbk_list:
+                self._feedback.add_fbk_from('#{:d} {!s}'.format(idx, ref), content,
+                                            status=status, related_data=data)
+        err_code = fbk.get_error_code()
+        raw_fbk = fbk.get_bytes()
+        if raw_fbk:
+            self._feedback.add_fbk_from('Instance #{:d}'.format(idx), raw_fbk,
+                                        status=err_code, related_data=data)
+        if err_code is not None and err_code < 0:
+            self._err_detected = True
+        fbk.cleanup()
+
+    def cleanup(self):
+        while self._busy_instances:
+            inst, data = self._busy_instances.popleft()
+            self._done_instances.append(inst)
+        while self._done_instances:
+            inst = self._done_instances.popleft()
+            inst.cleanup()
+            self._free_instances.append(inst)
+        self._data_sent = False
+
+    def get_feedback(self, timeout=0.2):
+        timeout = self.feedback_timeout if timeout is None else timeout
+        if self._feedback_computed:
+            return self._feedback
+        else:
+            self._feedback_computed = True
+
+        # instances have been launched concurrently, thus the timeout applies
+        # to all of them at once
+        deadline = datetime.datetime.now() + datetime.timedelta(seconds=timeout)
+        while self._busy_instances:
+            inst, data = self._busy_instances.popleft()
+            remaining = (deadline - datetime.datetime.now()).total_seconds()
+            self._harvest_feedback(inst, data, timeout=max(0, remaining))
+            self._done_instances.append(inst)
+
+        if self._err_detected:
+            self._feedback.set_error_code(-1)
+            self._err_detected = False
+
+        return self._feedback
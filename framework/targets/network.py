@@ -55,7 +55,7 @@ eth_hdr_desc = \
           'contents': UINT16_be(values=[0x0800])},
      ]}
 
-eth_hdr_node = NodeBuilder(add_env=True).create_graph_from_desc(eth_hdr_desc)
+eth_hdr_template = NodeBuilder(add_env=True).compile(eth_hdr_desc)
 
 
 class NetworkTarget(Target):
@@ -627,6 +627,11 @@ class NetworkTarget(Target):
 
         return key
 
+    def can_send_multiple_data(self, data_list):
+        # only one data is sent per interface
+        intfs = set(self._get_net_info_from(data) for data in data_list)
+        return len(intfs) == len(data_list)
+
     def _get_net_info_from(self, data):
         key = self._get_data_semantic_key(data)
         host = self._host[key]
@@ -928,16 +933,22 @@ class NetworkTarget(Target):
         # print('\n*** DBG: start - collect_thread {:d}'.format(thread_id))
 
         chunks = collections.OrderedDict()
-        t0 = datetime.datetime.now()
-        duration = 0
+        deadline = time.time() + fbk_timeout
         first_pass = True
-        ack_date = None
         dont_stop = True
 
+        # Feedback is received in place within a buffer per socket, preallocated to the expected
+        # feedback length if known. The boundaries of each received chunk are kept in order to
+        # separate them with a newline in the end.
+        buffers = {}
+        chunk_ends = {}
         bytes_recd = {}
         for fd in fbk_sockets:
             bytes_recd[fd] = 0
             chunks[fd] = []
+            chunk_ends[fd] = []
+            buffers[fd] = bytearray(fbk_lengths[fd] if fbk_lengths[fd] is not None
+                                    else NetworkTarget.CHUNK_SZ)
             if pre_fbk is not None and fd in pre_fbk and pre_fbk[fd] is not None:
                 chunks[fd].append(pre_fbk[fd])
 
@@ -945,8 +956,13 @@ class NetworkTarget(Target):
         has_read = False
 
         while dont_stop:
+            # When flushing, only what is already pending is retrieved. Otherwise we block until
+            # something is received or the feedback timeout expires.
+            remaining = max(deadline - time.time(), 0)
+            poll_timeout = min(remaining, 0.001) if flush_received_fbk else remaining
+
             ready_to_read = []
-            for fd, ev in epobj.poll(timeout=0.001):
+            for fd, ev in epobj.poll(timeout=poll_timeout):
                 skt = fileno2fd[fd]
                 if ev != select.EPOLLIN:
                     _check_and_handle_obsolete_socket(skt, error=ev, error_list=socket_errors)
@@ -955,47 +971,44 @@ class NetworkTarget(Target):
                     continue
                 ready_to_read.append(skt)
 
-            now = datetime.datetime.now()
-            duration = (now - t0).total_seconds()
+            timed_out = time.time() >= deadline
 
             if flush_received_fbk:
-                if not ready_to_read or duration > fbk_timeout:
+                if not ready_to_read or timed_out:
                     break
 
             if ready_to_read:
                 if first_pass:
                     first_pass = False
-                    self._register_last_ack_date(now)
+                    self._register_last_ack_date(datetime.datetime.now())
                 for s in ready_to_read:
+                    buf = buffers[s]
                     if fbk_lengths[s] is None:
                         sz = NetworkTarget.CHUNK_SZ
+                        if len(buf) - bytes_recd[s] < sz:
+                            buf.extend(bytearray(max(len(buf), sz)))
                     else:
                         sz = min(fbk_lengths[s] - bytes_recd[s], NetworkTarget.CHUNK_SZ)
 
-                    retry = 0
                     socket_timed_out = False
-                    while retry < 10:
-                        try:
-                            chunk = s.recv(sz)
-                        except socket.timeout:
-                            chunk = b''
-                            print('\n*** Socket timeout')
-                            socket_timed_out = True  # for UDP we keep the socket
-                            break
-                        except socket.error as serr:
-                            chunk = b''
-                            print('\n*** ERROR[{!s}] (while receiving): {:s}'.format(
-                                serr.errno, str(serr)))
-                            if serr.errno == socket.errno.EAGAIN:
-                                retry += 1
-                                time.sleep(2)
-                                continue
-                            else:
-                                break
-                        else:
-                            break
+                    view = memoryview(buf)[bytes_recd[s]:bytes_recd[s]+sz]
+                    try:
+                        nbytes = s.recv_into(view, sz)
+                    except socket.timeout:
+                        nbytes = 0
+                        print('\n*** Socket timeout')
+                        socket_timed_out = True  # for UDP we keep the socket
+                    except socket.error as serr:
+                        nbytes = 0
+                        print('\n*** ERROR[{!s}] (while receiving): {:s}'.format(
+                            serr.errno, str(serr)))
+                        if serr.errno == socket.errno.EAGAIN:
+                            # spurious wake-up, we wait for the next event
+                            continue
+                    finally:
+                        view.release()
 
-                    if chunk == b'':
+                    if nbytes == 0:
                         print('\n*** NOTE: Nothing more to receive from: {!r}'.format(fbk_ids[s]))
                         fbk_sockets.remove(s)
                         _check_and_handle_obsolete_socket(s)
@@ -1003,8 +1016,8 @@ class NetworkTarget(Target):
                             s.close()
                         continue
                     else:
-                        bytes_recd[s] = bytes_recd[s] + len(chunk)
-                        chunks[s].append(chunk)
+                        bytes_recd[s] = bytes_recd[s] + nbytes
+                        chunk_ends[s].append(bytes_recd[s])
 
                 has_read = True
 
@@ -1024,13 +1037,18 @@ class NetworkTarget(Target):
                 else:
                     dont_stop = False
 
-                if duration > fbk_timeout or \
-                        (has_read and not self.fbk_wait_full_time_slot_mode):
+                if timed_out or (has_read and not self.fbk_wait_full_time_slot_mode):
                     dont_stop = False
 
             else:
                 dont_stop = False
 
+        for s, chks in chunks.items():
+            start = 0
+            for end in chunk_ends[s]:
+                chks.append(buffers[s][start:end])
+                start = end
+
         for s, chks in chunks.items():
             fbk = b'\n'.join(chks)
             with self._fbk_handling_lock:
@@ -1205,7 +1223,7 @@ class NetworkTarget(Target):
                 mac_dst = self._mac_dst[(host,port)]
 
                 if self._add_eth_header[(host,port)]:
-                    eth_hdr = eth_hdr_node.get_clone()
+                    eth_hdr = eth_hdr_template.instantiate()
                     eth_hdr[self._mac_src_semantic] = mac_src
                     eth_hdr[self._mac_dst_semantic] = mac_dst
 
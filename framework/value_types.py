@@ -23,6 +23,7 @@
 
 from __future__ import print_function
 
+import array
 import struct
 import random
 import sys
@@ -35,6 +36,7 @@ import string
 import re
 import zlib
 import codecs
+import weakref
 
 if sys.version_info[0] > 2:
     # python3
@@ -46,6 +48,7 @@ else:
     CHR_compat = unichr
 
 import framework.basic_primitives as bp
+from framework.prng import tc_random
 from framework.encoders import *
 from framework.error_handling import *
 from framework.global_resources import *
@@ -182,6 +185,46 @@ class VT_Alt(VT):
         return self._specific_fuzzy_vals
 
 
+class RepeatPattern(object):
+    """
+    Lazy description of a test case made of a base value (possibly truncated)
+    followed by a repeated pattern. It is used by :class:`String` in fuzz mode
+    so that large test cases are only materialized when they are drawn.
+    """
+
+    __slots__ = ('base', 'base_sz', 'pattern', 'count')
+
+    def __init__(self, base, pattern=b'', count=1, base_sz=None):
+        self.base = base
+        self.base_sz = base_sz
+        self.pattern = pattern
+        self.count = count
+
+    def to_bytes(self):
+        base = self.base if self.base_sz is None else self.base[:self.base_sz]
+        return base + self.pattern * self.count
+
+    def __len__(self):
+        base_len = len(self.base) if self.base_sz is None else len(self.base[:self.base_sz])
+        return base_len + len(self.pattern) * self.count
+
+    def _key(self):
+        return self.base, self.base_sz, self.pattern, self.count
+
+    def __eq__(self, other):
+        return isinstance(other, RepeatPattern) and self._key() == other._key()
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __repr__(self):
+        return 'RepeatPattern({!r}, {!r}, {!r}, base_sz={!r})'.format(self.base, self.pattern,
+                                                                      self.count, self.base_sz)
+
+
 class String(VT_Alt):
     """
     Value type that represents a character string.
@@ -189,12 +232,20 @@ class String(VT_Alt):
     Attributes:
         encoded_string (bool): shall be set to True by any subclass that deals
           with encoding
+        encoding_cache_size (int): maximum number of encoded (and decoded) values kept
+          in the LRU cache shared by all the instances of a subclass that deals with encoding.
+          The cache is keyed by the encoding argument and the value, thus it shall be
+          set to 0 by subclasses whose encoding does not only depend on them.
         subclass_fuzzing_list (list): attribute to be added by subclasses that provide
           specific test cases.
     """
 
     DEFAULT_MAX_SZ = 10000
+    LAZY_FUZZ_CASE_MIN_SZ = 256  # fuzz cases at least this large are described by RepeatPattern
     encoded_string = False
+    encoding_cache_size = 256
+
+    _encoding_caches = weakref.WeakKeyDictionary()  # String subclass -> (encoding cache, decoding cache)
 
     ctrl_char_set = ''.join([chr(i) for i in range(0, 0x20)])+'\x7f'
     printable_char_set = ''.join([chr(i) for i in range(0x20, 0x7F)])
@@ -239,6 +290,56 @@ class String(VT_Alt):
         """
         return
 
+    def _get_encoding_cache(self, idx):
+        caches = String._encoding_caches.get(self.__class__)
+        if caches is None:
+            caches = (collections.OrderedDict(), collections.OrderedDict())
+            String._encoding_caches[self.__class__] = caches
+        return caches[idx]
+
+    def _set_encoding_cache_arg(self):
+        arg = self.encoding_arg
+        try:
+            hash(arg)
+        except TypeError:
+            arg = repr(arg)
+        self._encoding_cache_arg = arg
+
+    def _cached_coding(self, func, cache_idx, val):
+        if not self.encoded_string or self.encoding_cache_size <= 0:
+            return func(val)
+
+        cache = self._get_encoding_cache(cache_idx)
+        key = (self._encoding_cache_arg, val)
+        try:
+            ret = cache.pop(key)
+        except KeyError:
+            ret = func(val)
+            if len(cache) >= self.encoding_cache_size:
+                try:
+                    cache.popitem(last=False)
+                except KeyError:
+                    pass
+        except TypeError:
+            # unhashable value
+            return func(val)
+        cache[key] = ret
+        return ret
+
+    def _encode(self, val):
+        return self._cached_coding(self.encode, 0, val)
+
+    def _encode_drawn_val(self):
+        cached = self._drawn_val_enc
+        if cached is not None and cached[0] is self.drawn_val:
+            return cached[1]
+        enc_val = self._encode(self.drawn_val)
+        self._drawn_val_enc = (self.drawn_val, enc_val)
+        return enc_val
+
+    def _decode(self, val):
+        return self._cached_coding(self.decode, 1, val)
+
     def encoding_test_cases(self, current_val, max_sz, min_sz, min_encoded__sz, max_encoded_sz):
         """
         To be optionally overloaded by a subclass that deals with encoding
@@ -262,9 +363,25 @@ class String(VT_Alt):
         else:
             return VT_Alt.__repr__(self)
 
+    @staticmethod
+    def _fuzz_case(base, pattern=b'', count=1, base_sz=None):
+        """
+        Build a fuzz case made of `base` (truncated to `base_sz` if provided)
+        followed by `pattern` repeated `count` times. Large fuzz cases are returned
+        as a :class:`RepeatPattern` that will be materialized only when drawn.
+        """
+        count = builtins.max(count, 0)
+        case = RepeatPattern(base, pattern, count, base_sz=base_sz)
+        if len(case) >= String.LAZY_FUZZ_CASE_MIN_SZ:
+            return case
+        else:
+            return case.to_bytes()
+
     def _str2bytes(self, val):
         if val is None:
             return b''
+        elif isinstance(val, RepeatPattern):
+            b = val
         elif isinstance(val, (list, tuple)):
             b = []
             for v in val:
@@ -340,6 +457,7 @@ class String(VT_Alt):
         VT_Alt.__init__(self)
 
         self.drawn_val = None
+        self._drawn_val_enc = None
 
         self.values = None
         self.values_copy = None
@@ -356,6 +474,7 @@ class String(VT_Alt):
             if not hasattr(self, 'encoding_arg'):
                 self.encoding_arg = encoding_arg
             self.init_encoding_scheme(self.encoding_arg)
+            self._set_encoding_cache_arg()
 
         self.set_description(values=values, size=size, min_sz=min_sz,
                              max_sz=max_sz, determinist=determinist, codec=codec,
@@ -395,7 +514,7 @@ class String(VT_Alt):
         # If no such constraints are provided, we assume off==0
         # and let do_absorb() decide if it's OK (via size constraints
         # for instance).
-        blob_dec = self.decode(blob)
+        blob_dec = self._decode(blob)
         if constraints[AbsCsts.Contents] and self.is_values_provided and self.alphabet is None:
             for v in self.values:
                 if blob_dec.startswith(v):
@@ -403,7 +522,7 @@ class String(VT_Alt):
             else:
                 for v in self.values:
                     if self.encoded_string:
-                        v = self.encode(v)
+                        v = self._encode(v)
                     off = blob.find(v)
                     if off > -1:
                         size = len(v)
@@ -420,7 +539,7 @@ class String(VT_Alt):
                 sup_sz = len(blob)+1
                 off = sup_sz
                 for l in alp:
-                    l = self.encode(self._str2bytes(l))
+                    l = self._encode(self._str2bytes(l))
                     new_off = blob.find(l)
                     if new_off < off and new_off > -1:
                         off = new_off
@@ -430,7 +549,7 @@ class String(VT_Alt):
         elif constraints[AbsCsts.Regexp] and self.regexp is not None:
             g = re.search(self.regexp, self._bytes2str(blob_dec), re.S)
             if g is not None:
-                pattern_enc = self.encode(self._str2bytes(g.group(0)))
+                pattern_enc = self._encode(self._str2bytes(g.group(0)))
                 off = blob.find(pattern_enc)
                 size = len(pattern_enc)
             else:
@@ -469,7 +588,7 @@ class String(VT_Alt):
             # if encoded string, val is returned decoded
             val = self._read_value_from(blob[off:sz+off], constraints)
 
-            val_enc_sz = len(self.encode(val)) # maybe different from sz if blob is smaller
+            val_enc_sz = len(self._encode(val)) # maybe different from sz if blob is smaller
             if val_enc_sz < self.min_encoded_sz:
                 raise ValueError('min_encoded_sz constraint not respected!')
             if not self.encoded_string:
@@ -494,7 +613,7 @@ class String(VT_Alt):
             val, val_sz = self._check_alphabet(val, constraints)
 
         if self.encoded_string:
-            val_enc = self.encode(val)
+            val_enc = self._encode(val)
             val_enc_sz = len(val_enc)
 
         # If we reach this point that means that val is accepted. Thus
@@ -579,7 +698,7 @@ class String(VT_Alt):
 
     def _read_value_from(self, blob, constraints):
         if self.encoded_string:
-            blob = self.decode(blob)
+            blob = self._decode(blob)
         if constraints[AbsCsts.Regexp]:
             g = re.match(self.regexp, self._bytes2str(blob), re.S)
             if g is None:
@@ -595,6 +714,7 @@ class String(VT_Alt):
         if self.encoded_string:
             self.encoding_arg = copy.copy(self.encoding_arg)
             self.init_encoding_scheme(self.encoding_arg)
+            self._set_encoding_cache_arg()
 
     def rewind(self):
         sz_vlist_copy = len(self.values_copy)
@@ -723,7 +843,10 @@ class String(VT_Alt):
     def _check_compliance(self, value, force_max_enc_sz, force_min_enc_sz, update_list=True):
         if self.encoded_string:
             try:
-                enc_val = self.encode(value)
+                if isinstance(value, RepeatPattern):
+                    enc_val = self._encode(value.to_bytes())
+                else:
+                    enc_val = self._encode(value)
             except:
                 return False
             val_sz = len(enc_val)
@@ -806,10 +929,16 @@ class String(VT_Alt):
 
     def _enable_fuzz_mode(self, fuzz_magnitude=1.0):
         self.values_fuzzy = []
+        fuzzy_set = set()
+
+        def append_to_fuzz_list(flist):
+            fuzzy_set.update(flist)
+            self.values_fuzzy.extend(flist)
 
         def add_to_fuzz_list(flist):
             for v in flist:
-                if v not in self.values_fuzzy:
+                if v not in fuzzy_set:
+                    fuzzy_set.add(v)
                     self.values_fuzzy.append(v)
 
         if self.knowledge_source is None \
@@ -832,32 +961,34 @@ class String(VT_Alt):
             if self.determinist:
                 orig_val = self.values_copy[0]
             else:
-                orig_val = random.choice(self.values_copy)
+                orig_val = tc_random.choice(self.values_copy)
+            if isinstance(orig_val, RepeatPattern):
+                orig_val = orig_val.to_bytes()
 
         sz = len(orig_val)
         sz_delta_with_max = self.max_encoded_sz - sz
 
         if sz > 0:
             val = bp.corrupt_bits(orig_val, n=1)
-            self.values_fuzzy.append(val)
+            append_to_fuzz_list([val])
 
-        val = orig_val + b"A"*(sz_delta_with_max + 1)
-        self.values_fuzzy.append(val)
+        val = self._fuzz_case(orig_val, b"A", sz_delta_with_max + 1)
+        append_to_fuzz_list([val])
 
-        if len(self.encode(orig_val)) > 0:
-            self.values_fuzzy.append(b'')
+        if len(self._encode(orig_val)) > 0:
+            append_to_fuzz_list([b''])
 
         if sz > 0:
             sz_delta_with_min = sz - self.min_sz
-            val = orig_val[:-sz_delta_with_min-1]
-            if val != b'':
-                self.values_fuzzy.append(val)
+            val = self._fuzz_case(orig_val, base_sz=-sz_delta_with_min-1)
+            if len(val) > 0:
+                append_to_fuzz_list([val])
 
         if self.max_sz > 0:
-            val = orig_val + b"X"*(self.max_sz*int(100*fuzz_magnitude))
-            self.values_fuzzy.append(val)
+            val = self._fuzz_case(orig_val, b"X", self.max_sz*int(100*fuzz_magnitude))
+            append_to_fuzz_list([val])
 
-        self.values_fuzzy.append(b'\x00' * sz if sz > 0 else b'\x00')
+        append_to_fuzz_list([self._fuzz_case(b'', b'\x00', sz) if sz > 0 else b'\x00'])
 
         if self.alphabet is not None and sz > 0:
             if self.codec == self.ASCII:
@@ -867,16 +998,16 @@ class String(VT_Alt):
 
             unsupported_chars = base_char_set - set(self._bytes2str(self.alphabet))
             if unsupported_chars:
-                sample = random.sample(unsupported_chars, 1)[0]
-                test_case = orig_val[:-1] + sample.encode(self.codec)
-                self.values_fuzzy.append(test_case)
+                sample = tc_random.sample(sorted(unsupported_chars), 1)[0]
+                test_case = self._fuzz_case(orig_val, sample.encode(self.codec), base_sz=-1)
+                append_to_fuzz_list([test_case])
 
-        self.values_fuzzy += String.fuzz_cases_ctrl_chars(self.knowledge_source, orig_val, sz,
-                                                          self.max_sz, self.codec)
-        self.values_fuzzy += String.fuzz_cases_c_strings(self.knowledge_source, orig_val, sz,
-                                                         fuzz_magnitude)
+        append_to_fuzz_list(String.fuzz_cases_ctrl_chars(self.knowledge_source, orig_val, sz,
+                                                         self.max_sz, self.codec))
+        append_to_fuzz_list(String.fuzz_cases_c_strings(self.knowledge_source, orig_val, sz,
+                                                        fuzz_magnitude))
 
-        self.values_fuzzy.append(orig_val + b'\r\n' * int(100*fuzz_magnitude))
+        append_to_fuzz_list([self._fuzz_case(orig_val, b'\r\n', int(100*fuzz_magnitude))])
 
         if self.codec == self.ASCII:
             val = bytearray(orig_val)
@@ -885,21 +1016,19 @@ class String(VT_Alt):
                 val = bytes(val)
             else:
                 val = b'\xe9'
-            if val not in self.values_fuzzy:
-                self.values_fuzzy.append(val)
+            add_to_fuzz_list([val])
         elif self.codec == self.UTF16BE or self.codec == self.UTF16LE:
             if self.max_sz > 0:
                 if self.max_encoded_sz % 2 == 1:
                     nb = self.max_sz // 2
                     # euro character at the end that 'fully' use the 2 bytes of utf-16
                     val = ('A' * nb).encode(self.codec) + b'\xac\x20'
-                    if val not in self.values_fuzzy:
-                        self.values_fuzzy.append(val)
+                    add_to_fuzz_list([val])
 
         enc_cases = self.encoding_test_cases(orig_val, self.max_sz, self.min_sz,
                                              self.min_encoded_sz, self.max_encoded_sz)
         if enc_cases:
-            self.values_fuzzy += enc_cases
+            append_to_fuzz_list(enc_cases)
 
         specif = self.get_specific_fuzzy_vals()
         if specif:
@@ -925,19 +1054,20 @@ class String(VT_Alt):
                 is_even = sz % 2 == 0
                 cpt = sz // 2
                 if is_even:
-                    fuzzy_values.append(b'%n' * cpt)
-                    fuzzy_values.append(b'%s' * cpt)
+                    fuzzy_values.append(String._fuzz_case(b'', b'%n', cpt))
+                    fuzzy_values.append(String._fuzz_case(b'', b'%s', cpt))
                 else:
-                    fuzzy_values.append(orig_val[:1] + b'%n' * cpt)
-                    fuzzy_values.append(orig_val[:1] + b'%s' * cpt)
+                    fuzzy_values.append(String._fuzz_case(orig_val, b'%n', cpt, base_sz=1))
+                    fuzzy_values.append(String._fuzz_case(orig_val, b'%s', cpt, base_sz=1))
             else:
                 fuzzy_values.append(b'%n')
                 fuzzy_values.append(b'%s')
 
-            fuzzy_values.append(orig_val + b'%n' * int(400*fuzz_magnitude))
-            fuzzy_values.append(orig_val + b'%s' * int(400*fuzz_magnitude))
-            fuzzy_values.append(orig_val + b'\"%n\"' * int(400*fuzz_magnitude))
-            fuzzy_values.append(orig_val + b'\"%s\"' * int(400*fuzz_magnitude))
+            nb = int(400*fuzz_magnitude)
+            fuzzy_values.append(String._fuzz_case(orig_val, b'%n', nb))
+            fuzzy_values.append(String._fuzz_case(orig_val, b'%s', nb))
+            fuzzy_values.append(String._fuzz_case(orig_val, b'\"%n\"', nb))
+            fuzzy_values.append(String._fuzz_case(orig_val, b'\"%s\"', nb))
 
             return fuzzy_values
 
@@ -954,15 +1084,15 @@ class String(VT_Alt):
             fuzzy_values = []
 
             if sz > 0:
-                fuzzy_values.append(b'\x08'*max_sz) # backspace characters
+                fuzzy_values.append(String._fuzz_case(b'', b'\x08', max_sz)) # backspace characters
             if sz == max_sz:
                 # also include fixed size string i.e., self.min_sz == self.max_sz
                 for c in String.ctrl_char_set:
-                    test_case = orig_val[:-1]+c.encode(codec)
+                    test_case = String._fuzz_case(orig_val, c.encode(codec), base_sz=-1)
                     fuzzy_values.append(test_case)
             else:
                 for c in String.ctrl_char_set:
-                    test_case = orig_val+c.encode(codec)
+                    test_case = String._fuzz_case(orig_val, c.encode(codec))
                     fuzzy_values.append(test_case)
 
             return fuzzy_values
@@ -980,12 +1110,14 @@ class String(VT_Alt):
         if self.determinist:
             ret = self.values_copy.pop(0)
         else:
-            ret = random.choice(self.values_copy)
+            ret = tc_random.choice(self.values_copy)
             self.values_copy.remove(ret)
 
+        if isinstance(ret, RepeatPattern):
+            ret = ret.to_bytes()
         self.drawn_val = ret
         if self.encoded_string:
-            ret = self.encode(ret)
+            ret = self._encode_drawn_val()
         return ret
 
     def get_current_raw_val(self, str_form=False):
@@ -997,7 +1129,7 @@ class String(VT_Alt):
     def get_current_value(self):
         if self.drawn_val is None:
             self.get_value()
-        return self.encode(self.drawn_val) if self.encoded_string else self.drawn_val
+        return self._encode_drawn_val() if self.encoded_string else self.drawn_val
 
     def is_exhausted(self):
         if self.values_copy:
@@ -1064,9 +1196,14 @@ class INT(VT):
     value_space_size = None
     size = None
 
+    ARRAY_STORAGE_THRESHOLD = 256  # value lists of at least this length are stored within an array
+
     def __init__(self, values=None, min=None, max=None, default=None, determinist=True,
                  force_mode=False, fuzz_mode=False, values_desc=None):
         self.idx = 0
+        self._cursor = 0
+        self._order = None
+        self._pending_val = None
         self.determinist = determinist
         self.exhausted = False
         self.drawn_val = None
@@ -1100,12 +1237,11 @@ class INT(VT):
                     if not self.is_compatible(v):
                         raise DataModelDefinitionError("Incompatible value ({!r}) with {!s}".format(v, self.__class__))
 
-            self.values = list(values)
+            self.values = self._values_storage(values)
             if default is not None:
                 assert default in self.values
                 self.values.remove(default)
                 self.values.insert(0, default)
-            self.values_copy = list(self.values)
 
         else:
             if min is not None and max is not None:
@@ -1122,11 +1258,9 @@ class INT(VT):
                     self.values.insert(0, default)
                     # Once inserted at this place, its position is preserved, especially with reset_state()
                     # (assuming do_absorb() is not called), so we do not save 'default' value in this case
-                self.values_copy = copy.copy(self.values)
 
             else:
                 self.values = None
-                self.values_copy = None
                 if self.mini is not None:
                     self.mini = builtins.max(min, self.mini) if min is not None else self.mini
                     self.mini_gen = self.mini
@@ -1154,15 +1288,81 @@ class INT(VT):
                     self.default = default
                     self.idx = default - self.mini_gen
 
+    def _values_storage(self, values):
+        """
+        Large value lists are stored within an array (when their values fit in 64 bits)
+        to reduce their memory footprint. The array is unsigned for unsigned INT subclasses.
+        """
+        if len(values) >= INT.ARRAY_STORAGE_THRESHOLD:
+            mini = self.__class__.mini
+            typecode = 'Q' if mini is not None and mini >= 0 else 'q'
+            try:
+                return array.array(typecode, values)
+            except (OverflowError, TypeError, ValueError):
+                pass
+        return list(values)
+
+    def _insert_value(self, idx, val):
+        try:
+            self.values.insert(idx, val)
+        except OverflowError:
+            # the value does not fit in the array
+            self.values = list(self.values)
+            self.values.insert(idx, val)
+
+    @staticmethod
+    def _find_value_gaps(sorted_values):
+        """
+        Find the lowest and the highest integers missing from the range covered by
+        `sorted_values`, through bisection (thus without depending on the range width).
+
+        Args:
+            sorted_values: sorted sequence of distinct integers
+
+        Returns:
+            tuple: the lowest and the highest missing integers, or None if there is no gap.
+        """
+        nb = len(sorted_values)
+        first, last = sorted_values[0], sorted_values[-1]
+        if last - first + 1 == nb:
+            return None
+
+        # lowest index i such that sorted_values[i] - first > i
+        lo, hi = 0, nb - 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if sorted_values[mid] - first > mid:
+                hi = mid
+            else:
+                lo = mid + 1
+        low_gap = first + lo
+
+        # highest index j such that last - sorted_values[j] > nb - 1 - j
+        lo, hi = 0, nb - 1
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if last - sorted_values[mid] > nb - 1 - mid:
+                lo = mid
+            else:
+                hi = mid - 1
+        high_gap = last - (nb - 1 - lo)
+
+        return low_gap, high_gap
+
+    def _reset_cursor(self):
+        self._cursor = 0
+        self._order = None
+        self._pending_val = None
+
     def make_private(self, forget_current_state):
         # no need to copy self.default (that should not be modified)
         if forget_current_state:
-            self.values_copy = copy.copy(self.values)
+            self._reset_cursor()
             self.idx = 0
             self.exhausted = False
             self.drawn_val = None
         else:
-            self.values_copy = copy.copy(self.values_copy)
+            self._order = copy.copy(self._order)
 
     def copy_attrs_from(self, vt):
         self.endian = vt.endian
@@ -1181,14 +1381,13 @@ class INT(VT):
                 supp_list.append(val-1)
 
             if self.values is not None:
-                orig_set = set(self.values)
-                max_oset = max(orig_set)
-                min_oset = min(orig_set)
+                sorted_values = sorted(set(self.values))
+                max_oset = sorted_values[-1]
+                min_oset = sorted_values[0]
                 if min_oset != max_oset:
-                    diff_sorted = sorted(set(range(min_oset, max_oset+1)) - orig_set)
-                    if diff_sorted:
-                        item1 = diff_sorted[0]
-                        item2 = diff_sorted[-1]
+                    gaps = self._find_value_gaps(sorted_values)
+                    if gaps:
+                        item1, item2 = gaps
                         if item1 not in supp_list:
                             supp_list.append(item1)
                         if item2 not in supp_list:
@@ -1259,8 +1458,8 @@ class INT(VT):
 
     def do_absorb(self, blob, constraints, off=0, size=None):
 
-        self.orig_values = copy.copy(self.values)
-        self.orig_values_copy = copy.copy(self.values_copy)
+        self.orig_values = self.values
+        self.orig_cursor = (self._cursor, self._order, self._pending_val)
         self.orig_drawn_val = self.drawn_val
 
         blob = blob[off:]
@@ -1272,13 +1471,15 @@ class INT(VT):
             if constraints[AbsCsts.Contents]:
                 if orig_val not in self.values:
                     raise ValueError('contents not valid!')
-            self.values.insert(0, orig_val)
-            self.values_copy = copy.copy(self.values)
+            # the list is copied as it may be shared with other nodes
+            self.values = copy.copy(self.values)
+            self._insert_value(0, orig_val)
+            self._reset_cursor()
         elif self.maxi is None and self.mini is None:
             # this case means 'self' is an unlimited INT (like INT_str subclass) where no constraints
             # have been provided to the constructor, like INT_str().
             self.values = [orig_val]
-            self.values_copy = [orig_val]
+            self._reset_cursor()
         else:
             if constraints[AbsCsts.Contents]:
                 if self.maxi is not None and orig_val > self.maxi:
@@ -1313,13 +1514,13 @@ class INT(VT):
         '''
         if hasattr(self, 'orig_drawn_val'):
             self.values = self.orig_values
-            self.values_copy = self.orig_values_copy
+            self._cursor, self._order, self._pending_val = self.orig_cursor
             self.drawn_val = self.orig_drawn_val
 
     def do_cleanup_absorb(self):
         if hasattr(self, 'orig_drawn_val'):
             del self.orig_values
-            del self.orig_values_copy
+            del self.orig_cursor
             del self.orig_drawn_val
 
     def make_determinist(self):
@@ -1352,8 +1553,8 @@ class INT(VT):
         if self.values:
             l = list(filter(self.is_compatible, new_list))
             if l:
-                self.values = l
-                self.values_copy = copy.copy(self.values)
+                self.values = self._values_storage(l)
+                self._reset_cursor()
                 self.idx = 0
                 ret = True
 
@@ -1378,8 +1579,9 @@ class INT(VT):
                     if self._convert_value(v) not in values_enc:
                         self.values.insert(0, v)
 
+                self.values = self._values_storage(self.values)
                 self.idx = 0
-                self.values_copy = copy.copy(self.values)
+                self._reset_cursor()
 
 
     def remove_value_list(self, value_list):
@@ -1397,24 +1599,46 @@ class INT(VT):
                     except ValueError:
                         pass
 
+                self.values = self._values_storage(self.values)
                 self.idx = 0
-                self.values_copy = copy.copy(self.values)
+                self._reset_cursor()
+
+    def _draw_from_values(self):
+        """
+        Draw the next value from self.values without replacement. The values not drawn
+        yet are referenced by the indexes self._order[self._cursor:] (or simply by the
+        positions self._cursor and beyond, as long as no random draw has been performed),
+        which avoids copying or mutating any list.
+        """
+        nb_values = len(self.values)
+        if self._cursor >= nb_values:
+            self._cursor = 0
+            self._order = None
+
+        if self.determinist:
+            pos = self._cursor if self._order is None else self._order[self._cursor]
+        else:
+            if self._order is None:
+                self._order = array.array('L', range(nb_values))
+            order = self._order
+            k = tc_random.randrange(self._cursor, nb_values)
+            order[k], order[self._cursor] = order[self._cursor], order[k]
+            pos = order[self._cursor]
+
+        self._cursor += 1
+        self.exhausted = self._cursor >= nb_values
+
+        return self.values[pos]
 
     def get_value(self):
         if self.values is not None:
-            if not self.values_copy:
-                self.values_copy = copy.copy(self.values)
-
-            if self.determinist:
-                val = self.values_copy.pop(0)
-            else:
-                val = random.choice(self.values_copy)
-                self.values_copy.remove(val)
-            if not self.values_copy:
-                self.values_copy = copy.copy(self.values)
-                self.exhausted = True
-            else:
+            if self._pending_val is not None:
+                # value provided again further to a rewind()
+                val = self._pending_val
+                self._pending_val = None
                 self.exhausted = False
+            else:
+                val = self._draw_from_values()
         else:
             if self.determinist:
                 val = self.mini_gen + self.idx
@@ -1430,7 +1654,7 @@ class INT(VT):
                 # 'values'. It avoids cunsuming too much memory and
                 # provide an end result that seems sufficient for such
                 # situation
-                val = random.randint(self.mini_gen, self.maxi_gen)
+                val = tc_random.randint(self.mini_gen, self.maxi_gen)
                 self.idx += 1
                 if self.idx > abs(self.maxi_gen - self.mini_gen):
                     self.idx = 0
@@ -1472,8 +1696,8 @@ class INT(VT):
             self.exhausted = False
 
         if self.values is not None:
-            if self.values_copy is not None and self.drawn_val is not None:
-                self.values_copy.insert(0, self.drawn_val)
+            if self.drawn_val is not None:
+                self._pending_val = self.drawn_val
         else:
             if self.idx > 0:
                 self.idx -= 1
@@ -1509,8 +1733,7 @@ class INT(VT):
             self.idx = self.default - self.mini_gen
         else:
             self.idx = 0
-        if self.values is not None:
-            self.values_copy = copy.copy(self.values)
+        self._reset_cursor()
         self.exhausted = False
         self.drawn_val = None
 
@@ -1521,8 +1744,10 @@ class INT(VT):
                 val = self.__class__.maxi
                 ok = False
             if self.values is not None:
-                self.values.append(val)
-                self.values_copy = copy.copy(self.values)
+                # the list is copied as it may be shared with other nodes
+                self.values = copy.copy(self.values)
+                self._insert_value(len(self.values), val)
+                self._reset_cursor()
             else:
                 self.idx = val - self.mini_gen
         else:
@@ -1797,6 +2022,9 @@ class BitField(VT_Alt):
         self.current_idx = None
         self.idx = None
         self.idx_inuse = None
+        self.subfield_shifts = None
+        self.subfield_masks = None
+        self._packed_others = None
         self.set_bitfield(sf_values=subfield_values, sf_val_extremums=subfield_val_extremums,
                           sf_limits=subfield_limits, sf_sizes=subfield_sizes,
                           sf_descs=subfield_descs, sf_defaults=defaults)
@@ -1833,6 +2061,7 @@ class BitField(VT_Alt):
 
     def _reset_idx(self, reset_idx_inuse=True):
         self.current_idx = 0
+        self._packed_others = None
         self.idx = [1 for i in self.subfield_limits]
         if not self._fuzzy_mode:
             self.idx[0] = 0
@@ -1866,6 +2095,7 @@ class BitField(VT_Alt):
             self.subfield_vals[idx].insert(self.idx[idx], val)
             self.idx_inuse[idx] = self.idx[idx]
 
+        self._packed_others = None
         self.current_val_update_pending = True
 
 
@@ -1973,6 +2203,16 @@ class BitField(VT_Alt):
             self.subfield_fuzzy_vals.append(None)
             prev_lim = lim
 
+        self._compute_subfield_layout()
+
+    def _compute_subfield_layout(self):
+        '''
+        Precompute for each subfield its offset and its mask within the packed value
+        (padding excluded).
+        '''
+        self.subfield_shifts = [0] + self.subfield_limits[:-1]
+        self.subfield_masks = [(1 << sz) - 1 for sz in self.subfield_sizes]
+        self._packed_others = None
 
     @property
     def bit_length(self):
@@ -2076,6 +2316,8 @@ class BitField(VT_Alt):
         else:
             self.padding_size = 8 - (self.size % 8)
 
+        self._compute_subfield_layout()
+
     def extend_right(self, bitfield):
         self.extend(bitfield, rightside=True)
 
@@ -2290,7 +2532,8 @@ class BitField(VT_Alt):
             pass
 
         self.drawn_val = None
-        
+        self._packed_others = None
+
         if self.exhausted:
             self.exhausted = False
             self.exhaustion_cpt = 0
@@ -2381,12 +2624,10 @@ class BitField(VT_Alt):
 
         insert_idx = 0
         first_pass = True
-        limits = self.subfield_limits[:-1]
-        limits.insert(0, 0)
-        for lim, sz, values, extrems, i in zip(limits, self.subfield_sizes, self.subfield_vals,
-                                               self.subfield_extrems, range(len(self.subfield_limits))):
+        for shift, mask, values, extrems, i in zip(self.subfield_shifts, self.subfield_masks, self.subfield_vals,
+                                                   self.subfield_extrems, range(len(self.subfield_limits))):
 
-            val = (orig_val >> lim) & ((1<<sz)-1)
+            val = (orig_val >> shift) & mask
 
             if values is None:
                 mini, maxi = extrems
@@ -2413,6 +2654,7 @@ class BitField(VT_Alt):
         If needed should be called just after self.do_absorb().
         '''
         if hasattr(self, 'orig_drawn_val'):
+            self._packed_others = None
             self.idx = self.orig_idx
             self.subfield_vals = self.orig_subfield_vals
             self.drawn_val = self.orig_drawn_val
@@ -2429,6 +2671,68 @@ class BitField(VT_Alt):
             del self.orig_drawn_val
             del self.orig_padding
 
+    def _draw_current_subfield(self, cur):
+        '''
+        Return the next value of the current subfield (in determinist mode) and
+        whether this subfield is now exhausted.
+        '''
+        values = self.subfield_vals[cur]
+        update_current_idx = False
+        if values is None:
+            mini, maxi = self.subfield_extrems[cur]
+            v = mini + self.idx[cur]
+            self.idx_inuse[cur] = self.idx[cur]
+            if v >= maxi:
+                update_current_idx = True
+            else:
+                self.idx[cur] += 1
+        else:
+            if len(values) == 1:
+                index = 0
+            else:
+                index = self.idx[cur]
+            if index >= len(values) - 1:
+                update_current_idx = True
+            else:
+                self.idx[cur] += 1
+            self.idx_inuse[cur] = index
+            v = values[index]
+
+        return v, update_current_idx
+
+    def _pack_other_subfields(self, cur):
+        '''
+        Return the packed value of all the subfields except the current one
+        (in determinist mode), and update self.idx_inuse accordingly.
+        '''
+        val = 0
+        for shift, values, extrems, i in zip(self.subfield_shifts, self.subfield_vals, self.subfield_extrems,
+                                             range(len(self.subfield_limits))):
+            if i == cur:
+                continue
+            if self._fuzzy_mode:
+                cursor = 0
+            else:
+                if values is not None and len(values) == 1:
+                    cursor = 0
+                else:
+                    if i > cur and self.subfield_defaults[i] is None:
+                        # Note on the use of builtins.max(): in the
+                        # case of values, idx is always > 1,
+                        # whereas when it is extrems, idx can
+                        # be 0.
+                        cursor = builtins.max(self.idx[i] - 1, 0)
+                    else:
+                        cursor = self.idx[i]
+            self.idx_inuse[i] = cursor
+            if values is None:
+                mini, maxi = extrems
+                val += (mini + cursor) << shift
+            else:
+                val += (values[cursor]) << shift
+
+        return val
+
     def get_value(self):
         '''
         In determinist mode, all the values such a BitField should
@@ -2447,68 +2751,39 @@ class BitField(VT_Alt):
 
         self.exhausted = False
 
-        val = 0
-        prev_lim = 0
-        update_current_idx = False
+        if self.determinist:
+            # Only the current subfield changes from one call to the next, thus the
+            # packed value of the other subfields is kept as long as the current
+            # subfield remains the same.
+            cur = self.current_idx
+            if self._packed_others is not None and self._packed_others[0] == cur:
+                others = self._packed_others[1]
+                if self.idx_inuse is self.idx:
+                    self.idx_inuse = copy.copy(self.idx)
+            else:
+                self.idx_inuse = copy.copy(self.idx)
+                others = self._pack_other_subfields(cur)
+                self._packed_others = (cur, others)
 
-        self.idx_inuse = copy.copy(self.idx)
+            v, update_current_idx = self._draw_current_subfield(cur)
+            val = others + (v << self.subfield_shifts[cur])
 
-        for lim, values, extrems, i in zip(self.subfield_limits, self.subfield_vals, self.subfield_extrems,
-                                             range(len(self.subfield_limits))):
-            if self.determinist:
-                if i == self.current_idx:
-                    if values is None:
-                        mini, maxi = extrems
-                        v = mini + self.idx[self.current_idx]
-                        if v >= maxi:
-                            update_current_idx = True
-                        else:
-                            self.idx[self.current_idx] += 1
-                        val += v << prev_lim
-                    else:
-                        if len(values) == 1:
-                            index = 0
-                        else:
-                            index = self.idx[self.current_idx]
-                        if index >= len(values) - 1:
-                            update_current_idx = True
-                        else:
-                            self.idx[self.current_idx] += 1
-                        self.idx_inuse[self.current_idx] = index
-                        val += values[index] << prev_lim
-                else:
-                    if self._fuzzy_mode:
-                        cursor = 0
-                    else:
-                        if values is not None and len(values) == 1:
-                            cursor = 0
-                        else:
-                            if i > self.current_idx and self.subfield_defaults[i] is None:
-                                # Note on the use of builtins.max(): in the
-                                # case of values, idx is always > 1,
-                                # whereas when it is extrems, idx can
-                                # be 0.
-                                cursor = builtins.max(self.idx[i] - 1, 0)
-                            else:
-                                cursor = self.idx[i]
-                    self.idx_inuse[i] = cursor
-                    if values is None:
-                        mini, maxi = extrems
-                        val += (mini + cursor) << prev_lim
-                    else:
-                        val += (values[cursor]) << prev_lim
-            else:
+        else:
+            self._packed_others = None
+            update_current_idx = False
+            self.idx_inuse = copy.copy(self.idx)
+            val = 0
+            for shift, values, extrems, i in zip(self.subfield_shifts, self.subfield_vals, self.subfield_extrems,
+                                                 range(len(self.subfield_limits))):
                 if values is None:
                     mini, maxi = extrems
-                    drawn_val = random.randint(mini, maxi)
+                    drawn_val = tc_random.randint(mini, maxi)
                     self.idx[i] = self.idx_inuse[i] = drawn_val - mini
                 else:
-                    drawn_val = random.choice(values)
+                    drawn_val = tc_random.choice(values)
                     self.idx[i] = self.idx_inuse[i] = values.index(drawn_val)
 
-                val += drawn_val << prev_lim
-                
-            prev_lim = lim
+                val += drawn_val << shift
 
         if not self.determinist:
             # We make an artificial count to trigger exhaustion in
@@ -2554,22 +2829,19 @@ class BitField(VT_Alt):
     def get_current_value(self):
         
         val = 0
-        prev_lim = 0
 
-        for lim, values, extrems, i in zip(self.subfield_limits, self.subfield_vals, self.subfield_extrems,
+        for shift, values, extrems, i in zip(self.subfield_shifts, self.subfield_vals, self.subfield_extrems,
                                              range(len(self.subfield_limits))):
             if values is None:
                 mini, maxi = extrems
                 v = mini + self.idx_inuse[i]
-                val += v << prev_lim
+                val += v << shift
             else:
                 if len(values) == 1:
                     index = 0
                 else:
                     index = self.idx_inuse[i]
-                val += values[index] << prev_lim
-
-            prev_lim = lim
+                val += values[index] << shift
 
         return self._encode_bitfield(val)
     
@@ -2586,6 +2858,12 @@ class BitField(VT_Alt):
 
         self.drawn_val = val
 
+        if sys.version_info[0] > 2:
+            if self.endian == VT.LittleEndian:
+                return val.to_bytes(self.nb_bytes, 'little')
+            else:
+                return val.to_bytes(self.nb_bytes, 'big')
+
         # bigendian-encoded
         l = []
         for i in range(self.nb_bytes - 1, -1, -1):
@@ -2596,11 +2874,8 @@ class BitField(VT_Alt):
         # littleendian-encoded
         if self.endian == VT.LittleEndian:
             l = l[::-1]
-           
-        if sys.version_info[0] > 2:
-            return struct.pack('{:d}s'.format(self.nb_bytes), bytes(l))
-        else:
-            return struct.pack('{:d}s'.format(self.nb_bytes), str(bytearray(l)))
+
+        return struct.pack('{:d}s'.format(self.nb_bytes), str(bytearray(l)))
 
     def get_current_raw_val(self):
         if self.drawn_val is None:
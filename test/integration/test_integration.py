@@ -24,8 +24,12 @@
 ################################################################################
 from __future__ import print_function
 
+import array
+import random
+import struct
 import sys
 import unittest
+import zlib
 import ddt
 
 import ddt
@@ -2800,6 +2804,71 @@ class TestNode_NonTerm(unittest.TestCase):
         self.assertEqual(status, AbsorbStatus.FullyAbsorbed)
         self.assertEqual(raw_data, raw_data_abs)
 
+    def test_generator_helpers_reuse(self):
+        gen_desc = \
+            {'name': 'gen',
+             'contents': [
+                 {'name': 'crc',
+                  'contents': CRC(vt=UINT32_be),
+                  'node_args': ['data1', 'data2']},
+                 {'name': 'len',
+                  'contents': LEN(vt=UINT8),
+                  'node_args': 'data1'},
+                 {'name': 'sum',
+                  'contents': WRAP(lambda s: sum(bytearray(s)), vt=UINT16_be),
+                  'node_args': ['data1', 'data2']},
+                 {'name': 'off',
+                  'contents': OFFSET(use_current_position=False, vt=UINT8),
+                  'node_args': ['data2', 'body']},
+                 {'name': 'body',
+                  'contents': [
+                      {'name': 'data1',
+                       'contents': String(values=['Test!', 'Hello World!', 'A'*200])},
+                      {'name': 'data2',
+                       'contents': String(values=['Red', 'Green', 'Blue'])},
+                  ]},
+             ]}
+
+        def check(node):
+            d1 = node['.*/data1$'].to_bytes()
+            d2 = node['.*/data2$'].to_bytes()
+            self.assertEqual(struct.unpack('>L', node['.*/crc$'].to_bytes())[0],
+                             zlib.crc32(d1 + d2) & 0xFFFFFFFF)
+            self.assertEqual(struct.unpack('B', node['.*/len$'].to_bytes())[0], len(d1))
+            self.assertEqual(struct.unpack('>H', node['.*/sum$'].to_bytes())[0],
+                             sum(bytearray(d1 + d2)))
+            self.assertEqual(struct.unpack('B', node['.*/off$'].to_bytes())[0], len(d1))
+
+        mb = NodeBuilder()
+        node = mb.create_graph_from_desc(gen_desc)
+        node.set_env(Env())
+        node.make_determinist(recursive=True)
+
+        node.freeze()
+        check(node)
+        crc_node = node['.*/crc$'].cc.generated_node
+        node_copy = Node('copy', base_node=node, ignore_frozen_state=True, new_env=True)
+
+        for i in range(4):
+            node.unfreeze()
+            node.freeze()
+            check(node)
+            # the generated node is updated in place
+            self.assertIs(node['.*/crc$'].cc.generated_node, crc_node)
+
+        # the copy relies on its own generated nodes
+        node_copy.freeze()
+        check(node_copy)
+        self.assertIsNot(node_copy['.*/crc$'].cc.generated_node, crc_node)
+        check(node)
+
+        # a generated node altered meanwhile is not reused anymore
+        crc_node.set_values(value_type=UINT32_be(values=[0]))
+        node.unfreeze()
+        node.freeze()
+        check(node)
+        self.assertIsNot(node['.*/crc$'].cc.generated_node, crc_node)
+
 
 class TestNode_TypedValue(unittest.TestCase):
     @classmethod
@@ -2878,6 +2947,205 @@ class TestNode_TypedValue(unittest.TestCase):
         self.assertEqual(status, AbsorbStatus.Reject)
         self.assertEqual(raw_data[size:], b'FEND')
 
+    def test_int_64bit_ranges(self):
+        vt = UINT64_be(values=[0, 2**63, 2**64 - 1])
+        fuzzed_vals = vt.get_fuzzed_vt_list()[0].values
+        for v in [1, 2**64 - 2]:
+            self.assertIn(v, fuzzed_vals)
+
+        vt = SINT64_le(values=[-2**63, -2**62, 0, 2**63 - 1], default=0)
+        fuzzed_vals = vt.get_fuzzed_vt_list()[0].values
+        for v in [-2**63 + 1, 2**63 - 2]:
+            self.assertIn(v, fuzzed_vals)
+
+        values = [i * (2**64 // 1000) for i in range(1000)]
+        vt = UINT64_be(values=values)
+        self.assertIsInstance(vt.values, array.array)
+        fuzzed_vals = vt.get_fuzzed_vt_list()[0].values
+        self.assertIn(1, fuzzed_vals)
+        self.assertIn(values[-1] - 1, fuzzed_vals)
+
+        vt.reset_state()
+        drawn = []
+        for i in range(1000):
+            drawn.append(struct.unpack('>Q', vt.get_value())[0])
+            self.assertEqual(vt.is_exhausted(), i == 999)
+        self.assertEqual(drawn, values)
+
+        vt.reset_state()
+        vt.make_random()
+        drawn = []
+        for i in range(1000):
+            val = vt.get_value()
+            vt.rewind()
+            self.assertEqual(vt.get_value(), val)
+            drawn.append(vt.get_current_raw_val())
+        self.assertEqual(sorted(drawn), values)
+
+        # values above 2**63 are added to an array of unsigned values
+        vt = UINT64_be(values=list(range(300)))
+        vt.update_raw_value(2**64 - 1)
+        self.assertEqual(vt.values[-1], 2**64 - 1)
+        vt = UINT64_be(values=list(range(300)))
+        vt.do_absorb(struct.pack('>Q', 2**63), AbsNoCsts())
+        self.assertEqual(vt.values[0], 2**63)
+
+        # values that do not fit in the array are added to a list
+        vt = UINT16_be(values=list(range(300)), fuzz_mode=True)
+        vt.update_raw_value(-1)
+        self.assertIsInstance(vt.values, list)
+        self.assertEqual(vt.values[-1], -1)
+
+    def test_str_lazy_fuzz_cases(self):
+        vt = String(values=['ABCD'], max_sz=20)
+        vt.make_private(forget_current_state=True)
+        vt.enable_fuzz_mode(fuzz_magnitude=50.0)
+
+        lazy_cases = [v for v in vt.values if isinstance(v, RepeatPattern)]
+        self.assertTrue(lazy_cases)
+
+        big_case = RepeatPattern(b'ABCD', b'X', 20*5000)
+        self.assertIn(big_case, lazy_cases)
+        self.assertIn(RepeatPattern(b'ABCD', b'%n', 400*50), lazy_cases)
+
+        drawn = []
+        while not vt.is_exhausted():
+            val = vt.get_value()
+            self.assertIsInstance(val, bytes)
+            drawn.append(val)
+        self.assertIn(b'ABCD' + b'X'*20*5000, drawn)
+        self.assertIn(b'ABCD' + b'%n'*400*50, drawn)
+        self.assertIn(b'', drawn)
+        self.assertEqual(len(drawn), len(vt.values))
+
+    def test_encoding_cache(self):
+
+        class CountingStr(String):
+            encoding_cache_size = 4
+            calls = []
+
+            def encode(self, val):
+                self.calls.append(val)
+                return val + b'***'
+
+            def decode(self, val):
+                return val[:-3]
+
+        vt = CountingStr(values=['A', 'B'])
+        self.assertEqual(vt.get_value(), b'A***')
+        nb_calls = len(CountingStr.calls)
+        for i in range(10):
+            self.assertEqual(vt.get_current_value(), b'A***')
+        self.assertEqual(len(CountingStr.calls), nb_calls)
+
+        vt2 = CountingStr(values=['A', 'B'])
+        self.assertEqual(vt2.get_value(), b'A***')
+        self.assertEqual(len(CountingStr.calls), nb_calls)
+
+        for i in range(10):
+            CountingStr(values=['C{:d}'.format(i)]).get_value()
+        self.assertLessEqual(len(String._encoding_caches[CountingStr][0]), 4)
+
+        del CountingStr.calls[:]
+        CountingStr.encoding_cache_size = 0
+        vt3 = CountingStr(values=['A'])
+        vt3.get_value()
+        self.assertEqual(CountingStr.calls, [b'A', b'A'])
+
+    def test_bulk_encoders(self):
+
+        def reverse_bits(x):
+            return sum(1<<(7-i) for i in range(8) if x>>i&1)
+
+        def bytewise_bit_reverse(val):
+            return b''.join(struct.pack('B', reverse_bits(b)) for b in bytearray(val)[::-1])
+
+        from framework.encoders import _gsm7bit_pack_bytewise, _gsm7bit_unpack_bytewise
+
+        rd = random.Random(0)
+        gsm_enc = GSM7bitPacking_Enc()
+        rev_enc = BitReverse_Enc()
+        for sz in range(0, 200):
+            msg = bytes(bytearray(rd.randrange(0x80) for _ in range(sz)))
+            self.assertEqual(gsm_enc.encode(msg), _gsm7bit_pack_bytewise(msg))
+            if sz % 8 != 0:
+                self.assertEqual(gsm_enc.decode(gsm_enc.encode(msg)), msg)
+
+            blob = bytes(bytearray(rd.randrange(0x100) for _ in range(sz)))
+            self.assertEqual(gsm_enc.decode(blob), _gsm7bit_unpack_bytewise(blob))
+            self.assertEqual(rev_enc.encode(blob), bytewise_bit_reverse(blob))
+            self.assertEqual(rev_enc.decode(rev_enc.encode(blob)), blob)
+
+        self.assertEqual(gsm_enc.encode(b'Hello World'), b'\xc8\x32\x9b\xfd\x06\x5d\xdf\x72\x36\x19')
+
+    def test_bitfield_encoding(self):
+
+        def reference_encoding(bf):
+            # straightforward encoding of the subfield values currently in use
+            val = 0
+            for i in range(len(bf.subfield_sizes)):
+                val += bf.get_subfield(i) << (bf.subfield_limits[i] - bf.subfield_sizes[i])
+            if bf.padding_size != 0:
+                if bf.lsb_padding:
+                    val <<= bf.padding_size
+                    if bf.padding == 1:
+                        val += bf.padding_one[bf.padding_size]
+                elif bf.padding == 1:
+                    val += bf.padding_one[bf.padding_size] << bf.size
+            l = []
+            for i in range(bf.nb_bytes - 1, -1, -1):
+                l.append((val >> i*8) & 0xFF)
+            if bf.endian == VT.LittleEndian:
+                l = l[::-1]
+            return bytes(bytearray(l)), val
+
+        bitfields = [
+            dict(subfield_sizes=[4, 4, 4], padding=0),
+            dict(subfield_sizes=[3, 5, 7], subfield_values=[[1, 2, 3], None, [0, 127, 5]],
+                 padding=1, endian=VT.LittleEndian),
+            dict(subfield_limits=[2, 6, 13], subfield_val_extremums=[None, [3, 9], [10, 20]],
+                 lsb_padding=False, padding=1),
+            dict(subfield_sizes=[8, 16, 1, 7], subfield_values=[[0xAA], [1, 0xFFFF, 300], None, None],
+                 defaults=[None, None, None, 5]),
+            dict(subfield_sizes=[12, 20], subfield_values=[None, [7]], endian=VT.LittleEndian,
+                 padding=1, lsb_padding=False),
+        ]
+
+        random.seed(0)
+        for desc in bitfields:
+            bf = BitField(**desc)
+            for i in range(150):
+                val = bf.get_value()
+                self.assertEqual((val, bf.drawn_val), reference_encoding(bf))
+                self.assertEqual(bf.get_current_value(), val)
+
+                if i < 15:
+                    bf_abs = BitField(**desc)
+                    bf_abs.do_absorb(val, constraints=AbsNoCsts())
+                    self.assertEqual(bf_abs.get_current_value(), val)
+
+                if i == 15:
+                    bf.set_subfield(1, 2)
+                elif i == 30:
+                    bf.rewind()
+                    bf.rewind()
+                elif i == 50:
+                    bf.enable_fuzz_mode()
+                elif i == 70:
+                    bf.enable_normal_mode()
+                    bf.make_random()
+                elif i == 85:
+                    bf.make_determinist()
+                elif i == 95:
+                    bf.reset_state()
+                elif i == 110:
+                    bf.extend_right(BitField(subfield_sizes=[3, 3], subfield_values=[[1, 2], [4, 5, 6]]))
+
+        bf = BitField(subfield_sizes=[4, 4, 4], subfield_values=[[1, 2], None, [3, 7]],
+                      subfield_val_extremums=[None, [5, 7], None], padding=1, endian=VT.LittleEndian)
+        self.assertEqual([bf.get_value() for i in range(7)],
+                         [b'\x1f5', b'/5', b'/6', b'/7', b'/w', b'\x1f5', b'/5'])
+
     def test_encoded_str_1(self):
 
         class EncodedStr(String):
@@ -3150,6 +3418,54 @@ class TestDataModel(unittest.TestCase):
         data = copy.copy(Data(node))
         data = copy.copy(Data('TEST'))
 
+    def test_atom_pool(self):
+        dm = fmk.get_data_model_by_name('mydf')
+        dm.load_data_model(fmk._name2dm)
+        dm.enable_atom_pool(size=2)
+        try:
+            pool = dm.atom_pool
+            atom = dm.get_atom('exist_cond')
+            self.assertEqual(pool.misses, 1)
+            self.assertTrue(pool.wait_until_filled(timeout=10))
+
+            atom.unfreeze(recursive=True)
+            atom.to_bytes()
+            pooled_atom = dm.get_atom('exist_cond')
+            self.assertEqual(pool.hits, 1)
+            self.assertIsNot(pooled_atom, atom)
+
+            # pooled instances are identical to copies made on demand
+            orig = dm._dm_hashtable['exist_cond']
+            fresh_atom = dm.node_backend.atom_copy(orig)
+            random.seed(0)
+            val = pooled_atom.to_bytes()
+            random.seed(0)
+            self.assertEqual(fresh_atom.to_bytes(), val)
+            self.assertIsNot(pooled_atom.env, orig.env)
+
+            self.assertTrue(pool.wait_until_filled(timeout=10))
+            new_atom = Node('exist_cond', values=['NEW'])
+            dm.register(new_atom)
+            self.assertEqual(dm.get_atom('exist_cond').to_bytes(), b'NEW')
+            dm.register(orig)
+            self.assertEqual(dm.get_atom('exist_cond').name, 'exist_cond')
+            self.assertIsNot(dm.get_atom('exist_cond').cc, new_atom.cc)
+
+            # the refill waits for the registered atoms to be left alone
+            self.assertTrue(pool.wait_until_filled(timeout=10))
+            with dm._atoms_lock:
+                dm.get_atom('exist_cond')
+                self.assertFalse(pool.wait_until_filled(timeout=0.5))
+            self.assertTrue(pool.wait_until_filled(timeout=10))
+        finally:
+            dm.disable_atom_pool()
+
+        self.assertIsNone(dm.atom_pool)
+        self.assertTrue(fmk.set_atom_pool(3))
+        self.assertEqual(fmk.dm.atom_pool.size, 3)
+        self.assertTrue(fmk.set_atom_pool(0))
+        self.assertIsNone(fmk.dm.atom_pool)
+
     @unittest.skipIf(not run_long_tests, "Long test case")
     def test_data_makers(self):
 
@@ -3539,6 +3855,12 @@ class TestFMK(unittest.TestCase):
         fmk.reload_all(tg_ids=[0])
         fmk.prj.reset_target_mappings()
 
+    def test_segment_log_disabled(self):
+        self.assertIsNone(fmk.lg.get_segment_log_path())
+        self.assertFalse(fmk.segment_log_fetch_data())
+        self.assertTrue(fmk.is_not_ok())
+        fmk.flush_errors()
+
     def test_generic_disruptors_01(self):
         dmaker_type = 'TESTNODE'
         # fmk.cleanup_dmaker(dmaker_type=dmaker_type, reset_existing_seed=True)
@@ -3568,6 +3890,128 @@ class TestFMK(unittest.TestCase):
 
         fmk.cleanup_all_dmakers(reset_existing_seed=True)
 
+    def test_prng_seed(self):
+        act = ['SHAPE', ('C', UI(nb=2))]
+
+        fmk.set_prng_seed(1234)
+        try:
+            outcomes = []
+            for i in range(6):
+                d = fmk.get_data(act)
+                self.assertEqual(d.prng.index, i)
+                outcomes.append(d.to_bytes())
+            self.assertGreater(len(set(outcomes)), 1)
+
+            # any test case can be regenerated without replaying the previous ones
+            random.random()
+            self.assertTrue(fmk.prng_seek(4))
+            self.assertEqual(fmk.get_data(act).to_bytes(), outcomes[4])
+            self.assertEqual(fmk.get_data(act).to_bytes(), outcomes[5])
+            self.assertTrue(fmk.prng_seek(1))
+            self.assertEqual(fmk.get_data(act).to_bytes(), outcomes[1])
+
+            fmk.set_prng_seed(1234, index=3)
+            self.assertEqual(fmk.get_data(act).to_bytes(), outcomes[3])
+
+            fmk.set_prng_seed(4321)
+            self.assertNotEqual([fmk.get_data(act).to_bytes() for i in range(6)], outcomes)
+        finally:
+            fmk.set_prng_seed(None)
+
+        self.assertIsNone(Env.prng)
+        self.assertIsNone(fmk.get_data(act).prng)
+
+    def test_evolutionary_population(self):
+        from framework.evolutionary_helpers import DefaultPopulation
+
+        seed = Data(fmk.dm.get_atom('separator'))
+        node = seed.content
+        data = fmk.get_data([('C', UI(nb=2))], data_orig=seed, copy_orig=False)
+        self.assertIs(data.content, node)
+        data = fmk.get_data([('C', UI(nb=2))], data_orig=seed)
+        self.assertIsNot(data.content, node)
+
+        class Population(DefaultPopulation):
+            def _compute_fitness(self, feedback):
+                self.fitness_calls.append(feedback)
+                return [10 if fbk else 90 for fbk in feedback]
+
+        population = Population(fmk._exportable_fmk_ops,
+                                init_process=[('SEPARATOR', UI(random=True)), 'tTYPE'],
+                                size=20, max_generation_nb=3)
+        population.fitness_calls = []
+        population.reset()
+        self.assertEqual(len(population), 20)
+        for ind in population[:5]:
+            ind.feedback = [('target', 0, None, b'crash')]
+
+        population.evolve()
+        self.assertEqual(population.generation, 2)
+        self.assertTrue(2 <= len(population) <= 22)
+        self.assertIsNotNone(population.generation_throughput)
+        self.assertEqual(len(population.fitness_calls), 1)
+        self.assertEqual([bool(fbk) for fbk in population.fitness_calls[0]], [True] * 5 + [False] * 15)
+
+        fmk.cleanup_all_dmakers(reset_existing_seed=True)
+
+    def test_crossover(self):
+        from framework.generic_data_makers import sd_crossover
+
+        node = fmk.dm.get_atom('separator')
+        node.freeze()
+
+        operand = sd_crossover.Operand(node)
+        leafs = [n for _, n in node.iter_paths() if n.is_term()]
+        self.assertEqual(len(operand.leafs), len(set(leafs)))
+
+        operand.compute_sub_graphs(1.0)
+        self.assertEqual(operand.shared, [node])
+
+        operand.compute_sub_graphs(0.5)
+        for n in operand.shared:
+            for m in operand.shared:
+                if m is not n:
+                    self.assertNotIn(m, n.get_reachable_nodes())
+
+        other = fmk.dm.get_atom('separator')
+        d1 = fmk.get_data([('tCROSS', UI(node=other))], data_orig=Data(node))
+        d2 = fmk.get_data([('tCROSS', UI(node=other))], data_orig=Data(node))
+        self.assertIsNotNone(d1)
+        self.assertIsNotNone(d2)
+
+        fmk.cleanup_all_dmakers(reset_existing_seed=True)
+
+    def test_sharded_campaign(self):
+        act = ['SHAPE', ('tWALK', UI())]
+
+        fmk.set_prng_seed(77)
+        try:
+            outcomes = []
+            while True:
+                d = fmk.get_data(act)
+                if d is None:
+                    break
+                outcomes.append(d.to_bytes())
+            fmk.cleanup_all_dmakers(reset_existing_seed=True)
+
+            # the walk is split between 3 worker processes
+            reports = fmk.run_sharded_campaign(act, len(outcomes), 3, timeout=120)
+        finally:
+            fmk.set_prng_seed(None)
+
+        self.assertIsNotNone(reports)
+        self.assertEqual([r.nb_sent for r in reports], [7, 6, 6])
+        first_id = reports[0].data_ids[0]
+        last_id = reports[-1].data_ids[1]
+        self.assertEqual(last_id - first_id + 1, len(outcomes))
+
+        records = fmk.fmkDB.execute_sql_statement(
+            'SELECT GROUP_ID, CONTENT FROM DATA WHERE ID >= ? AND ID <= ? ORDER BY ID',
+            params=(first_id, last_id))
+        self.assertEqual([bytes(r[1]) for r in records], outcomes)
+        group_ids = [r[0] for r in records]
+        self.assertEqual(group_ids, list(range(group_ids[0], group_ids[0]+len(outcomes))))
+
     def test_separator_disruptor(self):
         for i in range(100):
             d = fmk.get_data(['SEPARATOR', 'tSEP'])
@@ -26,3 +26,11 @@ __all__ = []
 from test.unit.test_node import *
 from test.unit.test_node_builder import *
 from test.unit.test_monitor import *
+from test.unit.test_local_target import *
+from test.unit.test_network_target import *
+from test.unit.test_feedback import *
+from test.unit.test_task_scheduler import *
+from test.unit.test_logger import *
+from test.unit.test_segment_log import *
+from test.unit.test_prng import *
+from test.unit.test_sharding import *
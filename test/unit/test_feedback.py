@@ -0,0 +1,112 @@
+################################################################################
+#
+#  Copyright 2016 Eric Lacombe <eric.lacombe@security-labs.org>
+#
+################################################################################
+#
+#  This file is part of fuddly.
+#
+#  fuddly is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  fuddly is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with fuddly. If not, see <http://www.gnu.org/licenses/>
+#
+################################################################################
+
+
+
+import collections
+import datetime
+import threading
+import unittest
+
+from framework.knowledge.feedback_collector import FeedbackCollector, FeedbackSource
+from framework.knowledge.feedback_handler import FeedbackHandler
+from framework.knowledge.information import OS
+from framework.data_model import DataModel
+from framework.node import Env
+from framework.project import Project
+from framework.scenario import ScenarioEnv
+from framework.tactics_helpers import DataMaker
+from framework.value_types import VT
+
+
+class RecordingFbkHandler(FeedbackHandler):
+
+    def __init__(self):
+        FeedbackHandler.__init__(self)
+        self.lock = threading.Lock()
+        self.received = collections.defaultdict(list)
+
+    def extract_info_from_feedback(self, current_dm, source, timestamp, content, status):
+        with self.lock:
+            self.received[str(source)].append(content)
+        return OS.Linux if content == b'Linux' else None
+
+
+class FeedbackCollectorTest(unittest.TestCase):
+
+    def test_per_instance_lock(self):
+        fbk1 = FeedbackCollector()
+        fbk2 = FeedbackCollector()
+        self.assertIsNot(fbk1.fbk_lock, fbk2.fbk_lock)
+
+        with fbk1.fbk_lock:
+            fbk2.add_fbk_from('src', b'test', status=-1)
+        self.assertEqual([(ref, d, s) for ref, d, s, _ in fbk2], [('src', [b'test'], -1)])
+
+    def test_iteration(self):
+        fbk = FeedbackCollector()
+        fbk.add_fbk_from('src1', b'a')
+        fbk.add_fbk_from('src2', b'b')
+        fbk.add_fbk_from('src1', b'c', status=-2)
+        entries = [(ref, d, s, len(ts)) for ref, d, s, ts in fbk]
+        self.assertEqual(entries, [('src1', [b'a', b'c'], -2, 2), ('src2', [b'b'], 0, 1)])
+
+        # iterating does not consume the feedback
+        self.assertEqual(len(list(fbk)), 2)
+        self.assertEqual(len(list(fbk.iter_and_cleanup_collector())), 2)
+        self.assertFalse(fbk.has_fbk_collector())
+
+
+class FeedbackProcessingTest(unittest.TestCase):
+
+    # Project.start()/stop() set the knowledge source of these classes, that may be used by
+    # a project currently running within the same process
+    knowledge_users = [VT, Env, DataModel, DataMaker, ScenarioEnv]
+
+    def setUp(self):
+        self.knowledge_sources = [c.knowledge_source for c in self.knowledge_users]
+
+    def tearDown(self):
+        for c, ks in zip(self.knowledge_users, self.knowledge_sources):
+            c.knowledge_source = ks
+
+    def test_ordered_delivery_per_source(self):
+        prj = Project(fbk_processing_workers=4)
+        handler = RecordingFbkHandler()
+        prj.register_feedback_handler(handler)
+        prj.start()
+        try:
+            sources = [FeedbackSource('target {:d}'.format(i)) for i in range(8)]
+            now = datetime.datetime.now()
+            for i in range(50):
+                for src in sources:
+                    prj.trigger_feedback_handlers(src, now, str(i).encode(), 0)
+            prj.trigger_feedback_handlers(sources[0], now, b'Linux', 0)
+        finally:
+            prj.stop()
+
+        expected = [str(i).encode() for i in range(50)]
+        for src in sources[1:]:
+            self.assertEqual(handler.received[str(src)], expected)
+        self.assertEqual(handler.received[str(sources[0])], expected + [b'Linux'])
+        self.assertTrue(prj.knowledge_source.is_info_class_represented(OS))
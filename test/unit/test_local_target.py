@@ -0,0 +1,404 @@
+################################################################################
+#
+#  Copyright 2014-2016 Eric Lacombe <eric.lacombe@security-labs.org>
+#
+################################################################################
+#
+#  This file is part of fuddly.
+#
+#  fuddly is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  fuddly is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with fuddly. If not, see <http://www.gnu.org/licenses/>
+#
+################################################################################
+
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from datetime import datetime
+import ddt
+
+from framework.coverage import CoverageMap, Corpus
+from framework.data import Data
+from framework.data_model import DataModel
+from framework.database import Database
+from framework.node import Node
+from framework.value_types import String
+from framework.targets.local import LocalTarget, PooledLocalTarget
+
+persistent_harness = b'''
+import os, struct, sys, time
+
+ctrl_fd = int(os.environ['FUDDLY_CTRL_FD'])
+status_fd = int(os.environ['FUDDLY_STATUS_FD'])
+
+def read_exactly(sz):
+    buf = b''
+    while len(buf) < sz:
+        chunk = os.read(ctrl_fd, sz - len(buf))
+        if not chunk:
+            sys.exit(0)
+        buf += chunk
+    return buf
+
+while True:
+    data = read_exactly(struct.unpack('<I', read_exactly(4))[0])
+    if data == b'crash':
+        os.abort()
+    elif data == b'hang':
+        time.sleep(10)
+    status = 3 << 8 if data == b'bad' else 0
+    os.write(status_fd, struct.pack('<i', status))
+'''
+
+file_checker = b'''
+import sys
+
+with open(sys.argv[1], 'rb') as f:
+    data = f.read()
+if data.startswith(b'err'):
+    sys.stderr.write('error with ' + data.decode())
+'''
+
+# record one edge per byte value, the hit count being the number of occurrences
+instrumented_program = b'''
+import ctypes, mmap, os, sys
+
+shm_id = os.environ['__AFL_SHM_ID']
+map_size = int(os.environ['AFL_MAP_SIZE'])
+if shm_id.startswith('/'):
+    fd = os.open('/dev/shm' + shm_id, os.O_RDWR)
+    bitmap = mmap.mmap(fd, map_size)
+else:
+    libc = ctypes.CDLL(None)
+    libc.shmat.restype = ctypes.c_void_p
+    libc.shmat.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_int]
+    addr = libc.shmat(int(shm_id), None, 0)
+    bitmap = (ctypes.c_ubyte * map_size).from_address(addr)
+
+with open(sys.argv[1], 'rb') as f:
+    data = f.read()
+if data.startswith(b'verbose'):
+    # more than a pipe buffer
+    sys.stdout.write('v' * 200000)
+    sys.stdout.flush()
+for b in bytearray(data):
+    bitmap[b % map_size] = min(bitmap[b % map_size] + 1, 255)
+'''
+
+
+class LocalTargetPersistentTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.mkdtemp()
+        cls.harness = os.path.join(cls.tmpdir, 'harness.py')
+        with open(cls.harness, 'wb') as f:
+            f.write(persistent_harness)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmpdir)
+
+    def setUp(self):
+        self.tg = LocalTarget(target_path=sys.executable, pre_args=self.harness,
+                              persistent=True)
+        self.assertTrue(self.tg.start())
+
+    def tearDown(self):
+        self.tg.stop()
+
+    def _send(self, raw):
+        self.tg.send_data(Data(raw))
+        pid = self.tg._app.pid
+        fbk = self.tg.get_feedback(timeout=1)
+        status = [s for _, _, s, _ in fbk.iter_and_cleanup_collector()]
+        err = fbk.get_error_code()
+        fbk.cleanup()
+        self.tg.cleanup()
+        return pid, err, status
+
+    def test_process_reuse(self):
+        pids = set()
+        for i in range(5):
+            pid, err, status = self._send(b'test case ' + str(i).encode())
+            self.assertEqual(err, 0)
+            self.assertEqual(status, [])
+            pids.add(pid)
+        self.assertEqual(len(pids), 1)
+
+    def test_error_status(self):
+        pid1, err, status = self._send(b'bad')
+        self.assertEqual(err, -1)
+        self.assertEqual(status, [-3])
+        pid2, err, status = self._send(b'good')
+        self.assertEqual(err, 0)
+        self.assertEqual(pid1, pid2)
+
+    def test_crash_and_relaunch(self):
+        pid1, err, status = self._send(b'crash')
+        self.assertEqual(err, -1)
+        self.assertEqual(status, [-6])
+        pid2, err, status = self._send(b'good')
+        self.assertEqual(err, 0)
+        self.assertNotEqual(pid1, pid2)
+
+    def test_hang_and_relaunch(self):
+        pid1, err, status = self._send(b'hang')
+        self.assertEqual(err, -1)
+        self.assertEqual(status, [-4])
+        pid2, err, status = self._send(b'good')
+        self.assertEqual(err, 0)
+        self.assertNotEqual(pid1, pid2)
+
+
+@ddt.ddt
+class LocalTargetDeliveryTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.mkdtemp()
+        cls.checker = os.path.join(cls.tmpdir, 'checker.py')
+        with open(cls.checker, 'wb') as f:
+            f.write(file_checker)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmpdir)
+
+    @ddt.data(LocalTarget.DELIVERY_FILE, LocalTarget.DELIVERY_TMPFS,
+              LocalTarget.DELIVERY_MEMFD, LocalTarget.DELIVERY_MMAP)
+    def test_delivery(self, delivery):
+        if delivery == LocalTarget.DELIVERY_MEMFD and not hasattr(os, 'memfd_create'):
+            self.skipTest('memfd_create() is not supported')
+        if delivery == LocalTarget.DELIVERY_TMPFS and not os.path.isdir(LocalTarget.tmpfs_folder):
+            self.skipTest('no tmpfs folder')
+
+        tg = LocalTarget(target_path=sys.executable, pre_args=self.checker, delivery=delivery)
+        tg.mmap_initial_size = 16
+        self.assertTrue(tg.start())
+        try:
+            for raw in [b'err-' + b'A' * 100, b'err-B', b'ok', b'err-' + b'C' * 5000]:
+                tg.send_data(Data(raw))
+                tg._app.wait()
+                fbk = tg.get_feedback(timeout=2)
+                if raw.startswith(b'err'):
+                    self.assertEqual(fbk.get_error_code(), -1)
+                    self.assertEqual(fbk.get_bytes().strip(), b'error with ' + raw)
+                else:
+                    self.assertEqual(fbk.get_error_code(), 0)
+                fbk.cleanup()
+                tg.cleanup()
+        finally:
+            tg.stop()
+
+
+class PooledLocalTargetTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.mkdtemp()
+        cls.checker = os.path.join(cls.tmpdir, 'checker.py')
+        with open(cls.checker, 'wb') as f:
+            f.write(file_checker)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmpdir)
+
+    def setUp(self):
+        self.tg = PooledLocalTarget(nb_instances=4, target_path=sys.executable,
+                                    pre_args=self.checker)
+        self.assertTrue(self.tg.start())
+
+    def tearDown(self):
+        self.tg.stop()
+
+    def _get_feedback(self):
+        fbk = self.tg.get_feedback(timeout=2)
+        records = {}
+        for ref, content, status, _, data in fbk.iter_and_cleanup_collector(with_related_data=True):
+            records[data.to_bytes()] = (content, status)
+        err = fbk.get_error_code()
+        fbk.cleanup()
+        self.tg.cleanup()
+        return err, records
+
+    def test_distinct_tmp_files(self):
+        suffixes = set([inst._suffix for inst in self.tg._instances])
+        self.assertEqual(len(suffixes), 4)
+
+    def test_feedback_mapping(self):
+        data_list = [Data(b'ok-1'), Data(b'err-2'), Data(b'ok-3'), Data(b'err-4')]
+        self.tg.send_multiple_data(data_list)
+        err, records = self._get_feedback()
+        self.assertEqual(err, -1)
+        self.assertEqual(set(records.keys()), set([b'err-2', b'err-4']))
+        for raw, (content, status) in records.items():
+            self.assertTrue(status < 0)
+            self.assertTrue(any(raw in c for c in content if isinstance(c, bytes)))
+
+    def test_more_data_than_instances(self):
+        data_list = [Data('ok-{:d}'.format(i).encode()) for i in range(6)]
+        data_list.append(Data(b'err-6'))
+        for d in data_list:
+            self.tg.send_data(d)
+        err, records = self._get_feedback()
+        self.assertEqual(err, -1)
+        self.assertEqual(list(records.keys()), [b'err-6'])
+        self.tg.send_data(Data(b'ok-7'))
+        err, records = self._get_feedback()
+        self.assertEqual(err, 0)
+        self.assertEqual(records, {})
+
+    def test_feedback_data_ids(self):
+        # every instance is reused, thus the feedback references are shared by several data
+        data_list = []
+        for i in range(10):
+            d = Data('err-{:d}'.format(i).encode())
+            d.set_data_id(100 + i)
+            data_list.append(d)
+            self.tg.send_data(d)
+        fbk = self.tg.get_feedback(timeout=2)
+        data_ids = []
+        for ref, content, status, tstamps, data in fbk.iter_and_cleanup_collector(with_related_data=True):
+            self.assertEqual(len(content), len(tstamps))
+            raw = data.to_bytes()
+            self.assertTrue(all(raw in c for c in content if isinstance(c, bytes)))
+            data_ids.append(data.get_data_id())
+        fbk.cleanup()
+        self.tg.cleanup()
+        self.assertEqual(sorted(set(data_ids)), list(range(100, 110)))
+
+
+@ddt.ddt
+class LocalTargetCoverageTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.mkdtemp()
+        cls.program = os.path.join(cls.tmpdir, 'instrumented.py')
+        with open(cls.program, 'wb') as f:
+            f.write(instrumented_program)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmpdir)
+
+    def _send(self, tg, raw):
+        tg.send_data(Data(raw))
+        fbk = tg.get_feedback(timeout=5)
+        records = [(ref, content) for ref, content, _, _ in fbk.iter_and_cleanup_collector()]
+        err = fbk.get_error_code()
+        fbk.cleanup()
+        tg.cleanup()
+        self.assertEqual(err, 0)
+        return records
+
+    @ddt.data(CoverageMap.SHM_SYSV, CoverageMap.SHM_POSIX)
+    def test_coverage_feedback(self, shm_type):
+        if shm_type == CoverageMap.SHM_POSIX and not os.path.isdir(CoverageMap.shm_folder):
+            self.skipTest('no POSIX shared memory folder')
+
+        tg = LocalTarget(target_path=sys.executable, pre_args=self.program,
+                         coverage=CoverageMap(map_size=256, shm_type=shm_type))
+        self.assertTrue(tg.start())
+        try:
+            records = self._send(tg, b'AB')
+            self.assertEqual(records, [(Corpus.fbk_ref, ['New coverage: 2 new tuples, 2 edges covered'])])
+            self.assertEqual(self._send(tg, b'BA'), [])
+            self.assertEqual(self._send(tg, b'AC'), [(Corpus.fbk_ref, ['New coverage: 1 new tuples, 3 edges covered'])])
+            # new hit count bucket for an edge already covered
+            self.assertEqual(len(self._send(tg, b'AAAA')), 1)
+            self.assertEqual(self._send(tg, b'CAB'), [])
+        finally:
+            tg.stop()
+
+        corpus = tg.get_corpus()
+        self.assertEqual([e.seed.to_bytes() for e in corpus], [b'AB', b'AC', b'AAAA'])
+        self.assertEqual([e.new_bits for e in corpus], [2, 1, 1])
+
+    def test_coverage_with_large_output(self):
+        tg = LocalTarget(target_path=sys.executable, pre_args=self.program,
+                         coverage=CoverageMap(map_size=256))
+        self.assertTrue(tg.start())
+        try:
+            tg.send_data(Data(b'verbose'))
+            fbk = tg.get_feedback(timeout=5)
+            self.assertEqual(fbk.get_bytes(), b'v' * 200000)
+            records = [(ref, content) for ref, content, _, _ in fbk.iter_and_cleanup_collector()]
+            self.assertEqual(records, [(Corpus.fbk_ref, ['New coverage: 6 new tuples, 6 edges covered'])])
+            fbk.cleanup()
+            tg.cleanup()
+        finally:
+            tg.stop()
+
+    def test_corpus_selection(self):
+        corpus = Corpus(max_size=3)
+        for i, new_bits in enumerate([10, 1, 5, 2]):
+            corpus.add(Data('seed-{:d}'.format(i).encode()), new_bits)
+        self.assertEqual([e.seed.to_bytes() for e in corpus], [b'seed-0', b'seed-2', b'seed-3'])
+
+        for i in range(30):
+            corpus.select()
+        picked = [e.nb_picked for e in corpus]
+        self.assertEqual(sum(picked), 30)
+        self.assertTrue(picked[0] > picked[2])
+
+    def _restore_corpus(self, records, **kwargs):
+        db = Database(fmkdb_path=os.path.join(self.tmpdir, 'fmkDB.db'))
+        self.assertTrue(db.start())
+        try:
+            db.insert_data_model('dm')
+            db.insert_project('prj')
+            now = datetime.now()
+            for content, fbk in records:
+                data_id = db.insert_data('T', 'dm', content, 1, now, now, 'tg', 'prj')
+                if fbk is not None:
+                    db.insert_feedback(data_id, 'LocalTarget - ' + Corpus.fbk_ref, now,
+                                       fbk.encode(), status_code=0)
+                db.insert_feedback(data_id, 'LocalTarget - stdout', now, b'output', status_code=0)
+
+            corpus = Corpus()
+            self.assertEqual(corpus.restore_from_fmkdb(db, prj_name='prj', **kwargs),
+                             len([fbk for _, fbk in records if fbk is not None]))
+        finally:
+            db.stop()
+            os.remove(os.path.join(self.tmpdir, 'fmkDB.db'))
+        return corpus
+
+    def test_corpus_restore_from_fmkdb(self):
+        corpus = self._restore_corpus([(b'A', 'New coverage: 3 new tuples, 3 edges covered'),
+                                       (b'B', None),
+                                       (b'C', 'New coverage: 1 new tuples, 4 edges covered')])
+        self.assertEqual([(e.data_id, e.seed.to_bytes(), e.new_bits) for e in corpus],
+                         [(1, b'A', 3), (3, b'C', 1)])
+
+    def test_corpus_restore_with_data_model(self):
+        dm = DataModel()
+        dm.name = 'dm'
+        atom = Node('seed', subnodes=[Node('hdr', vt=String(values=['A', 'C'])),
+                                      Node('body', vt=String(min_sz=0, max_sz=10))])
+        dm.register(atom)
+        dm.register_atom_for_absorption(atom)
+
+        # b'B' cannot be absorbed and is restored as raw data
+        corpus = self._restore_corpus([(b'Axyz', 'New coverage: 3 new tuples, 3 edges covered'),
+                                       (b'B', 'New coverage: 2 new tuples, 5 edges covered'),
+                                       (b'C', 'New coverage: 1 new tuples, 6 edges covered')],
+                                      dm=dm)
+        self.assertEqual([e.seed.to_bytes() for e in corpus], [b'Axyz', b'B', b'C'])
+        self.assertEqual([isinstance(e.seed.content, Node) for e in corpus], [True, False, True])
+        self.assertEqual(list(corpus)[0].seed.content['seed/body'].to_bytes(), b'xyz')
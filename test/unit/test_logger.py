@@ -0,0 +1,132 @@
+################################################################################
+#
+#  Copyright 2014-2016 Eric Lacombe <eric.lacombe@security-labs.org>
+#
+################################################################################
+#
+#  This file is part of fuddly.
+#
+#  fuddly is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  fuddly is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with fuddly. If not, see <http://www.gnu.org/licenses/>
+#
+################################################################################
+
+
+import os
+import io
+import shutil
+import tempfile
+import threading
+import unittest
+from test import mock
+from framework.logger import *
+from framework.segment_log import SegmentLogReader
+
+
+class LoggerOutputTest(unittest.TestCase):
+    """Test case used to test the console/file outputs of the 'Logger' class."""
+
+    def setUp(self):
+        self.log_folder = tempfile.mkdtemp()
+        self.stdout = io.StringIO()
+        patchers = [mock.patch('framework.logger.logs_folder', self.log_folder),
+                    mock.patch('sys.stdout', self.stdout)]
+        for p in patchers:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.log_folder)
+
+    def _read_log_file(self):
+        log_files = os.listdir(self.log_folder)
+        self.assertEqual(len(log_files), 1)
+        with open(os.path.join(self.log_folder, log_files[0])) as f:
+            return f.read()
+
+    def test_async_file_logging(self):
+        lg = Logger('test', enable_file_logging=True, async_logging=True)
+        lg.start()
+        for i in range(2000):
+            lg.log_fn('line {:d}'.format(i))
+        lg.stop()
+
+        lines = self._read_log_file().splitlines()
+        self.assertEqual(lines, ['line {:d}'.format(i) for i in range(2000)])
+        console = self.stdout.getvalue()
+        self.assertIn('line 1999', console)
+        self.assertIn('*** Logger is stopped ***', console)
+
+    def test_console_rate_limit(self):
+        lg = Logger('test', console_rate_limit=10)
+        lg.start()
+        for i in range(100):
+            lg.print_console('msg {:d}'.format(i))
+        lg.stop()
+
+        console = self.stdout.getvalue()
+        self.assertIn('msg 8', console)
+        self.assertNotIn('msg 99', console)
+        self.assertIn('console message(s) dropped', console)
+
+    def test_console_rate_limit_threads(self):
+        lg = Logger('test', console_rate_limit=20)
+        lg.start()
+        def print_msgs():
+            for i in range(500):
+                lg.print_console('msg')
+        threads = [threading.Thread(target=print_msgs) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        lg.stop()
+
+        console = self.stdout.getvalue()
+        dropped = sum(int(line.split()[1]) for line in console.splitlines()
+                      if 'console message(s) dropped' in line)
+        self.assertEqual(console.count('msg') + dropped, 2000)
+
+    def test_quiet_data(self):
+        lg = Logger('test', enable_file_logging=True, quiet_data=10)
+        lg.start()
+        for i in range(25):
+            lg.start_new_log_entry()
+            lg.log_dmaker_step(1)
+            lg.log_fn('data {:d}'.format(i), data_log=True)
+        lg.log_info('an info')
+        lg.log_fn('a message')
+        lg.log_fn('an error', rgb=Color.ERROR)
+        lg.stop()
+
+        content = self._read_log_file()
+        self.assertNotIn('data ', content)
+        self.assertNotIn('### Step', content)
+        self.assertIn('an info', content)
+        self.assertIn('a message', content)
+        self.assertIn('10 test cases sent', content)
+        self.assertIn('20 test cases sent', content)
+        self.assertNotIn('30 test cases sent', content)
+        self.assertIn('an error', content)
+
+    def test_live_segment_log(self):
+        lg = Logger('test', segment_log=True)
+        lg.start()
+        try:
+            for data_id in range(1, 6):
+                lg._segment_log.append_data(data_id, b'data')
+            lg.flush_segment_log()
+            with SegmentLogReader(lg.get_segment_log_path()) as reader:
+                self.assertEqual([r.data_id for r in reader.iter_records()], [1, 2, 3, 4, 5])
+        finally:
+            lg.stop()
@@ -0,0 +1,85 @@
+################################################################################
+#
+#  Copyright 2016 Eric Lacombe <eric.lacombe@security-labs.org>
+#
+################################################################################
+#
+#  This file is part of fuddly.
+#
+#  fuddly is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  fuddly is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with fuddly. If not, see <http://www.gnu.org/licenses/>
+#
+################################################################################
+
+
+
+import socket
+import threading
+import time
+import unittest
+
+from framework.data import Data
+from framework.target_helpers import Target
+from framework.targets.network import NetworkTarget
+
+
+class NetworkTargetFeedbackTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind(('127.0.0.1', 0))
+        self.server.listen(1)
+        self.answer = b'A' * (3 * NetworkTarget.CHUNK_SZ + 7)
+        self.server_thread = threading.Thread(target=self._serve)
+        self.server_thread.start()
+
+        self.tg = NetworkTarget(host='127.0.0.1', port=self.server.getsockname()[1],
+                                hold_connection=False, fbk_timeout=1)
+
+    def tearDown(self):
+        self.tg.stop()
+        self.server_thread.join()
+        self.server.close()
+
+    def _serve(self):
+        client, _ = self.server.accept()
+        client.recv(100)
+        time.sleep(0.1)
+        client.sendall(self.answer)
+        time.sleep(1.5)
+        client.close()
+
+    def _send(self):
+        self.assertTrue(self.tg.start())
+        t0 = time.time()
+        self.tg.send_data(Data(b'test'), from_fmk=True)
+        while not self.tg.is_target_ready_for_new_data():
+            time.sleep(0.01)
+        duration = time.time() - t0
+        fbk = [b''.join(d) for _, d, _, _ in self.tg.get_feedback().iter_and_cleanup_collector()]
+        return duration, fbk
+
+    def test_full_time_slot(self):
+        self.tg.set_feedback_mode(Target.FBK_WAIT_FULL_TIME)
+        duration, fbk = self._send()
+        self.assertGreaterEqual(duration, 1)
+        self.assertEqual(len(fbk), 1)
+        self.assertEqual(fbk[0].replace(b'\n', b''), self.answer)
+
+    def test_until_received(self):
+        self.tg.set_feedback_mode(Target.FBK_WAIT_UNTIL_RECV)
+        duration, fbk = self._send()
+        self.assertLess(duration, 0.9)
+        self.assertEqual(len(fbk), 1)
+        self.assertTrue(self.answer.startswith(fbk[0]))
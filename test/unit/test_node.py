@@ -81,3 +81,96 @@ class TestBitFieldCondition(unittest.TestCase):
     @ddt.unpack
     def test_invalid_with_both_arguments(self, sf, val, neg_val):
         self.assertRaises(Exception, BitFieldCondition, sf=sf, val=val, neg_val=neg_val)
+
+
+class TestWeightedComponents(unittest.TestCase):
+
+    def setUp(self):
+        self.comp_list = [1, 'a', 3, 'b', 2, 'c']
+        self.table = WeightedComponents(self.comp_list)
+
+    def test_pick(self):
+        self.assertEqual(self.table.total_weight, 6)
+        self.assertEqual(self.table.pick(0), 0)
+        self.assertEqual(self.table.pick(1), 0)
+        self.assertEqual(self.table.pick(1.1), 1)
+        self.assertEqual(self.table.pick(4.5), 2)
+        self.assertIsNone(self.table.pick(6.1))
+
+    def test_pick_with_exclusion(self):
+        mask = self.table.exclusion_mask([2])
+        self.assertEqual(self.table.get_total_weight(mask), 3)
+        self.assertEqual(self.table.pick(1.5, mask=mask), 2)
+        self.assertEqual(self.table.pick(1.5, accept=lambda c: c != 'b'), 2)
+
+    def test_heavier(self):
+        self.assertEqual(self.table.heavier(), 1)
+        self.assertEqual(self.table.heavier(mask=self.table.exclusion_mask([2])), 2)
+        self.assertEqual(WeightedComponents([2, 'a', 2, 'b']).heavier(), 0)
+
+    def test_next_components(self):
+        excluded = []
+        for expected_comp, expected_idx in [('b', 2), ('c', 4), ('a', 0)]:
+            comp, idx = NodeInternals_NonTerm._get_next_heavier_component(self.comp_list, excluded_idx=excluded)
+            self.assertEqual((comp, idx), (expected_comp, expected_idx))
+            excluded.append(idx)
+        self.assertEqual(NodeInternals_NonTerm._get_next_heavier_component(self.comp_list, excluded_idx=excluded),
+                         ([], None))
+
+        comp, idx, seed = NodeInternals_NonTerm._get_next_random_component(self.table, excluded_idx=[0, 4], seed=1)
+        self.assertEqual((comp, idx, seed), ('b', 2, 1))
+        self.assertEqual(NodeInternals_NonTerm._get_next_random_component(self.table, excluded_idx=[0, 2, 4]),
+                         ([], None, 0))
+
+
+class TestNonTermShapes(unittest.TestCase):
+
+    def test_expanded_nodelist_cache(self):
+        a = Node('a', values=['A'])
+        b = Node('b', values=['B'])
+        nt = Node('nt')
+        nt.set_subnodes_with_csts([1, ['u>', [a, 1, 3], [b, 1]]])
+        node_list = nt.cc.subnodes_order[1]
+
+        expanded = nt.cc._generate_expanded_nodelist(node_list)
+        self.assertEqual(len(expanded), 3)
+        expanded.pop(-1)
+        self.assertEqual(len(nt.cc._generate_expanded_nodelist(node_list)), 3)
+
+        nt.cc.set_subnode_minmax(a, 2, 2)
+        self.assertEqual(nt.cc._generate_expanded_nodelist(node_list), [node_list])
+        nt.set_env(Env())
+        nt.make_determinist(all_conf=True, recursive=True)
+        self.assertEqual(nt.to_bytes(), b'AAB')
+
+
+class TestEnv(unittest.TestCase):
+
+    def test_update_node_refs(self):
+        a, b, c = Node('a', values=['A']), Node('b', values=['B']), Node('c', values=['C'])
+        a2, b2 = Node('a2', values=['A']), Node('b2', values=['B'])
+        env = Env()
+        env.notify_exhausted_node(a)
+        env.notify_exhausted_node(c)
+        env.notify_exhausted_node(a)
+        self.assertEqual(env.get_exhausted_nodes(), [a, c])
+        env.nodes_to_corrupt[b] = 'op'
+
+        env.update_node_refs({a: a2, b: b2}, ignore_frozen_state=False)
+        self.assertEqual(env.get_exhausted_nodes(), [a2])
+        self.assertEqual(env.nodes_to_corrupt, {b2: 'op'})
+        self.assertEqual(env.id_map, {id(a): id(a2), id(b): id(b2)})
+
+    def test_remove_djob(self):
+        a, b = Node('a', values=['A']), Node('b', values=['B'])
+        group = DJobGroup([a, b])
+        env = Env()
+        for n in group:
+            env.register_djob(lambda: None, group=group, key=id(n), prio=Node.DJOBS_PRIO_nterm_existence)
+        self.assertTrue(env.djobs_exists(Node.DJOBS_PRIO_nterm_existence))
+
+        env.remove_djob(group, id(a), prio=Node.DJOBS_PRIO_nterm_existence)
+        self.assertTrue(env.delayed_jobs_pending)
+        env.remove_djob(group, id(b), prio=Node.DJOBS_PRIO_nterm_existence)
+        self.assertFalse(env.djobs_exists(Node.DJOBS_PRIO_nterm_existence))
+        self.assertFalse(env.delayed_jobs_pending)
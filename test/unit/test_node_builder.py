@@ -1,5 +1,6 @@
 from framework.node_builder import *
 import framework.value_types as vt
+import struct
 import unittest
 import ddt
 import six
@@ -17,6 +18,7 @@ class RegexParserTest(unittest.TestCase):
         pass
 
     def setUp(self):
+        RegexParser.clear_cache()
         self._parser = RegexParser()
         self._parser._create_terminal_node = mock.Mock()
 
@@ -354,6 +356,33 @@ class RegexParserTest(unittest.TestCase):
 
 
 
+    @ddt.data(
+        {'regex': "GET|POST|PUT", 'nodes': [{'values': ['GET', 'POST', 'PUT']}]},
+        {'regex': "12|34", 'nodes': [{'values': [12, 34], 'type': vt.INT_str}]},
+        {'regex': "a||b", 'nodes': [{'values': ['a', '', 'b']}]},
+        {'regex': "[a-cx]+", 'nodes': [{'alphabet': 'abcx', 'qty': (1, None)}]},
+        {'regex': "[0-3]?", 'nodes': [{'values': [0, 1, 2, 3], 'type': vt.INT_str, 'qty': (0, 1)}]},
+    )
+    def test_simple_regexes(self, test_case):
+        with mock.patch.object(self._parser, '_parse_regex') as parse_regex:
+            self.assert_regex_is_valid(test_case)
+        self.assertFalse(parse_regex.called)
+
+    def test_cache(self):
+        test_case = {'regex': "(toto)ohoho|haha",
+                     'nodes': [{'values': ['toto']}, {'values': ['ohoho']}, {'values': ['haha']}]}
+        self.assert_regex_is_valid(test_case)
+
+        self._parser = RegexParser()
+        self._parser._create_terminal_node = mock.Mock()
+        with mock.patch.object(self._parser, '_parse_regex') as parse_regex:
+            self.assert_regex_is_valid(test_case)
+        self.assertFalse(parse_regex.called)
+
+        # the charset is part of the key
+        RegexParser().parse(u"(toto)oh\u00e9|haha", "name", MH.Charset.ASCII_EXT)
+        self.assertRaises(CharsetError, RegexParser().parse, u"(toto)oh\u00e9|haha", "name", MH.Charset.ASCII)
+
     def assert_regex_is_valid(self, test_case):
 
         charset = test_case['charset'] if 'charset' in test_case else MH.Charset.ASCII_EXT
@@ -378,4 +407,50 @@ class RegexParserTest(unittest.TestCase):
 
     def assert_regex_is_invalid(self, test_case):
         charset = test_case['charset'] if 'charset' in test_case else MH.Charset.ASCII_EXT
-        self.assertRaises(Exception, self._parser.parse, test_case['regex'], "name", charset)
\ No newline at end of file
+        self.assertRaises(Exception, self._parser.parse, test_case['regex'], "name", charset)
+
+
+class NodeTemplateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.desc = \
+            {'name': 'msg',
+             'contents': [
+                 {'name': 'len',
+                  'contents': lambda x: Node('cts', values=[struct.pack('B', len(x.to_bytes()))]),
+                  'node_args': 'payload'},
+                 {'name': 'payload',
+                  'contents': vt.String(values=['hello', 'world!'])},
+                 {'name': 'crc',
+                  'contents': vt.String(values=['x']),
+                  'qty': (1, 3)}
+             ]}
+
+    def test_instantiate(self):
+        template = NodeBuilder().compile(self.desc)
+        self.assertEqual(template.name, 'msg')
+
+        n1 = template.instantiate()
+        n2 = template.instantiate('msg2')
+        self.assertEqual(n2.name, 'msg2')
+        self.assertIsNot(n1.env, n2.env)
+        self.assertIsNotNone(n1.env)
+
+        self.assertIsNot(n1['/payload$'].cc.value_type, n2['/payload$'].cc.value_type)
+        n1.freeze()
+        n1.unfreeze(recursive=True)
+        n1.freeze()
+        n2.freeze()
+        self.assertEqual(n1['/payload$'].to_bytes(), b'world!')
+        self.assertEqual(n2['/payload$'].to_bytes(), b'hello')
+        self.assertEqual(n1['/len$'].to_bytes(), b'\x06')
+        self.assertEqual(n2['/len$'].to_bytes(), b'\x05')
+
+        nb = NodeBuilder()
+        self.assertEqual(nb.create_graph_from_desc(self.desc).to_bytes(), n2.to_bytes())
+
+        self.assertIsNone(NodeBuilder(add_env=False).compile(self.desc).instantiate().env)
+
+    def test_invalid_key(self):
+        self.assertRaises(KeyError, NodeBuilder().compile,
+                          {'name': 'n', 'contents': vt.String(values=['a']), 'invalid': 1})
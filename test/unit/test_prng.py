@@ -0,0 +1,79 @@
+################################################################################
+#
+#  Copyright 2014-2016 Eric Lacombe <eric.lacombe@security-labs.org>
+#
+################################################################################
+#
+#  This file is part of fuddly.
+#
+#  fuddly is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  fuddly is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with fuddly. If not, see <http://www.gnu.org/licenses/>
+#
+################################################################################
+
+
+import random
+import threading
+import unittest
+from framework.prng import PRNGContext, tc_random
+from framework.basic_primitives import corrupt_bits, corrupt_bytes, rand_string
+
+
+class PRNGContextTest(unittest.TestCase):
+    """Test case used to test the 'PRNGContext' class."""
+
+    def test_streams(self):
+        ctx = PRNGContext(seed=42)
+        ref = [ctx.at(i).stream('dmaker').random() for i in range(5)]
+        self.assertEqual(len(set(ref)), 5)
+
+        # streams only depend on the seed, the index and the stream path
+        ctx.seek(3)
+        self.assertEqual(ctx.stream('dmaker').random(), ref[3])
+        self.assertNotEqual(ctx.stream('other').random(), ref[3])
+        self.assertNotEqual(PRNGContext(seed=43, index=3).stream('dmaker').random(), ref[3])
+        ctx.next()
+        self.assertEqual(ctx.index, 4)
+        self.assertEqual(ctx.stream('dmaker').random(), ref[4])
+
+    def test_test_case_generator(self):
+        ctx = PRNGContext(seed=42, index=7)
+        state = random.getstate()
+        try:
+            tc_random.bind(ctx.generator())
+            ref = [tc_random.randint(0, 1000) for _ in range(100)]
+
+            # the other threads draw from the random module while a test case is generated
+            stop = threading.Event()
+            def draw():
+                while not stop.is_set():
+                    tc_random.random()
+            thread = threading.Thread(target=draw)
+            thread.start()
+            try:
+                tc_random.bind(ctx.at(7).generator())
+                self.assertEqual([tc_random.randint(0, 1000) for _ in range(100)], ref)
+            finally:
+                stop.set()
+                thread.join()
+        finally:
+            tc_random.bind(None)
+        self.assertIs(tc_random.get_generator(), random)
+        self.assertNotEqual(random.getstate(), state)
+
+    def test_basic_primitives(self):
+        ctx = PRNGContext(seed=1)
+        for func in (lambda rng: corrupt_bits(b'ABCDEFGH', n=3, rng=rng),
+                     lambda rng: corrupt_bytes(b'ABCDEFGH', n=3, rng=rng),
+                     lambda rng: rand_string(min=5, max=20, rng=rng)):
+            self.assertEqual(func(ctx.stream('test')), func(ctx.stream('test')))
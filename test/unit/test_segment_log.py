@@ -0,0 +1,154 @@
+################################################################################
+#
+#  Copyright 2014-2016 Eric Lacombe <eric.lacombe@security-labs.org>
+#
+################################################################################
+#
+#  This file is part of fuddly.
+#
+#  fuddly is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  fuddly is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with fuddly. If not, see <http://www.gnu.org/licenses/>
+#
+################################################################################
+
+
+import os
+import shutil
+import tempfile
+import datetime
+import unittest
+import ddt
+from framework.segment_log import SegmentLog, SegmentLogReader
+
+
+@ddt.ddt
+class SegmentLogTest(unittest.TestCase):
+    """Test case used to test the 'SegmentLog' and 'SegmentLogReader' classes."""
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'segments')
+
+    def tearDown(self):
+        shutil.rmtree(os.path.dirname(self.path))
+
+    def _fill_log(self, nb_data, **kwargs):
+        log = SegmentLog(self.path, **kwargs)
+        log.open()
+        now = datetime.datetime.now()
+        for data_id in range(1, nb_data + 1):
+            log.append_data(data_id, b'data-%d' % data_id * 20, date=now, dm_name='dm', dtype='GEN',
+                            file_extension='png')
+            log.append_feedback(data_id, 'target', b'fbk-%d' % data_id, date=now, status=-data_id % 3)
+        log.close()
+
+    @ddt.data(False, True)
+    def test_records(self, compress):
+        self._fill_log(50, compress=compress, max_segment_size=1024)
+        self.assertGreater(len(SegmentLog.list_segments(self.path)), 1)
+
+        with SegmentLogReader(self.path) as reader:
+            records = list(reader.iter_records())
+            self.assertEqual(len(records), 100)
+            self.assertEqual([r.data_id for r in records if r.type == SegmentLog.DATA],
+                             list(range(1, 51)))
+
+            rec = reader.get_data(42)
+            self.assertEqual(rec.content, b'data-42' * 20)
+            self.assertEqual(rec.source, 'dm')
+            self.assertEqual(rec.info, 'GEN')
+
+            fbk = reader.get_feedback(42)
+            self.assertEqual(len(fbk), 1)
+            self.assertEqual(fbk[0].content, b'fbk-42')
+            self.assertEqual(fbk[0].source, 'target')
+            self.assertEqual(fbk[0].status, -42 % 3)
+
+            data = list(reader.iter_records(10, 19, record_type=SegmentLog.DATA))
+            self.assertEqual([r.data_id for r in data], list(range(10, 20)))
+
+    def test_late_feedback(self):
+        # burst mode: the feedback is appended after the data that have been sent afterwards
+        log = SegmentLog(self.path, max_segment_size=256)
+        log.open()
+        for burst in range(4):
+            ids = range(burst * 5 + 1, burst * 5 + 6)
+            for data_id in ids:
+                log.append_data(data_id, b'data-%d' % data_id * 10)
+            for data_id in reversed(ids):
+                log.append_feedback(data_id, 'target', b'fbk-%d' % data_id)
+                log.append_feedback(data_id, 'probe', b'fbk-%d' % data_id)
+        log.close()
+        self.assertGreater(len(SegmentLog.list_segments(self.path)), 1)
+
+        with SegmentLogReader(self.path) as reader:
+            for data_id in range(1, 21):
+                self.assertEqual(reader.get_data(data_id).content, b'data-%d' % data_id * 10)
+                self.assertEqual([(r.source, r.content) for r in reader.get_feedback(data_id)],
+                                 [('target', b'fbk-%d' % data_id), ('probe', b'fbk-%d' % data_id)])
+            self.assertIsNone(reader.get_data(21))
+            records = list(reader.iter_records(4, 7))
+            self.assertEqual([(r.type, r.data_id) for r in records],
+                             [(SegmentLog.DATA, 4), (SegmentLog.DATA, 5)]
+                             + [(SegmentLog.FEEDBACK, 5)] * 2 + [(SegmentLog.FEEDBACK, 4)] * 2
+                             + [(SegmentLog.DATA, 6), (SegmentLog.DATA, 7)]
+                             + [(SegmentLog.FEEDBACK, 7)] * 2 + [(SegmentLog.FEEDBACK, 6)] * 2)
+
+    def test_append_after_reopen(self):
+        self._fill_log(5)
+        log = SegmentLog(self.path)
+        log.open()
+        log.append_data(6, b'last')
+        log.close()
+        folder = os.path.join(os.path.dirname(self.path), 'export')
+
+        with SegmentLogReader(self.path) as reader:
+            self.assertEqual(len(SegmentLog.list_segments(self.path)), 1)
+            self.assertEqual(reader.get_data(6).content, b'last')
+            self.assertEqual(reader.get_data(5).content, b'data-5' * 20)
+            # no file extension recorded
+            self.assertEqual(reader.get_data(6).file_extension, '')
+            self.assertEqual(reader.export_data(folder, first_id=6)[0][1], os.path.join(folder, '6.bin'))
+
+    def test_truncated_record(self):
+        self._fill_log(3)
+        log_path, _ = SegmentLog.segment_files(self.path, 0)
+        with open(log_path, 'r+b') as f:
+            f.truncate(os.path.getsize(log_path) - 2)
+
+        with SegmentLogReader(self.path) as reader:
+            self.assertEqual(len(list(reader.iter_records())), 5)
+            self.assertIsNotNone(reader.get_data(3))
+            self.assertEqual(reader.get_feedback(3), [])
+
+    def test_export_data(self):
+        self._fill_log(10)
+        folder = os.path.join(os.path.dirname(self.path), 'export')
+        with SegmentLogReader(self.path) as reader:
+            exported = reader.export_data(folder, first_id=3, last_id=5)
+        self.assertEqual([data_id for data_id, _ in exported], [3, 4, 5])
+        self.assertEqual(os.path.basename(exported[0][1]), '3.png')
+        with open(exported[0][1], 'rb') as f:
+            self.assertEqual(f.read(), b'data-3' * 20)
+
+    def test_large_strings(self):
+        log = SegmentLog(self.path)
+        log.open()
+        # source and info are longer than 65535 bytes
+        log.append_data(1, b'data', dm_name='d' * 70000, dtype='t' * 70000)
+        log.append_feedback(1, 's' * 70000, b'fbk')
+        log.close()
+
+        with SegmentLogReader(self.path) as reader:
+            rec = reader.get_data(1)
+            self.assertEqual((rec.source, rec.info, rec.content), ('d' * 70000, 't' * 70000, b'data'))
+            self.assertEqual(reader.get_feedback(1)[0].source, 's' * 70000)
@@ -0,0 +1,98 @@
+################################################################################
+#
+#  Copyright 2014-2016 Eric Lacombe <eric.lacombe@security-labs.org>
+#
+################################################################################
+#
+#  This file is part of fuddly.
+#
+#  fuddly is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  fuddly is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with fuddly. If not, see <http://www.gnu.org/licenses/>
+#
+################################################################################
+
+
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+from datetime import datetime
+
+from framework.database import Database
+from framework.global_resources import UI
+from framework.sharding import ShardedCampaign, split_range
+
+
+class ShardingTest(unittest.TestCase):
+    """Test case used to test the campaign sharding helpers."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_split_range(self):
+        shards = split_range(11, 3)
+        self.assertEqual([(s.shard_id, s.start, s.count) for s in shards],
+                         [(0, 0, 4), (1, 4, 4), (2, 8, 3)])
+        self.assertEqual(len(split_range(2, 5)), 2)
+        self.assertRaises(ValueError, split_range, 0, 2)
+
+    def test_campaign(self):
+        campaign = ShardedCampaign('tuto', ['SHAPE', ('tTYPE', UI(deep=True))], 10,
+                                   seed=5, walk=True)
+        campaign = pickle.loads(pickle.dumps(campaign))
+        self.assertEqual(campaign.seed, 5)
+
+        shard = campaign.split(2)[1]
+        actions = campaign.get_shard_actions(shard)
+        self.assertEqual(actions[0], 'SHAPE')
+        self.assertEqual(actions[1][0], 'tTYPE')
+        self.assertEqual(actions[1][1].get_inputs(), {'deep': True, 'init': 6, 'max_steps': 5})
+        # the campaign itself is not altered
+        self.assertEqual(campaign.actions[1][1].get_inputs(), {'deep': True})
+
+        campaign = ShardedCampaign('tuto', ['SHAPE'], 10)
+        self.assertIsNotNone(campaign.seed)
+        self.assertEqual(campaign.get_shard_actions(campaign.split(2)[1]), ['SHAPE'])
+
+    def _create_db(self, name, contents):
+        db = Database(fmkdb_path=os.path.join(self.tmp_dir, name))
+        self.assertTrue(db.start())
+        db.insert_data_model('dm')
+        db.insert_project('prj')
+        for group_id, content in contents:
+            now = datetime.now()
+            data_id = db.insert_data('T', 'dm', content, len(content), now, now, 'tg', 'prj',
+                                     group_id=group_id)
+            db.insert_feedback(data_id, 'src', now, content.lower(), status_code=0)
+        return db
+
+    def test_merge_fmkdb(self):
+        dest = self._create_db('dest.db', [(1, b'A'), (2, b'B')])
+        src = self._create_db('src.db', [(1, b'C'), (1, b'D'), (2, b'E')])
+        src.stop()
+
+        try:
+            self.assertEqual(dest.merge_fmkdb(src.fmk_db_path), (3, 5))
+            self.assertEqual(dest.execute_sql_statement('SELECT ID, GROUP_ID, CONTENT FROM DATA'),
+                             [(1, 1, b'A'), (2, 2, b'B'), (3, 3, b'C'), (4, 3, b'D'), (5, 4, b'E')])
+            self.assertEqual(dest.execute_sql_statement('SELECT DATA_ID, CONTENT FROM FEEDBACK'),
+                             [(1, b'a'), (2, b'b'), (3, b'c'), (4, b'd'), (5, b'e')])
+            # new data are recorded after the merged ones
+            now = datetime.now()
+            self.assertEqual(dest.insert_data('T', 'dm', b'F', 1, now, now, 'tg', 'prj'), 6)
+        finally:
+            dest.stop()
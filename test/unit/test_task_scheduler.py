@@ -0,0 +1,144 @@
+################################################################################
+#
+#  Copyright 2016 Eric Lacombe <eric.lacombe@security-labs.org>
+#
+################################################################################
+#
+#  This file is part of fuddly.
+#
+#  fuddly is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  fuddly is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with fuddly. If not, see <http://www.gnu.org/licenses/>
+#
+################################################################################
+
+
+
+import threading
+import time
+import unittest
+
+from framework.data import Data
+from framework.error_handling import DataProcessTermination
+from framework.plumbing import FmkTask, TaskScheduler
+from framework.target_helpers import Target
+
+
+class RecordingTarget(Target):
+    """Target that does not implement send_multiple_data()"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sent = []
+
+    def send_data(self, data, from_fmk=False):
+        with self.lock:
+            self.sent.append([data.to_bytes()])
+
+
+class MultipleDataTarget(RecordingTarget):
+
+    def send_multiple_data(self, data_list, from_fmk=False):
+        with self.lock:
+            self.sent.append([d.to_bytes() for d in data_list])
+
+    def can_send_multiple_data(self, data_list):
+        return len(set(d.to_bytes() for d in data_list)) == len(data_list)
+
+
+class TaskSchedulerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.scheduler = TaskScheduler()
+
+    def tearDown(self):
+        self.scheduler.stop()
+
+    def test_fixed_rate(self):
+        dates = []
+
+        def slow_func(arg):
+            dates.append(time.time())
+            time.sleep(0.02)
+
+        task = FmkTask('slow', slow_func, None, period=0.05)
+        self.scheduler.add_task(task)
+        time.sleep(0.52)
+        task.stop()
+
+        # the execution time of the task does not delay the following executions
+        self.assertGreaterEqual(len(dates), 9)
+        mean_period = (dates[-1] - dates[0]) / (len(dates) - 1)
+        self.assertAlmostEqual(mean_period, 0.05, delta=0.006)
+        self.assertEqual(task.nb_runs, len(dates))
+        self.assertLess(task.jitter_mean, 0.03)
+        self.assertGreaterEqual(task.jitter_max, task.jitter_mean)
+
+    def test_batching_per_target(self):
+        tg1 = MultipleDataTarget()
+        tg2 = MultipleDataTarget()
+        task1 = FmkTask('t1', None, Data(b'A'), period=0.05, targets=[tg1, tg2])
+        task2 = FmkTask('t2', None, Data(b'B'), period=0.05, targets=[tg1])
+        self.scheduler.add_task(task1)
+        self.scheduler.add_task(task2)
+        time.sleep(0.28)
+        task1.stop()
+        task2.stop()
+
+        self.assertIn([b'A', b'B'], tg1.sent)
+        self.assertEqual(sum(len(d) for d in tg1.sent), task1.nb_runs + task2.nb_runs)
+        self.assertEqual(tg2.sent, [[b'A']] * task1.nb_runs)
+
+    def test_no_batching(self):
+        errors = []
+        tg1 = RecordingTarget()
+        tg2 = MultipleDataTarget()
+        tasks = [FmkTask(str(i), None, Data(b'A'), period=0.05, targets=[tg1, tg2],
+                         error_func=errors.append) for i in range(2)]
+        for task in tasks:
+            self.scheduler.add_task(task)
+        time.sleep(0.28)
+        for task in tasks:
+            task.stop()
+
+        self.assertEqual(errors, [])
+        nb_runs = sum(task.nb_runs for task in tasks)
+        self.assertGreaterEqual(nb_runs, 8)
+        # tg1 does not implement send_multiple_data() and tg2 does not accept the same data twice
+        self.assertEqual(tg1.sent, [[b'A']] * nb_runs)
+        self.assertEqual(tg2.sent, [[b'A']] * nb_runs)
+
+    def test_one_shot_and_termination(self):
+        tg = RecordingTarget()
+        cleaned_up = threading.Event()
+        errors = []
+
+        def get_data(arg):
+            raise DataProcessTermination
+
+        def crash(arg):
+            raise ValueError
+
+        one_shot = FmkTask('one shot', None, Data(b'C'), targets=[tg],
+                           cleanup_func=cleaned_up.set)
+        terminated = FmkTask('terminated', get_data, None, period=0.01, targets=[tg])
+        crashed = FmkTask('crashed', crash, None, period=0.01, error_func=errors.append)
+        for task in (one_shot, terminated, crashed):
+            self.scheduler.add_task(task)
+
+        self.assertTrue(cleaned_up.wait(1))
+        time.sleep(0.1)
+        self.assertEqual(tg.sent, [[b'C']])
+        for task in (one_shot, terminated, crashed):
+            self.assertTrue(task.is_stopped())
+            self.assertEqual(task.nb_runs, 1)
+        self.assertEqual(errors, ["Task 'crashed' has crashed!"])
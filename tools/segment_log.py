@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+#  Copyright 2014-2016 Eric Lacombe <eric.lacombe@security-labs.org>
+#
+################################################################################
+#
+#  This file is part of fuddly.
+#
+#  fuddly is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  fuddly is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with fuddly. If not, see <http://www.gnu.org/licenses/>
+#
+################################################################################
+
+
+import os
+import sys
+import inspect
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0,parentdir)
+
+from framework.segment_log import SegmentLog, SegmentLogReader
+from libs.external_modules import *
+import framework.global_resources as gr
+
+import argparse
+
+parser = argparse.ArgumentParser(description='Argument for the segment log toolkit script')
+
+parser.add_argument('path', metavar='PATH', help='Path to the segment log folder')
+
+group = parser.add_argument_group('Miscellaneous Options')
+group.add_argument('--no-color', action='store_true', help='Do not use colors')
+group.add_argument('--limit', type=int, default=None,
+                   help='Limit the size of what is displayed from the sent data and the '
+                        'retrieved feedback')
+
+group = parser.add_argument_group('Segment Log Operations')
+group.add_argument('--ids', nargs=2, metavar=('FIRST_DATA_ID','LAST_DATA_ID'), type=int,
+                   help='Restrict the operations to the provided data ID range. Without '
+                        'any other parameters the default action is to display the records '
+                        'of this range')
+group.add_argument('-wd', '--with-data', action='store_true', help='Display data content')
+group.add_argument('-wf', '--with-fbk', action='store_true', help='Display feedback content')
+group.add_argument('--export-data', metavar='FOLDER', nargs='?', const=gr.exported_data_folder,
+                   help='Extract data in FOLDER (default to the fuddly exported data folder)')
+
+
+def display_content(content, limit):
+    if limit is not None and len(content) > limit:
+        content = content[:limit]
+        suffix = ' ...'
+    else:
+        suffix = ''
+    return '{!a}'.format(content) + suffix if sys.version_info[0] > 2 else repr(content) + suffix
+
+
+if __name__ == "__main__":
+
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.path):
+        print(colorize("*** ERROR: '{:s}' does not exist ***".format(args.path), rgb=Color.ERROR))
+        sys.exit(-1)
+
+    colorized = not args.no_color
+    if not colorized:
+        def colorize(string, rgb=None, ansi=None, bg=None, ansi_bg=None, fd=1):
+            return string
+
+    first_id, last_id = args.ids if args.ids is not None else (None, None)
+
+    reader = SegmentLogReader(args.path)
+
+    if args.export_data is not None:
+        exported = reader.export_data(args.export_data, first_id=first_id, last_id=last_id)
+        for data_id, fname in exported:
+            print(colorize("Data ID #{:d} --> {:s}".format(data_id, fname), rgb=Color.FMKINFO))
+        if not exported:
+            print(colorize("*** ERROR: The provided DATA IDs do not exist ***", rgb=Color.ERROR))
+
+    else:
+        for rec in reader.iter_records(first_id, last_id):
+            date = rec.timestamp.strftime("%d/%m/%Y - %H:%M:%S")
+            if rec.type == SegmentLog.DATA:
+                print(colorize("Data ID #{:d}".format(rec.data_id), rgb=Color.FMKINFOGROUP)
+                      + colorize(" | {:s} | type: {:s} | data model: {:s} | size: {:d} bytes"
+                                 .format(date, rec.info, rec.source, len(rec.content)),
+                                 rgb=Color.FMKSUBINFO))
+                if args.with_data:
+                    print(colorize(display_content(rec.content, args.limit), rgb=Color.DATAINFO))
+            else:
+                print(colorize("   |_ Feedback from '{:s}' (status={:d})"
+                               .format(rec.source, rec.status), rgb=Color.FEEDBACK)
+                      + colorize(" | {:s}".format(date), rgb=Color.FMKSUBINFO))
+                if args.with_fbk:
+                    print(colorize(display_content(rec.content, args.limit), rgb=Color.DATAINFO))
+
+    reader.close()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+#  Copyright 2016 Eric Lacombe <eric.lacombe@security-labs.org>
+#
+################################################################################
+#
+#  This file is part of fuddly.
+#
+#  fuddly is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  fuddly is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with fuddly. If not, see <http://www.gnu.org/licenses/>
+#
+################################################################################
+
+
+import os
+import sys
+import inspect
+import binascii
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0,parentdir)
+
+from framework.sharding import run_shard_worker, AUTHKEY_ENV_VAR
+from libs.external_modules import *
+
+import argparse
+
+parser = argparse.ArgumentParser(description='Run a shard of a campaign dispatched by a '
+                                             'fuddly shard coordinator')
+
+parser.add_argument('--connect', metavar='HOST:PORT', required=True,
+                    help='Address of the shard coordinator')
+parser.add_argument('--authkey', metavar='HEX_KEY', default=os.environ.get(AUTHKEY_ENV_VAR),
+                    help='Authentication key shared with the coordinator (default to the '
+                         'content of the environment variable {:s})'.format(AUTHKEY_ENV_VAR))
+
+
+if __name__ == "__main__":
+
+    args = parser.parse_args()
+
+    if args.authkey is None:
+        print(colorize("*** ERROR: no authentication key provided ***", rgb=Color.ERROR))
+        sys.exit(-1)
+
+    host, port = args.connect.rsplit(':', 1)
+    run_shard_worker((host, int(port)), binascii.unhexlify(args.authkey))